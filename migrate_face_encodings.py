@@ -0,0 +1,18 @@
+# migrate_face_encodings.py
+# One-off migration: rewrites legacy face encodings (lists of 128 floats) in the
+# people collection as packed float32 Binary. Safe to re-run; already-packed
+# documents are skipped.
+
+try:
+    from src.database import migrate_face_encodings, client
+except ImportError as e:
+    print(f"Error importing project modules: {e}")
+    print("Make sure this script is run from your main project directory or adjust import paths.")
+    exit()
+
+
+if __name__ == "__main__":
+    if not client:
+        print("❌ Cannot migrate: No database connection.")
+    else:
+        migrate_face_encodings()
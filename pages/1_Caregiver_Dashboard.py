@@ -1,8 +1,8 @@
 # pages/1_Caregiver_Dashboard.py
 import streamlit as st
 from datetime import datetime, timedelta
-from src.database import get_all_conversations
-from src.caregiver_chatbot import answer_caregiver_question
+from src.database import get_all_conversations, get_active_alerts, acknowledge_alert
+from src.caregiver_chatbot import stream_caregiver_answer
 import pandas as pd
 import calendar
 
@@ -71,6 +71,19 @@ if 'chat_history' not in st.session_state:
 if 'show_chatbot' not in st.session_state:
     st.session_state.show_chatbot = False
 
+# ========================================
+# EMERGENCY BANNER
+# ========================================
+for alert in get_active_alerts():
+    col_alert, col_ack = st.columns([5, 1])
+    with col_alert:
+        st.error(f"🚨 **Emergency: {alert['emergency_type']}** at {alert['detected_at'].strftime('%I:%M %p, %b %d')} "
+                 f"({alert.get('speaker_identity', 'patient')}) — \"{alert.get('transcript', '')[-150:]}\"")
+    with col_ack:
+        if st.button("✅ Acknowledge", key=f"ack_{alert['id']}", use_container_width=True):
+            acknowledge_alert(alert['id'])
+            st.rerun()
+
 # Fetch data
 all_summaries = get_all_conversations()
 
@@ -123,32 +136,42 @@ if st.session_state.show_chatbot:
         st.markdown('</div>', unsafe_allow_html=True)
 
         # Input for new question
-        col_input, col_send = st.columns([4, 1])
+        col_input, col_range, col_send = st.columns([4, 1, 1])
 
         with col_input:
             user_question = st.text_input("Your question:", key="chatbot_input",
                                           placeholder="How has the patient been feeling?")
 
+        with col_range:
+            lookback_options = {"Last week": 7, "Last month": 30, "Last 3 months": 90, "Last year": 365}
+            lookback_label = st.selectbox("Look back", options=list(lookback_options), key="chatbot_lookback")
+
         with col_send:
-            if st.button("Send", use_container_width=True, type="primary"):
-                if user_question.strip():
-                    # Add user message
-                    st.session_state.chat_history.append({
-                        'role': 'user',
-                        'content': user_question
-                    })
-
-                    # Get AI response
-                    with st.spinner("🤔 Analyzing data..."):
-                        answer = answer_caregiver_question(user_question)
-
-                    # Add assistant response
-                    st.session_state.chat_history.append({
-                        'role': 'assistant',
-                        'content': answer
-                    })
-
-                    st.rerun()
+            send_clicked = st.button("Send", use_container_width=True, type="primary")
+
+        if send_clicked and user_question.strip():
+            # Add user message
+            st.session_state.chat_history.append({
+                'role': 'user',
+                'content': user_question
+            })
+            st.markdown(f'<div class="chat-message chat-user">👤 You: {user_question}</div>',
+                        unsafe_allow_html=True)
+
+            # Stream AI response token by token
+            with st.container(border=True):
+                st.caption("🤖 Assistant")
+                answer = st.write_stream(
+                    stream_caregiver_answer(user_question, days_back=lookback_options[lookback_label])
+                )
+
+            # Add assistant response
+            st.session_state.chat_history.append({
+                'role': 'assistant',
+                'content': answer
+            })
+
+            st.rerun()
 
         # Clear chat button
         if st.session_state.chat_history:
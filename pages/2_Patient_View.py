@@ -2,11 +2,12 @@
 import streamlit as st
 from datetime import datetime, time
 from src.database import get_all_medications, get_all_people, get_settings
-from src.recap_generator import generate_daily_recap
+from src.recap_generator import get_daily_recap, generate_period_recap
 from src.text_to_speech import text_to_speech
 from src.smart_reminder import generate_smart_reminder
 from src.patient_assistant import answer_patient_question
 from src.transcriber import transcribe_audio
+from src.thumbnails import get_thumbnail
 import os
 import re
 from pathlib import Path
@@ -143,12 +144,25 @@ if 'recap_audio_path' not in st.session_state:
     st.session_state.recap_audio_path = None
 if 'recap_script' not in st.session_state:
     st.session_state.recap_script = None
+if 'recap_audio_is_temp' not in st.session_state:
+    st.session_state.recap_audio_is_temp = True
 
 if st.button("Tell Me About My Day", use_container_width=True, type="primary"):
     with st.spinner("Thinking about your day..."):
-        st.session_state.recap_script = generate_daily_recap()
+        # Kept up to date after every conversation, so this is normally instant
+        st.session_state.recap_script, audio_path = get_daily_recap()
+        st.session_state.recap_audio_is_temp = audio_path is None
+        if audio_path is None:
+            audio_path = text_to_speech(st.session_state.recap_script)
+        st.session_state.recap_audio_path = str(audio_path)
+        st.rerun()
+
+if st.button("Tell Me About My Week", use_container_width=True):
+    with st.spinner("Thinking about your week..."):
+        st.session_state.recap_script = generate_period_recap(days_back=7)
         audio_path = text_to_speech(st.session_state.recap_script)
         st.session_state.recap_audio_path = str(audio_path)
+        st.session_state.recap_audio_is_temp = True
         st.rerun()
 
 # Display recap with photos
@@ -170,9 +184,9 @@ if st.session_state.recap_script:
         if found_person:
             col_img, col_text = st.columns([1, 4])
             with col_img:
-                photo_path = found_person['photo_url']
-                if Path(photo_path).exists():
-                    st.image(photo_path, width=80, caption=f"{found_person['name']}")
+                thumbnail = get_thumbnail(found_person['photo_url'], "small", found_person.get('photo_hash'))
+                if thumbnail:
+                    st.image(thumbnail, width=80, caption=f"{found_person['name']}")
                 else:
                     st.image("https://via.placeholder.com/150", width=80, caption=f"{found_person['name']}")
             with col_text:
@@ -182,10 +196,11 @@ if st.session_state.recap_script:
 
     if st.session_state.recap_audio_path:
         st.audio(str(st.session_state.recap_audio_path), autoplay=True)
-        try:
-            os.remove(st.session_state.recap_audio_path)
-        except:
-            pass
+        if st.session_state.recap_audio_is_temp:
+            try:
+                os.remove(st.session_state.recap_audio_path)
+            except:
+                pass
         st.session_state.recap_audio_path = None
 else:
     st.info("Click the button above and I'll tell you about your day!")
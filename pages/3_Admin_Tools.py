@@ -1,15 +1,18 @@
 # pages/3_Admin_Tools.py
 import streamlit as st
 from datetime import datetime, time, date, timedelta
-from src.schemas import Medication, PersonProfile
+from src.schemas import Medication, PersonProfile, HomeInfo
 from src.database import (
     save_conversation, add_medication, get_all_medications, update_medication,
     delete_medication, add_person, get_all_people, delete_person, update_person,
-    get_settings, update_settings
+    get_settings, update_settings, add_home_info, get_all_home_info, delete_home_info
 )
+from src.face_enrollment import submit_enrollment, get_enrollment_status, list_photos
+from src.thumbnails import get_thumbnail, create_thumbnails
+from src.intent_router import get_router_stats
+from src.alerts import get_alert_latency_stats
+from src.llm_gateway import get_llm_stats
 from pathlib import Path
-import face_recognition
-import numpy as np
 import requests
 
 # Reset dialog states on page load
@@ -83,6 +86,15 @@ def close_person_dialog():
     st.session_state.show_person_dialog = False
 
 
+@st.cache_data(ttl=10)  # Reruns reuse the result instead of calling the token server each time
+def check_token_server() -> bool:
+    try:
+        response = requests.get("http://localhost:5000/health", timeout=2)
+        return response.status_code == 200
+    except requests.RequestException:
+        return False
+
+
 # ========================================
 # ROW 1: SYSTEM SETTINGS & LIVEKIT CONTROL
 # ========================================
@@ -128,12 +140,7 @@ with col_settings2:
         st.markdown("**🎤 LiveKit Recording Control**")
 
         # Check if token server is running
-        token_server_running = False
-        try:
-            response = requests.get("http://localhost:5000/health", timeout=2)
-            token_server_running = response.status_code == 200
-        except:
-            pass
+        token_server_running = check_token_server()
 
         # Display status
         status_class = "status-active" if token_server_running else "status-inactive"
@@ -278,8 +285,9 @@ with col2:
 
                 with p_img_col:
                     photo_path = person.get('photo_url', 'https://via.placeholder.com/150')
-                    if Path(photo_path).is_file():
-                        st.image(photo_path, width=70, use_container_width=True)
+                    thumbnail = get_thumbnail(photo_path, "small", person.get('photo_hash'))
+                    if thumbnail:
+                        st.image(thumbnail, width=70, use_container_width=True)
                     else:
                         st.image('https://via.placeholder.com/150', width=70, use_container_width=True)
 
@@ -287,8 +295,15 @@ with col2:
                     st.markdown(f"**{person.get('name', 'N/A')}**")
                     st.caption(f"👤 {person.get('relationship', 'N/A')}")
 
-                    if person.get("face_encoding"):
+                    enrollment = get_enrollment_status(person_id)
+                    if enrollment and enrollment.get("state") == "pending":
+                        st.caption(f"⏳ Encoding {enrollment.get('photos', 0)} photo(s)...")
+                    elif person.get("face_encodings"):
+                        st.caption(f"✅ Face recognized ({len(person['face_encodings'])} photos)")
+                    elif person.get("face_encoding"):
                         st.caption("✅ Face recognized")
+                    elif enrollment and enrollment.get("state") == "failed":
+                        st.caption("⚠️ No face found in photos")
                     else:
                         st.caption("⚠️ No face data")
 
@@ -300,6 +315,29 @@ with col2:
                 if idx < len(people) - 1:
                     st.markdown("<hr style='margin: 10px 0;'>", unsafe_allow_html=True)
 
+    st.divider()
+    st.markdown("### 🏠 Home Information")
+    st.caption("Used by the assistant to answer questions like \"Where is the bathroom?\"")
+
+    for item in get_all_home_info():
+        h_info_col, h_btn_col = st.columns([4, 1])
+        with h_info_col:
+            st.markdown(f"**{item.get('topic')}:** {item.get('details')}")
+        with h_btn_col:
+            if st.button("🗑️", key=f"del_home_{item['id']}", help="Delete", use_container_width=True):
+                delete_home_info(item['id'])
+                st.rerun()
+
+    with st.form("home_info_form", clear_on_submit=True):
+        home_topic = st.text_input("Topic", placeholder="e.g., Bathroom")
+        home_details = st.text_input("Details", placeholder="e.g., Down the hall, second door on the left")
+        if st.form_submit_button("➕ Add Information", use_container_width=True):
+            if home_topic.strip() and home_details.strip():
+                add_home_info(HomeInfo(topic=home_topic.strip(), details=home_details.strip()))
+                st.rerun()
+            else:
+                st.warning("Please fill in both fields.")
+
 # ========================================
 # COLUMN 3: SCHEDULER STATUS
 # ========================================
@@ -334,6 +372,49 @@ with col3:
         st.markdown("- 🚨 Detects emergencies")
         st.markdown("- 💾 Saves to database")
 
+    st.divider()
+
+    with st.container(border=True):
+        st.markdown("**⚡ Assistant Fast Path**")
+        st.caption("Questions answered locally instead of by the AI model")
+
+        router_stats = get_router_stats()
+        if not router_stats["total"]:
+            st.caption("No patient questions yet.")
+        else:
+            st.metric("Answered locally", f"{router_stats['local_hit_rate'] * 100:.0f}%",
+                      help=f"{router_stats['total']} questions since the app started")
+            for intent, route in router_stats["routes"].items():
+                st.caption(f"{intent}: {route['count']}x · p50 {route['p50_ms']:.0f} ms · p95 {route['p95_ms']:.0f} ms")
+
+        st.markdown("**🚨 Emergency Alerts**")
+        st.caption("Time from detection to the first webhook or email notification")
+
+        alert_stats = get_alert_latency_stats()
+        if not alert_stats["count"]:
+            st.caption("No alerts dispatched yet.")
+        else:
+            st.metric("Within SLA", f"{alert_stats['within_sla'] * 100:.0f}%",
+                      help=f"SLA {alert_stats['sla_ms']:.0f} ms over the last {alert_stats['count']} alerts; "
+                           "alerts that reached no webhook or email count as misses")
+            if alert_stats["unnotified"]:
+                st.error(f"🚨 {alert_stats['unnotified']} of {alert_stats['count']} alerts reached no webhook or email. "
+                         "Check ALERT_WEBHOOK_URL / ALERT_EMAIL_TO.")
+            if alert_stats["notified"]:
+                st.caption(f"p50 {alert_stats['p50_ms']:.0f} ms · p95 {alert_stats['p95_ms']:.0f} ms · max {alert_stats['max_ms']:.0f} ms")
+        if alert_stats["dashboard_p50_ms"]:
+            st.caption(f"Dashboard banner write: p50 {alert_stats['dashboard_p50_ms']:.0f} ms")
+
+        st.markdown("**🧠 AI Model Calls**")
+        st.caption("Latency per task for calls made by this app process")
+
+        llm_stats = get_llm_stats()
+        if not llm_stats:
+            st.caption("No AI calls yet.")
+        for task, task_stats in llm_stats.items():
+            st.caption(f"{task}: {task_stats['calls']}x · p50 {task_stats['p50_ms']:.0f} ms · "
+                       f"p95 {task_stats['p95_ms']:.0f} ms · {task_stats['retries']} retries · {task_stats['errors']} errors")
+
 
 # ========================================
 # MEDICATION DIALOG
@@ -441,7 +522,9 @@ def person_dialog():
     person_name = st.text_input("Name", placeholder="Sarah")
     person_relationship = st.text_input("Relationship", placeholder="Daughter")
     person_notes = st.text_area("Notes (optional)", placeholder="Lives in Tel Aviv", height=80)
-    uploaded_photo = st.file_uploader("Photo", type=["jpg", "png", "jpeg"])
+    uploaded_photos = st.file_uploader("Photos (several angles improve recognition)",
+                                       type=["jpg", "png", "jpeg"], accept_multiple_files=True)
+    photo_folder = st.text_input("Or import a folder of photos (optional)", placeholder="images/sarah")
 
     col_save, col_cancel = st.columns(2)
 
@@ -452,45 +535,48 @@ def person_dialog():
                 st.stop()
 
             photo_url_to_save = "https://via.placeholder.com/150"
-            face_encoding_list = None
+            photo_hash = None
+            photo_paths = []
 
-            if uploaded_photo is not None:
-                try:
-                    image_dir = Path("images")
-                    image_dir.mkdir(parents=True, exist_ok=True)
+            try:
+                image_dir = Path("images")
+                image_dir.mkdir(parents=True, exist_ok=True)
 
+                for uploaded_photo in uploaded_photos or []:
                     safe_filename = f"{person_name.lower().replace(' ', '_')}_{uploaded_photo.name}"
                     file_path = image_dir / safe_filename
 
                     with open(file_path, "wb") as f:
                         f.write(uploaded_photo.getbuffer())
-                    photo_url_to_save = str(file_path)
+                    photo_paths.append(str(file_path))
 
-                    with st.spinner("Analyzing face..."):
-                        image = face_recognition.load_image_file(file_path)
-                        encodings = face_recognition.face_encodings(image)
+                if photo_folder.strip():
+                    folder_photos = list_photos(photo_folder.strip())
+                    if not folder_photos:
+                        st.warning(f"⚠️ No photos found in {photo_folder}")
+                    photo_paths.extend(folder_photos)
 
-                        if encodings:
-                            face_encoding_list = encodings[0].tolist()
-                            st.success("✅ Face detected!")
-                        else:
-                            st.warning("⚠️ No face found")
+                if photo_paths:
+                    photo_url_to_save = photo_paths[0]
+                    photo_hash = create_thumbnails(photo_url_to_save)
 
-                except Exception as e:
-                    st.error(f"Photo error: {e}")
+            except Exception as e:
+                st.error(f"Photo error: {e}")
 
             try:
                 new_person = PersonProfile(
                     name=person_name,
                     relationship=person_relationship,
                     photo_url=photo_url_to_save,
+                    photo_hash=photo_hash,
                     notes=person_notes
                 )
 
                 person_id = add_person(new_person)
 
-                if person_id and face_encoding_list:
-                    update_person(person_id, {"face_encoding": face_encoding_list})
+                # Face encoding runs in a background process pool; the profile updates when done
+                if person_id and submit_enrollment(person_id, photo_paths):
+                    st.info(f"⏳ Analyzing {len(photo_paths)} photo(s) in the background...")
 
                 st.success(f"✅ Added {person_name}!")
                 close_person_dialog()
@@ -1,103 +1,119 @@
 # pages/4_Who_Is_This.py
 import streamlit as st
-import face_recognition
 from src.database import get_all_people
+from src.face_gallery import FaceGallery, DEFAULT_TOLERANCE
+from src.face_pipeline import recognize_faces
+from src.face_tracker import run_video_recognition, annotate_frame, DETECT_EVERY
+from src.thumbnails import get_thumbnail
 import numpy as np
-from PIL import Image # For handling image buffer
+from PIL import Image, ImageDraw # For handling image buffer and drawing face boxes
 import io # For handling image buffer
-from pathlib import Path # For checking local image paths
 
 st.set_page_config(page_title="Who Is This?", page_icon="🤔", layout="centered")
 
 st.title("🤔 Who Am I Talking To?")
-st.info("Point the camera at a person and take a photo to see who they are.")
+st.info("Point the camera at a person and take a photo, or switch to continuous mode, to see who they are.")
 
 # --- Load Known Faces ---
-# Cache the loaded faces to avoid reloading on every interaction within TTL
+# Cache the loaded gallery to avoid reloading on every interaction within TTL
 @st.cache_data(ttl=300) # Cache for 5 minutes
-def load_known_faces_from_db():
+def load_known_faces_from_db() -> FaceGallery:
     print("--- DEBUG: Loading known faces from DB ---") # Debug print
-    known_face_encodings_db = []
-    known_face_profiles_db = []
     try:
         people = get_all_people()
         print(f"--- DEBUG: Found {len(people)} people in DB ---") # Debug print
-        for person in people:
-            # Check if 'face_encoding' exists and is a non-empty list
-            if "face_encoding" in person and isinstance(person["face_encoding"], list) and person["face_encoding"]:
-                try:
-                    # Convert list back to numpy array for comparison
-                    known_face_encodings_db.append(np.array(person["face_encoding"]))
-                    known_face_profiles_db.append(person)
-                    print(f"--- DEBUG: Loaded face encoding for {person.get('name', 'N/A')} ---") # Debug print
-                except Exception as e:
-                     print(f"--- DEBUG: Error converting encoding for {person.get('name', 'N/A')}: {e} ---") # Debug print for conversion error
-            else:
-                 print(f"--- DEBUG: No valid face encoding found for {person.get('name', 'N/A')} ---") # Debug print
-
-        print(f"--- DEBUG: Successfully loaded {len(known_face_profiles_db)} profiles with face encodings ---") # Debug print
+        gallery = FaceGallery.from_people(people)
+        print(f"--- DEBUG: Successfully loaded {len(gallery)} profiles with face encodings ---") # Debug print
+        return gallery
     except Exception as e:
          print(f"--- DEBUG: Error loading people from DB: {e} ---") # Debug print for DB error
          st.error(f"Error loading people data: {e}") # Show error in UI
-
-    return known_face_encodings_db, known_face_profiles_db
+         return FaceGallery.from_people([])
 
 # Load the data using the cached function
-known_face_encodings, known_face_profiles = load_known_faces_from_db()
+gallery = load_known_faces_from_db()
 
 # Check if any faces were loaded AFTER the function call
-if not known_face_encodings:
+if not len(gallery):
     st.error("No faces have been saved with encoding data yet. Please add people and clear photos via the 🛠️ Admin Tools page.")
 else:
-    st.success(f"Loaded {len(known_face_profiles)} known faces. Ready to recognize!") # Confirmation message
+    st.success(f"Loaded {len(gallery)} known faces. Ready to recognize!") # Confirmation message
+    mode = st.radio("Mode", ["📸 Snapshot", "🎥 Continuous"], horizontal=True,
+                    help="Continuous mode watches a local webcam or video file and labels faces live")
+
     # --- Camera Input ---
-    img_file_buffer = st.camera_input("Take a photo")
+    img_file_buffer = st.camera_input("Take a photo") if mode == "📸 Snapshot" else None
+
+    # --- Continuous Video Recognition ---
+    if mode == "🎥 Continuous":
+        col_source, col_every = st.columns([2, 1])
+        with col_source:
+            video_source = st.text_input("Video source", value="0", help="Webcam index (0, 1, ...) or a video file path")
+        with col_every:
+            detect_every = st.slider("Detect every N frames", min_value=1, max_value=15, value=DETECT_EVERY)
+
+        # Toggling off triggers a rerun, which stops the loop below
+        if st.toggle("▶️ Start watching", key="video_running"):
+            frame_placeholder = st.empty()
+            names_placeholder = st.empty()
+            try:
+                for frame, tracks, recognizer in run_video_recognition(video_source, gallery, detect_every=detect_every):
+                    frame_placeholder.image(annotate_frame(frame, tracks, fps=recognizer.fps), use_container_width=True)
+                    names = sorted({t.label for t in tracks if t.match})
+                    names_placeholder.markdown(f"**I see:** {', '.join(names)}" if names else "*Looking for familiar faces...*")
+                st.info("Video ended.")
+            except Exception as e:
+                st.error(f"Video error: {e}")
+                print(f"--- DEBUG: Error during video recognition: {e} ---") # Debug print
 
     if img_file_buffer is not None:
         with st.spinner("Analyzing photo..."):
             try:
                 # --- Process Captured Image ---
-                # Convert buffer to PIL Image object
-                pil_image = Image.open(io.BytesIO(img_file_buffer.getvalue()))
-                # Convert PIL Image to numpy array (required by face_recognition)
+                # Convert buffer to RGB numpy array (required by face_recognition)
+                pil_image = Image.open(io.BytesIO(img_file_buffer.getvalue())).convert("RGB")
                 unknown_image_arr = np.array(pil_image)
                 print("--- DEBUG: Captured image loaded into numpy array ---") # Debug print
 
-                # Find all face locations and encodings in the unknown image
-                # Using 'cnn' model can be more accurate but slower, 'hog' is faster
-                unknown_encodings = face_recognition.face_encodings(unknown_image_arr, model="hog")
-                print(f"--- DEBUG: Found {len(unknown_encodings)} face(s) in captured image ---") # Debug print
+                # Detect on a downscaled copy, encode at full resolution, match every face at once
+                result = recognize_faces(unknown_image_arr, gallery, tolerance=DEFAULT_TOLERANCE)
+                print(f"--- DEBUG: Found {len(result.faces)} face(s) in captured image ({result.timing_summary()}) ---") # Debug print
 
-                if not unknown_encodings:
+                if not result.faces:
                     st.warning("I couldn't find a clear face in that photo. Please try again.")
                 else:
-                    # --- Compare Faces ---
-                    # Compare the first detected face against all known faces
-                    unknown_encoding = unknown_encodings[0]
-                    # compare_faces returns a list of True/False for each known face
-                    matches = face_recognition.compare_faces(known_face_encodings, unknown_encoding, tolerance=0.6) # Default tolerance is 0.6
-                    print(f"--- DEBUG: Comparison results (True means match): {matches} ---") # Debug print
-
-                    # Find the indices of all matches
-                    match_indices = [i for i, match in enumerate(matches) if match]
-
-                    if not match_indices:
-                        st.error("I don't recognize this person.")
-                    else:
-                        # Display info for the first match found
-                        first_match_index = match_indices[0]
-                        profile = known_face_profiles[first_match_index]
+                    # Outline every detected face on the photo
+                    annotated = pil_image.copy()
+                    draw = ImageDraw.Draw(annotated)
+                    for face in result.faces:
+                        top, right, bottom, left = face.location
+                        color = "#10b981" if face.match else "#ef4444"
+                        label = face.match.profile.get('name', '?') if face.match else "Unknown"
+                        draw.rectangle([left, top, right, bottom], outline=color, width=4)
+                        draw.text((left + 4, bottom + 4), label, fill=color)
+                    if len(result.faces) > 1:
+                        st.image(annotated, caption=f"I found {len(result.faces)} people", use_container_width=True)
+
+                    for face in result.faces:
+                        match = face.match
+                        if match is None:
+                            st.error("I don't recognize this person.")
+                            continue
+
+                        # Display info for the nearest match
+                        profile = match.profile
                         name = profile.get('name', 'N/A')
                         relationship = profile.get('relationship', 'N/A')
                         notes = profile.get('notes', 'N/A')
                         photo_path = profile.get('photo_url', '')
 
                         st.success(f"I see **{name} ({relationship})**!")
-                        print(f"--- DEBUG: Match found: {name} ---") # Debug print
+                        print(f"--- DEBUG: Match found: {name} (distance {match.distance:.3f}) ---") # Debug print
 
-                        # Display the stored photo of the recognized person
-                        if Path(photo_path).is_file(): # Check if local path exists
-                            st.image(photo_path, width=200)
+                        # Display the stored photo of the recognized person (cached thumbnail)
+                        thumbnail = get_thumbnail(photo_path, "medium", profile.get('photo_hash'))
+                        if thumbnail: # Local photo
+                            st.image(thumbnail, width=200)
                         elif photo_path.startswith("http"): # Basic check if it's a URL
                              st.image(photo_path, width=200)
                         else:
@@ -105,11 +121,10 @@ else:
 
                         st.write(f"**Notes:** {notes}")
 
-                        # Optional: Calculate and display confidence (face distance)
-                        face_distances = face_recognition.face_distance(known_face_encodings, unknown_encoding)
-                        best_match_distance = face_distances[first_match_index]
-                        st.caption(f"Match confidence (lower is better): {1 - best_match_distance:.2f}")
+                        # Confidence derived from the face distance of the nearest match
+                        st.caption(f"Match confidence (higher is better): {match.confidence:.2f}")
 
+                st.caption(f"⏱️ {result.timing_summary()}")
 
             except Exception as e:
                 st.error(f"An error occurred during face recognition: {e}")
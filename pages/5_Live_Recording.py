@@ -38,13 +38,25 @@ st.divider()
 # CHECK SYSTEM STATUS
 # ========================================
 
+@st.cache_data(ttl=10)  # Reruns reuse the result instead of calling the token server each time
+def check_token_server() -> bool:
+    try:
+        response = requests.get("http://localhost:5000/health", timeout=2)
+        return response.status_code == 200
+    except requests.RequestException:
+        return False
+
+
+@st.cache_data(ttl=300)  # The server caches tokens for hours; five minutes here keeps reruns local
+def fetch_token(identity: str, patient_id: str) -> dict:
+    response = requests.get("http://localhost:5000/get_token",
+                            params={"identity": identity, "patient_id": patient_id}, timeout=5)
+    response.raise_for_status()
+    return response.json()
+
+
 # Check token server
-token_server_running = False
-try:
-    response = requests.get("http://localhost:5000/health", timeout=2)
-    token_server_running = response.status_code == 200
-except:
-    pass
+token_server_running = check_token_server()
 
 # Get credentials
 LIVEKIT_URL = os.getenv("LIVEKIT_URL")
@@ -96,14 +108,15 @@ st.success("✅ All systems ready!")
 
 # Get token from server
 try:
-    response = requests.get("http://localhost:5000/get_token?identity=caregiver_web")
-    token_data = response.json()
+    patient_id = st.text_input("Patient ID", value="default_patient",
+                               help="Each patient has their own room; an agent joins it automatically")
+    token_data = fetch_token("caregiver_web", patient_id.strip() or "default_patient")
     token = token_data["token"]
 
     st.markdown("### 🎤 Join the Recording Room")
 
     # Show room info
-    st.info(f"**Room:** {token_data.get('room', 'rememberme_call')}")
+    st.info(f"**Room:** {token_data.get('room')} (patient: {token_data.get('patient_id', patient_id)})")
 
     # Create proper LiveKit URL
     # Use the official LiveKit Meet with proper parameters
@@ -273,6 +286,11 @@ try:
         if st.button("🛠️ Admin Tools", use_container_width=True):
             st.switch_page("pages/3_Admin_Tools.py")
 
+except requests.HTTPError as e:
+    if e.response is not None and e.response.status_code == 404:
+        st.error("❌ Unknown patient ID. Add it to PATIENT_IDS on the token server, or pick an existing patient.")
+    else:
+        st.error(f"❌ Error: {e}")
 except Exception as e:
     st.error(f"❌ Error: {e}")
     st.markdown("**Debug Info:**")
@@ -1,14 +1,20 @@
 # populate_mock_data.py
+import argparse
 import os
 import random
+import struct
+import time as time_module
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime, timedelta, time
 from faker import Faker
+from bson import ObjectId
+from pymongo import MongoClient, ASCENDING, ReplaceOne
 
 # --- Important: Ensure correct imports from your project ---
 # (Adjust paths if your script is not in the main project folder)
 try:
-    from src.database import save_conversation, add_medication, client # Add client import
-    from src.schemas import ConversationSegment, ConversationSummary, Medication
+    from src.database import (client, DB_NAME, SEGMENT_COLLECTION, SUMMARY_COLLECTION,  # Add client import
+                              bump_data_version, get_all_conversations)
 except ImportError as e:
     print(f"Error importing project modules: {e}")
     print("Make sure this script is run from your main project directory or adjust import paths.")
@@ -16,12 +22,13 @@ except ImportError as e:
 # --- End Imports ---
 
 
-fake = Faker()
-
 # --- Configuration ---
 NUM_DAYS = 7  # How many days back to generate data for
 MIN_CONVOS_PER_DAY = 2
 MAX_CONVOS_PER_DAY = 6
+DEFAULT_SEED = 42
+BATCH_SIZE = 5000  # Documents per insert_many
+DAYS_PER_TASK = 30  # Each worker task generates one patient-month
 
 # --- Realistic Mock Data Options ---
 PARTICIPANTS = ["Sarah (Daughter)", "Dr. John (Doctor)", "Maria (Caregiver)", "Ahmed (Son)", "Neighbor", "Patient speaking alone"]
@@ -31,82 +38,166 @@ COG_STATES = ["Clear and engaged", "Slightly forgetful", "Repeated questions", "
 CONCERNS = ["Repeated a question", "Expressed physical pain", "Showed confusion about time/place", "Memory lapse noted", "Seemed anxious", "Frustration expressed", "None"]
 
 
-def generate_mock_data(num_days: int):
-    """Generates and saves mock conversation data for the specified number of past days."""
+def patient_ids(num_patients: int) -> list[str]:
+    return ["default_patient"] if num_patients == 1 else [f"patient_{i:04d}" for i in range(1, num_patients + 1)]
+
+
+def _object_id(rng: random.Random, at: datetime) -> ObjectId:
+    # Timestamp prefix keeps _id order close to time order; the rest comes from the seeded RNG
+    return ObjectId(struct.pack(">I", int(at.timestamp())) + rng.randbytes(8))
+
+
+def build_day_documents(seed: int, patient_id: str, day, min_convos: int, max_convos: int) -> tuple[list[dict], list[dict]]:
+    """
+    Segment and summary documents for one patient-day.
+
+    The RNG is derived from (seed, patient, day), so output is identical no
+    matter which worker builds it or in what order.
+    """
+    rng = random.Random(f"{seed}:{patient_id}:{day.isoformat()}")
+    fake = Faker()
+    fake.seed_instance(rng.getrandbits(32))
+
+    segments, summaries = [], []
+    day_start = datetime.combine(day, time(6, 0))
+    for _ in range(rng.randint(min_convos, max_convos)):
+        conv_start_dt = day_start + timedelta(seconds=rng.randint(0, 15 * 3600))  # Between 6 AM and 9 PM
+        conv_end_dt = conv_start_dt + timedelta(minutes=rng.randint(2, 15))
+        summary_gen_dt = conv_end_dt + timedelta(seconds=rng.randint(5, 60))
+
+        participant = rng.choice(PARTICIPANTS)
+        convo_topics = rng.sample(TOPICS, k=rng.randint(1, 3)) # 1-3 topics
+        mood = rng.choice(MOODS)
+        cog_state = rng.choice(COG_STATES)
+        num_concerns = 0 if mood == "positive" and cog_state == "Clear and engaged" else rng.randint(0, 2)
+        key_concerns = rng.sample([c for c in CONCERNS if c != "None"], k=num_concerns) or ["None"]
+        details = fake.sentence()
+
+        segment_id = _object_id(rng, conv_start_dt)
+        segments.append({
+            "_id": segment_id,
+            "patient_id": patient_id,
+            "start_time": conv_start_dt,
+            "end_time": conv_end_dt,
+            "transcript": f"Fake conversation with {participant}. Discussed {', '.join(convo_topics)}. "
+                          f"{fake.paragraph(nb_sentences=rng.randint(3, 7))}",
+            "speaker_identity": "patient",
+        })
+        summaries.append({
+            "_id": _object_id(rng, summary_gen_dt),
+            "patient_id": patient_id,
+            "segment_id": str(segment_id),
+            "generated_at": summary_gen_dt,
+            "simple_summary": f"You spoke with {participant} about {', '.join(convo_topics)}. {details}",
+            "caregiver_summary": f"The patient spoke with {participant} about {', '.join(convo_topics)}. "
+                                 f"Mood was {mood}; {cog_state.lower()}.",
+            "participant": participant,
+            "topics_discussed": convo_topics,
+            "patient_mood": mood,
+            "cognitive_state": cog_state,
+            "key_concerns": key_concerns,
+        })
+    return segments, summaries
+
+
+def _upsert_batched(collection, docs: list[dict], batch_size: int) -> int:
+    """Write docs by _id, replacing existing ones, so re-running with the same seed is idempotent."""
+    written = 0
+    for i in range(0, len(docs), batch_size):
+        result = collection.bulk_write([ReplaceOne({"_id": d["_id"]}, d, upsert=True) for d in docs[i:i + batch_size]],
+                                       ordered=False)
+        written += result.upserted_count + result.matched_count
+    return written
+
+
+def generate_chunk(seed: int, patient_id: str, first_day, num_days: int, min_convos: int, max_convos: int,
+                   batch_size: int) -> int:
+    """Worker task: build a patient's days in memory and bulk-insert them. Returns conversations written."""
+    worker_client = MongoClient(os.getenv("MONGO_CONNECTION_STRING"))  # One client per process; not fork-safe
+    try:
+        db = worker_client[DB_NAME]
+        segments, summaries, written = [], [], 0
+        for offset in range(num_days):
+            day_segments, day_summaries = build_day_documents(
+                seed, patient_id, first_day + timedelta(days=offset), min_convos, max_convos)
+            segments.extend(day_segments)
+            summaries.extend(day_summaries)
+            if len(segments) >= batch_size or offset == num_days - 1:
+                # Segments first, so a summary never points at a segment that was not written
+                written += _upsert_batched(db[SEGMENT_COLLECTION], segments, batch_size)
+                _upsert_batched(db[SUMMARY_COLLECTION], summaries, batch_size)
+                segments, summaries = [], []
+        return written
+    finally:
+        worker_client.close()
+
+
+def generate_mock_data(num_days: int, num_patients: int = 1, seed: int = DEFAULT_SEED, workers: int | None = None,
+                       min_convos: int = MIN_CONVOS_PER_DAY, max_convos: int = MAX_CONVOS_PER_DAY,
+                       batch_size: int = BATCH_SIZE):
+    """Generates and bulk-inserts mock conversation data for the past `num_days` days, per patient, in parallel."""
     if not client:
         print("❌ Cannot generate data: No database connection.")
         return
 
-    print(f"Generating mock data for the past {num_days} days...")
     today = datetime.now().date()
+    first_day = today - timedelta(days=num_days - 1)
+    tasks = [
+        (seed, patient_id, first_day + timedelta(days=start), min(DAYS_PER_TASK, num_days - start),
+         min_convos, max_convos, batch_size)
+        for patient_id in patient_ids(num_patients)
+        for start in range(0, num_days, DAYS_PER_TASK)
+    ]
+    expected = num_days * num_patients * (min_convos + max_convos) // 2
+    print(f"Generating ~{expected:,} conversations: {num_patients} patient(s) x {num_days} days "
+          f"in {len(tasks)} task(s), seed {seed}...")
+
+    started = time_module.perf_counter()
+    written = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(generate_chunk, *task) for task in tasks]
+        for done, future in enumerate(as_completed(futures), 1):
+            try:
+                written += future.result()
+            except Exception as e:
+                print(f"    ❌ Error generating a chunk: {e}")
+            if done % max(1, len(futures) // 20) == 0 or done == len(futures):
+                elapsed = time_module.perf_counter() - started
+                print(f"  {done}/{len(futures)} tasks · {written:,} conversations · {written / max(elapsed, 1e-6):,.0f}/s")
 
-    for i in range(num_days):
-        current_date = today - timedelta(days=i)
-        num_convos = random.randint(MIN_CONVOS_PER_DAY, MAX_CONVOS_PER_DAY)
-        print(f"  Generating {num_convos} conversations for {current_date.strftime('%Y-%m-%d')}...")
-
-        for j in range(num_convos):
-            # Generate random times within the day
-            conv_start_dt = fake.date_time_between(
-                start_date=datetime.combine(current_date, time(6, 0)),  # <-- FIX HERE
-                end_date=datetime.combine(current_date, time(21, 0))  # <-- FIX HERE
-            )
-            conv_end_dt = conv_start_dt + timedelta(minutes=random.randint(2, 15))
-            summary_gen_dt = conv_end_dt + timedelta(seconds=random.randint(5, 60))
-            # Generate fake content
-            participant = random.choice(PARTICIPANTS)
-            convo_topics = random.sample(TOPICS, k=random.randint(1, 3)) # 1-3 topics
-            fake_transcript = f"Fake conversation with {participant}. Discussed {', '.join(convo_topics)}. {fake.paragraph(nb_sentences=random.randint(3, 7))}"
-            simple_summary = f"You spoke with {participant} about {', '.join(convo_topics)}. {fake.sentence()}"
-            mood = random.choice(MOODS)
-            cog_state = random.choice(COG_STATES)
-            num_concerns = 0 if mood == "positive" and cog_state == "Clear and engaged" else random.randint(0, 2)
-            key_concerns = random.sample([c for c in CONCERNS if c != "None"], k=num_concerns) # Pick 0-2 actual concerns
-            if not key_concerns:
-                key_concerns = ["None"] # Ensure 'None' if no specific concerns picked
-
+    # Indexes the dashboard and retrieval queries rely on at this scale
+    db = client[DB_NAME]
+    db[SUMMARY_COLLECTION].create_index([("generated_at", ASCENDING)])
+    db[SUMMARY_COLLECTION].create_index([("patient_id", ASCENDING), ("generated_at", ASCENDING)])
+    db[SUMMARY_COLLECTION].create_index([("segment_id", ASCENDING)])
+    db[SEGMENT_COLLECTION].create_index([("start_time", ASCENDING)])
 
-            try:
-                # Create Pydantic Objects (using original schemas with PyObjectId)
-                segment = ConversationSegment(
-                    start_time=conv_start_dt,
-                    end_time=conv_end_dt,
-                    transcript=fake_transcript
-                )
-
-                summary = ConversationSummary(
-                    segment_id=str(segment.id), # Use the generated ID
-                    generated_at=summary_gen_dt,
-                    simple_summary=simple_summary,
-                    participant=participant,
-                    topics_discussed=convo_topics,
-                    patient_mood=mood,
-                    cognitive_state=cog_state,
-                    key_concerns=key_concerns
-                )
-
-                # Save to database
-                save_conversation(segment, summary)
-                # print(f"    Saved conversation {j+1} for {current_date}") # Optional: more verbose logging
+    # Backdated _ids leave the newest summary unchanged; make cached chatbot answers and lists refresh
+    bump_data_version()
+    get_all_conversations.clear()
 
-            except Exception as e:
-                print(f"    ❌ Error creating/saving conversation {j+1} for {current_date}: {e}")
+    print(f"✅ Mock data generation complete: {written:,} conversations in {time_module.perf_counter() - started:.1f}s.")
+    print("   Rollups and the retrieval index are built lazily by the background scheduler and chatbot.")
 
-    print("✅ Mock data generation complete.")
 
 if __name__ == "__main__":
-    # --- Optional: Clear existing data ---
-    # print("Clearing existing conversation and summary data...")
-    # try:
-    #     if client:
-    #         db = client[DB_NAME]
-    #         db[SEGMENT_COLLECTION].delete_many({})
-    #         db[SUMMARY_COLLECTION].delete_many({})
-    #         print("  Existing data cleared.")
-    #     else:
-    #         print("  Skipping clear: No database connection.")
-    # except Exception as e:
-    #     print(f"  Error clearing data: {e}")
-    # --- End Optional Clear ---
-
-    generate_mock_data(NUM_DAYS)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Generate synthetic conversations for testing")
+    parser.add_argument("--days", type=int, default=NUM_DAYS)
+    parser.add_argument("--patients", type=int, default=1)
+    parser.add_argument("--min-per-day", type=int, default=MIN_CONVOS_PER_DAY)
+    parser.add_argument("--max-per-day", type=int, default=MAX_CONVOS_PER_DAY)
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="Same seed, same data")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: CPU count)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--clear", action="store_true", help="Delete existing conversations and summaries first")
+    args = parser.parse_args()
+
+    if args.clear and client:
+        print("Clearing existing conversation and summary data...")
+        client[DB_NAME][SEGMENT_COLLECTION].delete_many({})
+        client[DB_NAME][SUMMARY_COLLECTION].delete_many({})
+        bump_data_version()
+        print("  Existing data cleared.")
+
+    generate_mock_data(args.days, args.patients, args.seed, args.workers,
+                       args.min_per_day, args.max_per_day, args.batch_size)
@@ -0,0 +1,48 @@
+# reprocess_conversations.py
+# Re-summarizes stored conversation segments with the current prompts and models.
+# Progress is checkpointed per run name, so re-running the same command after a
+# crash or Ctrl+C resumes where it stopped.
+#
+#   poetry run python reprocess_conversations.py --run prompts-v2 --parallel 4
+import argparse
+from datetime import datetime
+
+try:
+    from src.database import client
+    from src.reprocessing import reprocess_segments, remove_unlinked_summaries, DEFAULT_BATCH_SIZE, DEFAULT_PARALLELISM
+except ImportError as e:
+    print(f"Error importing project modules: {e}")
+    print("Make sure this script is run from your main project directory or adjust import paths.")
+    exit()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-summarize stored conversations")
+    parser.add_argument("--run", default="default", help="Checkpoint name; reuse it to resume")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--parallel", type=int, default=DEFAULT_PARALLELISM, help="Segments summarized at once")
+    parser.add_argument("--since", type=datetime.fromisoformat, help="Only segments starting on/after this date (YYYY-MM-DD)")
+    parser.add_argument("--limit", type=int, help="Stop after this many segments (resume later)")
+    parser.add_argument("--restart", action="store_true", help="Ignore the saved checkpoint")
+    parser.add_argument("--remove-unlinked", action="store_true",
+                        help="After a complete run, delete old summaries that have no segment link")
+    args = parser.parse_args()
+
+    if not client:
+        print("❌ Cannot reprocess: No database connection.")
+    else:
+        try:
+            result = reprocess_segments(args.run, args.batch_size, args.parallel, args.since, args.limit, args.restart)
+        except Exception as e:
+            print(f"❌ Reprocessing stopped: {e}")
+            print("   Progress up to the last saved batch is kept; run the same command again to resume.")
+            exit(1)
+        if args.remove_unlinked:
+            if not result.get("done") or args.since is not None:
+                print("⚠️ Skipping --remove-unlinked: only safe after a complete run without --since")
+            elif result.get("failed"):
+                # A failed segment keeps its legacy summary, which may be the only one it has
+                print(f"⚠️ Skipping --remove-unlinked: {result['failed']} segment(s) failed; "
+                      "fix them and run again with --restart")
+            else:
+                remove_unlinked_summaries()
@@ -5,17 +5,35 @@ RememberMe AI - Source package initialization
 
 # Explicitly declare available modules for IDE recognition
 __all__ = [
+    'alerts',
+    'answer_cache',
     'audio_recorder',
     'background_scheduler',
     'caregiver_chatbot',
     'database',
+    'face_enrollment',
+    'face_gallery',
+    'face_pipeline',
+    'face_tracker',
+    'intent_router',
+    'model_benchmark',
+    'model_router',
     'livekit_client',
+    'llm_gateway',
     'patient_assistant',
+    'pipeline_benchmark',
     'recap_generator',
+    'reprocessing',
+    'rollups',
     'schemas',
     'smart_reminder',
     'summarizer',
+    'summary_index',
+    'telemetry',
     'text_to_speech',
+    'thumbnails',
+    'token_budget',
+    'token_load_test',
     'token_server',
     'transcriber',
 ]
\ No newline at end of file
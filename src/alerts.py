@@ -0,0 +1,204 @@
+# src/alerts.py
+"""
+Emergency alert dispatch.
+
+An emergency detected by the LiveKit agent is persisted to the alerts
+collection, then fanned out to every configured notifier (webhook, email
+through a local SMTP server, the caregiver dashboard banner) concurrently,
+with retries. Each alert records per-notifier attempts, the latency from
+detection to the first external notification (webhook or email) that reaches a
+caregiver, and separately the dashboard banner write, so the alerting SLA can
+be checked over time.
+"""
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+import os
+import smtplib
+import time
+import requests
+from dotenv import load_dotenv
+from src.schemas import EmergencyAlert
+from src.database import save_alert, update_alert, get_recent_alerts
+
+load_dotenv()
+
+ALERT_SLA_MS = float(os.getenv("ALERT_SLA_MS", "5000"))  # Detection to first notification
+MAX_ATTEMPTS = 3
+RETRY_BACKOFF_SECONDS = 0.5  # Doubled after each failed attempt
+NOTIFIER_TIMEOUT_SECONDS = 5
+IN_FLIGHT_SECONDS = 60  # Longer than MAX_ATTEMPTS retries take; older alerts without results failed to dispatch
+
+_dispatch_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="alert-dispatch")
+_notify_pool = ThreadPoolExecutor(max_workers=16, thread_name_prefix="alert-notify")
+
+
+# ========================================
+# NOTIFIERS
+# ========================================
+
+def _alert_text(alert: EmergencyAlert) -> str:
+    return (f"Emergency detected: {alert.emergency_type}\n"
+            f"Time: {alert.detected_at.strftime('%I:%M:%S %p, %B %d')}\n"
+            f"Speaker: {alert.speaker_identity}\n"
+            f"Heard: \"{alert.transcript[-300:]}\"")
+
+
+class WebhookNotifier:
+    """POSTs the alert as JSON to ALERT_WEBHOOK_URL (e.g. a local relay or home-automation hub)."""
+    name = "webhook"
+    external = True
+
+    def __init__(self, url: str):
+        self.url = url
+
+    def send(self, alert_id: str, alert: EmergencyAlert):
+        payload = alert.model_dump(mode="json", exclude={"id", "notifications"})
+        response = requests.post(self.url, json={"alert_id": alert_id, **payload}, timeout=NOTIFIER_TIMEOUT_SECONDS)
+        response.raise_for_status()
+
+
+class EmailNotifier:
+    """Sends an email through an SMTP server (defaults to a local stand-in on port 1025)."""
+    name = "email"
+    external = True
+
+    def __init__(self, recipient: str, host: str = "localhost", port: int = 1025, sender: str = "alerts@rememberme.local"):
+        self.recipient = recipient
+        self.host = host
+        self.port = port
+        self.sender = sender
+
+    def send(self, alert_id: str, alert: EmergencyAlert):
+        message = EmailMessage()
+        message["Subject"] = f"🚨 RememberMe emergency: {alert.emergency_type}"
+        message["From"] = self.sender
+        message["To"] = self.recipient
+        message.set_content(_alert_text(alert) + f"\nAlert ID: {alert_id}")
+        with smtplib.SMTP(self.host, self.port, timeout=NOTIFIER_TIMEOUT_SECONDS) as smtp:
+            smtp.send_message(message)
+
+
+class DashboardNotifier:
+    """Raises the banner on the Caregiver Dashboard until the alert is acknowledged."""
+    name = "dashboard"
+    external = False  # A database write; only seen once someone opens the dashboard
+
+    def send(self, alert_id: str, alert: EmergencyAlert):
+        update_alert(alert_id, {"banner": True})
+
+
+def default_notifiers() -> list:
+    """Notifiers enabled by the environment; the dashboard banner is always on."""
+    notifiers = [DashboardNotifier()]
+    if os.getenv("ALERT_WEBHOOK_URL"):
+        notifiers.append(WebhookNotifier(os.getenv("ALERT_WEBHOOK_URL")))
+    if os.getenv("ALERT_EMAIL_TO"):
+        notifiers.append(EmailNotifier(
+            recipient=os.getenv("ALERT_EMAIL_TO"),
+            host=os.getenv("ALERT_SMTP_HOST", "localhost"),
+            port=int(os.getenv("ALERT_SMTP_PORT", "1025")),
+        ))
+    return notifiers
+
+
+# ========================================
+# DISPATCH
+# ========================================
+
+def _notify_with_retries(notifier, alert_id: str, alert: EmergencyAlert, detected: float) -> dict:
+    error = None
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        try:
+            notifier.send(alert_id, alert)
+            return {"status": "sent", "attempts": attempt,
+                    "latency_ms": round((time.monotonic() - detected) * 1000, 1)}
+        except Exception as e:
+            error = str(e)
+            print(f"⚠️ {notifier.name} notification failed (attempt {attempt}/{MAX_ATTEMPTS}): {e}")
+            if attempt < MAX_ATTEMPTS:
+                time.sleep(RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1))
+    return {"status": "failed", "attempts": MAX_ATTEMPTS, "error": error}
+
+
+def _dispatch(alert: EmergencyAlert, detected: float, notifiers: list) -> str | None:
+    alert_id = save_alert(alert)
+    if not alert_id:
+        print("❌ Alert could not be persisted; notifying anyway")
+        alert_id = "unsaved"
+
+    futures = {_notify_pool.submit(_notify_with_retries, n, alert_id, alert, detected): n for n in notifiers}
+    wait(futures)
+    notifications = {n.name: future.result() for future, n in futures.items()}
+    external = [notifications[n.name]["latency_ms"] for n in notifiers
+                if getattr(n, "external", True) and notifications[n.name]["status"] == "sent"]
+    internal = [notifications[n.name]["latency_ms"] for n in notifiers
+                if not getattr(n, "external", True) and notifications[n.name]["status"] == "sent"]
+    latency_ms = min(external) if external else None
+    dashboard_ms = min(internal) if internal else None
+
+    if alert_id != "unsaved":
+        update_alert(alert_id, {"notifications": notifications, "notification_latency_ms": latency_ms,
+                                "dashboard_latency_ms": dashboard_ms})
+
+    status = ", ".join(f"{name}: {n['status']}" for name, n in notifications.items())
+    if latency_ms is None:
+        reach = "only the dashboard" if dashboard_ms is not None else "no notifier"
+        print(f"❌ Alert {alert_id} ({alert.emergency_type}) reached {reach}; no caregiver was notified ({status})")
+    else:
+        sla = "within" if latency_ms <= ALERT_SLA_MS else "OVER"
+        print(f"📣 Alert {alert_id} dispatched in {latency_ms:.0f} ms ({sla} {ALERT_SLA_MS:.0f} ms SLA; {status})")
+    return alert_id
+
+
+def dispatch_alert(emergency_type: str, transcript: str = "", source: str = "full", speaker: str = "patient",
+                   speech_to_detection_s: float | None = None, notifiers: list | None = None,
+                   patient_id: str = "default_patient"):
+    """
+    Persist an emergency alert and notify everyone, in the background.
+
+    Returns a Future resolving to the alert ID, so callers (the audio loop)
+    never wait on network I/O.
+    """
+    detected = time.monotonic()
+    alert = EmergencyAlert(
+        patient_id=patient_id,
+        emergency_type=emergency_type,
+        transcript=transcript,
+        source=source,
+        speaker_identity=speaker,
+        detected_at=datetime.now(),
+        speech_to_detection_s=speech_to_detection_s,
+    )
+    return _dispatch_pool.submit(_dispatch, alert, detected, notifiers if notifiers is not None else default_notifiers())
+
+
+def get_alert_latency_stats(limit: int = 200) -> dict:
+    """
+    Detection-to-external-notification latency percentiles and SLA compliance over recent alerts.
+
+    Compliance counts every alert: one that reached no webhook or email (all failed, or none
+    configured) is a miss, reported in `unnotified`. Percentiles cover the notified ones.
+    """
+    in_flight_since = datetime.now() - timedelta(seconds=IN_FLIGHT_SECONDS)
+    alerts = [a for a in get_recent_alerts(limit)  # Skip ones still being dispatched
+              if a.get("notifications") or not isinstance(a.get("detected_at"), datetime)
+              or a["detected_at"] < in_flight_since]
+    latencies = sorted(a["notification_latency_ms"] for a in alerts if a.get("notification_latency_ms") is not None)
+    dashboard = sorted(a["dashboard_latency_ms"] for a in alerts if a.get("dashboard_latency_ms") is not None)
+    dashboard_p50 = dashboard[len(dashboard) // 2] if dashboard else 0.0
+    unnotified = len(alerts) - len(latencies)
+    if not latencies:
+        return {"count": len(alerts), "notified": 0, "unnotified": unnotified, "p50_ms": 0.0, "p95_ms": 0.0,
+                "max_ms": 0.0, "sla_ms": ALERT_SLA_MS, "within_sla": 0.0, "dashboard_p50_ms": dashboard_p50}
+    return {
+        "count": len(alerts),
+        "notified": len(latencies),
+        "unnotified": unnotified,
+        "dashboard_p50_ms": dashboard_p50,
+        "p50_ms": latencies[len(latencies) // 2],
+        "p95_ms": latencies[max(int(len(latencies) * 0.95) - 1, 0)],
+        "max_ms": latencies[-1],
+        "sla_ms": ALERT_SLA_MS,
+        "within_sla": sum(l <= ALERT_SLA_MS for l in latencies) / len(alerts),
+    }
@@ -0,0 +1,121 @@
+# src/answer_cache.py
+"""
+Answer cache for the caregiver chatbot.
+
+Answers are keyed by the look-back window and a data-version stamp of the
+summaries/rollups collections, so a cached answer is served only until new
+conversations arrive. Questions match exactly after normalization, when they
+use the same content words in any order, or by embedding similarity ("How is
+she feeling?" ~ "How has the patient been feeling?"). Questions that merely
+overlap ("What concerns came up?" vs "What concerns came up today?") must
+also pass the embedding check.
+"""
+from collections import OrderedDict
+from dataclasses import dataclass
+import re
+import threading
+import numpy as np
+
+MAX_ENTRIES = 256
+SEMANTIC_THRESHOLD = 0.92  # Cosine similarity of question embeddings
+
+_STOPWORDS = {"the", "a", "an", "has", "have", "had", "is", "was", "been", "be", "do", "does", "did",
+              "patient", "patients", "they", "their", "he", "she", "his", "her", "please", "me", "tell"}
+
+
+def normalize_question(question: str) -> str:
+    return " ".join(re.findall(r"[a-z0-9']+", question.lower()))
+
+
+def _content_words(normalized: str) -> frozenset:
+    return frozenset(w for w in normalized.split() if w not in _STOPWORDS)
+
+
+@dataclass
+class CacheEntry:
+    normalized: str
+    words: frozenset
+    answer: str
+    embedding: np.ndarray | None = None
+
+
+class AnswerCache:
+    """In-process cache shared by every dashboard session on this server."""
+
+    def __init__(self, max_entries: int = MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # (days_back, version, normalized) -> CacheEntry
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _scope(self, days_back: int, version: str) -> list[CacheEntry]:
+        return [e for (d, v, _), e in self._entries.items() if d == days_back and v == version]
+
+    def lookup(self, question: str, days_back: int, version: str, embed=None) -> str | None:
+        """
+        Cached answer for a question, or None.
+
+        `embed` (text -> unit vector) enables semantic matching; it is only
+        called when there is no exact or word-overlap match.
+        """
+        normalized = normalize_question(question)
+        words = _content_words(normalized)
+        with self._lock:
+            key = (days_back, version, normalized)
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key].answer
+            scope = self._scope(days_back, version)
+
+        # Same content words (reordered, or differing only in stopwords) needs no API call
+        for entry in scope:
+            if words and entry.words == words:
+                return self._hit(entry)
+
+        candidates = [e for e in scope if e.embedding is not None]
+        if embed is not None and candidates:
+            try:
+                query = embed(question)
+                scores = np.stack([e.embedding for e in candidates]) @ query
+                best = int(np.argmax(scores))
+                if scores[best] >= SEMANTIC_THRESHOLD:
+                    return self._hit(candidates[best])
+            except Exception as e:
+                print(f"⚠️ Semantic cache lookup failed: {e}")
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def _hit(self, entry: CacheEntry) -> str:
+        with self._lock:
+            self.hits += 1
+        return entry.answer
+
+    def store(self, question: str, days_back: int, version: str, answer: str, embed=None):
+        normalized = normalize_question(question)
+        embedding = None
+        if embed is not None:
+            try:
+                embedding = embed(question)
+            except Exception as e:
+                print(f"⚠️ Could not embed question for cache: {e}")
+        with self._lock:
+            # Answers for older data versions can never be served again
+            for key in [k for k in self._entries if k[0] == days_back and k[1] != version]:
+                del self._entries[key]
+            self._entries[(days_back, version, normalized)] = CacheEntry(
+                normalized=normalized, words=_content_words(normalized), answer=answer, embedding=embedding)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses,
+                    "hit_rate": self.hits / total if total else 0.0}
+
+
+answer_cache = AnswerCache()
@@ -5,6 +5,7 @@ Run this in a separate terminal: poetry run python src/background_scheduler.py
 """
 import time
 import os
+import threading
 from datetime import datetime, timedelta
 from pathlib import Path
 import sys
@@ -15,54 +16,71 @@ if __name__ == "__main__":
 
 from src.database import get_all_medications, update_medication, get_settings
 from src.smart_reminder import generate_smart_reminder
-from src.recap_generator import generate_daily_recap
+from src.recap_generator import get_daily_recap
+from src.rollups import refresh_stale_rollups, backfill_rollups
 from src.text_to_speech import text_to_speech
 
 # Directory for scheduled audio files
 SCHEDULED_AUDIO_DIR = Path("scheduled_audio")
 SCHEDULED_AUDIO_DIR.mkdir(exist_ok=True)
 
+# A reminder whose minute was missed (slow tick, restart) still fires within this window
+MEDICATION_CATCHUP_MINUTES = 30
+ROLLUP_INTERVAL_SECONDS = 60
+ROLLUP_TIME_BUDGET_SECONDS = 45  # Per refresh pass, so a big backlog is worked off in slices
+
+
+def _due_times(time_str: str, now: datetime, window: timedelta, fmt: str) -> list[datetime]:
+    """Occurrences of a daily clock time within (now - window, now], today's and (around midnight) yesterday's."""
+    try:
+        clock = datetime.strptime(time_str, fmt).time()
+    except (TypeError, ValueError):
+        return []
+    days = {now.date(), (now - window).date()}
+    return sorted(due for due in (datetime.combine(d, clock) for d in days) if now - window < due <= now)
+
 
 def check_medication_times():
     """Check if any medications are due and generate reminders"""
     try:
         medications = get_all_medications()
         now = datetime.now()
-        current_time = now.strftime("%I:%M %p")
-        today_name = now.strftime("%A")
+        window = timedelta(minutes=MEDICATION_CATCHUP_MINUTES)
 
         for med in medications:
             med_id = str(med.get('_id') or med.get('id'))
             med_time = med.get('time_to_take', '')
 
-            # Check if it's time for this medication
-            if med_time != current_time:
+            # Due if its time passed within the catch-up window, even if that exact minute was missed
+            due_times = _due_times(med_time, now, window, "%I:%M %p")
+            if not due_times:
                 continue
+            due = due_times[-1]
 
-            # Check schedule type
+            # Check schedule type (against the day the dose was due)
             stype = med.get('schedule_type')
             should_remind = False
 
             if stype == 'Daily':
                 should_remind = True
             elif stype == 'Weekly':
-                if today_name in med.get('days_of_week', []):
+                if due.strftime("%A") in med.get('days_of_week', []):
                     should_remind = True
             elif stype == 'One-Time':
                 sdate = med.get('specific_date')
                 if isinstance(sdate, datetime):
-                    if sdate.date() == now.date():
+                    if sdate.date() == due.date():
                         should_remind = True
 
             if not should_remind:
                 continue
 
-            # Check if already reminded recently (within last hour)
+            # Check if already reminded for this dose
             last_reminded = med.get('last_reminded')
             if last_reminded:
                 if isinstance(last_reminded, str):
                     last_reminded = datetime.fromisoformat(last_reminded)
-                if now - last_reminded < timedelta(hours=1):
+                if last_reminded >= due or now - last_reminded < timedelta(hours=1):
                     continue  # Already reminded
 
             # Generate reminder
@@ -104,9 +122,14 @@ def check_daily_recap():
 
         recap_time = settings.get('daily_recap_time', '19:00')  # Default 7 PM
         now = datetime.now()
-        current_time = now.strftime("%H:%M")
 
-        if current_time != recap_time:
+        # Any time after the recap time today counts, so a slow or restarted loop cannot skip it
+        try:
+            due = datetime.combine(now.date(), datetime.strptime(recap_time, "%H:%M").time())
+        except ValueError:
+            print(f"⚠️ Invalid daily recap time: {recap_time}")
+            return
+        if now < due:
             return
 
         # Check if recap already generated today
@@ -116,9 +139,11 @@ def check_daily_recap():
 
         print(f"🌅 TIME FOR DAILY RECAP: {recap_time}")
 
-        # Generate recap
-        recap_script = generate_daily_recap()
-        audio_path = text_to_speech(recap_script, output_filename="temp_scheduled_recap.mp3")
+        # The running recap normally has the script and audio ready already
+        recap_script, audio_path = get_daily_recap()
+        is_temp_audio = audio_path is None
+        if is_temp_audio:
+            audio_path = text_to_speech(recap_script, output_filename="temp_scheduled_recap.mp3")
 
         if audio_path:
             # Save to scheduled directory
@@ -135,15 +160,36 @@ def check_daily_recap():
             recap_marker.touch()
 
             # Clean up temp file
-            try:
-                os.remove(audio_path)
-            except:
-                pass
+            if is_temp_audio:
+                try:
+                    os.remove(audio_path)
+                except:
+                    pass
 
     except Exception as e:
         print(f"❌ Error checking daily recap: {e}")
 
 
+def check_rollups():
+    """Rebuild day/week rollups flagged stale by newly saved conversations"""
+    try:
+        refresh_stale_rollups(time_budget_s=ROLLUP_TIME_BUDGET_SECONDS)
+    except Exception as e:
+        print(f"❌ Error refreshing rollups: {e}")
+
+
+def rollup_worker(stop: threading.Event):
+    """Backfill and refresh rollups on their own thread, so LLM rebuilds never delay reminders."""
+    try:
+        # Queue rollups for history that predates the rollup job
+        backfill_rollups()
+    except Exception as e:
+        print(f"❌ Error backfilling rollups: {e}")
+    while not stop.is_set():
+        check_rollups()
+        stop.wait(ROLLUP_INTERVAL_SECONDS)
+
+
 def main():
     """Main scheduler loop"""
     print("=" * 50)
@@ -152,10 +198,14 @@ def main():
     print("Monitoring for:")
     print("  - Medication times (checks every minute)")
     print("  - Daily recap schedule")
+    print("  - Daily/weekly rollup refresh")
     print("=" * 50)
     print("Press Ctrl+C to stop")
     print("=" * 50)
 
+    stop = threading.Event()
+    threading.Thread(target=rollup_worker, args=(stop,), daemon=True, name="rollups").start()
+
     try:
         while True:
             current_time = datetime.now().strftime("%H:%M:%S")
@@ -167,10 +217,11 @@ def main():
             # Check daily recap
             check_daily_recap()
 
-            # Wait 60 seconds before next check
-            time.sleep(60)
+            # Wait until the start of the next minute
+            time.sleep(60 - datetime.now().second)
 
     except KeyboardInterrupt:
+        stop.set()
         print("\n👋 Scheduler stopped")
 
 
@@ -1,27 +1,42 @@
 # src/caregiver_chatbot.py
-from openai import OpenAI
+from functools import lru_cache
 from dotenv import load_dotenv
-from src.database import get_recent_conversations, get_all_people
+from src.model_router import TASK_CHATBOT
+from src.llm_gateway import client, chat_completion
+from src.token_budget import fit_lines, count_tokens, budget_for
+from src.database import get_all_people, get_data_version
+from src.summary_index import retrieve_relevant_conversations, embed_texts, DEFAULT_TOP_K
+from src.answer_cache import answer_cache
+from src.rollups import get_period_rollups, format_rollup
 
 load_dotenv()
 
-try:
-    client = OpenAI()
-except Exception as e:
-    print(f"Error initializing OpenAI client: {e}")
-    client = None
 
+# Windows longer than this also get day/week rollups, with fewer individual conversations
+ROLLUP_THRESHOLD_DAYS = 14
+ROLLUP_TOP_K = 6
 
-def answer_caregiver_question(question: str, days_back: int = 7) -> str:
-    if not client:
-        return "Error: OpenAI client not initialized."
 
-    print(f"🤔 Caregiver asked: {question}")
+@lru_cache(maxsize=256)
+def _embed_question(question: str):
+    return embed_texts([question])[0]
 
-    conversations = get_recent_conversations(days=days_back)
 
-    if not conversations:
-        return f"I don't have any conversation records from the last {days_back} days."
+def build_caregiver_prompt(question: str, days_back: int = 7, top_k: int = DEFAULT_TOP_K) -> str | None:
+    """Prompt grounded in rollups and the top_k most relevant conversations, or None if there is no data."""
+    rollup_context = ""
+    if days_back > ROLLUP_THRESHOLD_DAYS:
+        rollups = [r for r in get_period_rollups(days_back) if r.get('conversation_count')]
+        if rollups:
+            # Rollups get at most half the budget; the most recent periods are kept
+            blocks = fit_lines([format_rollup(r) for r in rollups], TASK_CHATBOT, budget_for(TASK_CHATBOT) // 2, "\n\n")
+            rollup_context = "\n\n".join(blocks)
+            top_k = min(top_k, ROLLUP_TOP_K)
+
+    conversations = retrieve_relevant_conversations(question, days_back=days_back, k=top_k)
+
+    if not conversations and not rollup_context:
+        return None
 
     conversation_texts = []
     for i, conv in enumerate(conversations, 1):
@@ -36,7 +51,8 @@ def answer_caregiver_question(question: str, days_back: int = 7) -> str:
 - Concerns: {', '.join(concerns) if concerns else 'None'}"""
         conversation_texts.append(conv_text)
 
-    context = "\n".join(conversation_texts)
+    conversation_budget = budget_for(TASK_CHATBOT) - count_tokens(rollup_context)
+    context = "\n".join(fit_lines(conversation_texts, TASK_CHATBOT, conversation_budget))
 
     try:
         people = get_all_people()
@@ -47,27 +63,94 @@ def answer_caregiver_question(question: str, days_back: int = 7) -> str:
     except:
         people_context = "Error loading people."
 
+    overview_section = f"""Period Overviews (rollups for the last {days_back} days):
+{rollup_context}
+
+""" if rollup_context else ""
+
     prompt = f"""You are helping a caregiver understand their patient's recent activity.
 Answer based ONLY on this data. If info isn't here, say so.
 
-Recent Conversations:
+{overview_section}Most Relevant Conversations (last {days_back} days, oldest first):
 {context}
 
 Known People:
 {people_context}
 
 Question: {question}"""
+    return prompt
+
+
+def answer_caregiver_question(question: str, days_back: int = 7, top_k: int = DEFAULT_TOP_K) -> str:
+    """Answer from the top_k conversations in the window most relevant to the question."""
+    if not client:
+        return "Error: OpenAI client not initialized."
+
+    print(f"🤔 Caregiver asked: {question}")
+
+    version = get_data_version()
+    cached = answer_cache.lookup(question, days_back, version, embed=_embed_question) if version else None
+    if cached:
+        print(f"⚡ Answer served from cache")
+        return cached
+
+    prompt = build_caregiver_prompt(question, days_back, top_k)
+    if prompt is None:
+        return f"I don't have any conversation records from the last {days_back} days."
 
     try:
-        completion = client.chat.completions.create(
-            model="gpt-4",
+        completion = chat_completion(
+            task=TASK_CHATBOT,
             messages=[{"role": "system", "content": prompt}],
             temperature=0.3,
             max_tokens=500
         )
         answer = completion.choices[0].message.content.strip()
         print(f"✅ Answer generated")
+        if version:
+            answer_cache.store(question, days_back, version, answer, embed=_embed_question)
         return answer
     except Exception as e:
         print(f"❌ Error: {e}")
-        return f"Error generating answer: {e}"
\ No newline at end of file
+        return f"Error generating answer: {e}"
+
+
+def stream_caregiver_answer(question: str, days_back: int = 7, top_k: int = DEFAULT_TOP_K):
+    """Same as answer_caregiver_question, but yields answer text chunks as they arrive."""
+    if not client:
+        yield "Error: OpenAI client not initialized."
+        return
+
+    print(f"🤔 Caregiver asked (streaming): {question}")
+
+    version = get_data_version()
+    cached = answer_cache.lookup(question, days_back, version, embed=_embed_question) if version else None
+    if cached:
+        print(f"⚡ Answer served from cache")
+        yield cached
+        return
+
+    prompt = build_caregiver_prompt(question, days_back, top_k)
+    if prompt is None:
+        yield f"I don't have any conversation records from the last {days_back} days."
+        return
+
+    try:
+        stream = chat_completion(
+            task=TASK_CHATBOT,
+            messages=[{"role": "system", "content": prompt}],
+            temperature=0.3,
+            max_tokens=500,
+            stream=True
+        )
+        parts = []
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                parts.append(chunk.choices[0].delta.content)
+                yield parts[-1]
+        print(f"✅ Answer streamed")
+        if version:
+            answer_cache.store(question, days_back, version, "".join(parts).strip(), embed=_embed_question)
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        yield f"Error generating answer: {e}"
\ No newline at end of file
@@ -1,21 +1,31 @@
 # src/database.py
 import streamlit as st
 import os
-from pymongo import MongoClient
+from pymongo import MongoClient, ReturnDocument, UpdateOne
 from pymongo.results import DeleteResult, InsertOneResult, UpdateResult
 from bson.objectid import ObjectId, InvalidId
 from dotenv import load_dotenv
-from src.schemas import ConversationSegment, ConversationSummary, Medication, PersonProfile, AppSettings
-from datetime import datetime, time
+from src.schemas import ConversationSegment, ConversationSummary, Medication, PersonProfile, AppSettings, EmergencyAlert, HomeInfo
+from src.face_gallery import pack_face_encoding, is_packed_face_encoding
+from src.telemetry import get_logger, span
+from datetime import datetime, time, timedelta
 
 load_dotenv()
 
+log = get_logger(__name__)
+
 DB_NAME = "RememberMeDB"
 SEGMENT_COLLECTION = "conversations"
 SUMMARY_COLLECTION = "summaries"
 MEDICATION_COLLECTION = "medications"
 PEOPLE_COLLECTION = "people"
 SETTINGS_COLLECTION = "settings"  # NEW
+ROLLUP_COLLECTION = "rollups"
+ALERT_COLLECTION = "alerts"
+HOME_INFO_COLLECTION = "home_info"
+META_COLLECTION = "metadata"
+RECAP_COLLECTION = "recaps"
+LEGACY_LINK_SECONDS = 10  # A legacy summary was inserted right after its segment
 
 try:
     connection_string = os.getenv("MONGO_CONNECTION_STRING")
@@ -27,6 +37,11 @@ try:
     medication_collection = db[MEDICATION_COLLECTION]
     people_collection = db[PEOPLE_COLLECTION]
     settings_collection = db[SETTINGS_COLLECTION]  # NEW
+    rollup_collection = db[ROLLUP_COLLECTION]
+    alert_collection = db[ALERT_COLLECTION]
+    home_info_collection = db[HOME_INFO_COLLECTION]
+    meta_collection = db[META_COLLECTION]
+    recap_collection = db[RECAP_COLLECTION]
     client.admin.command('ping')
     print("✅ Successfully connected to MongoDB!")
 except Exception as e:
@@ -47,10 +62,27 @@ def save_conversation(segment: ConversationSegment, summary: ConversationSummary
         summary_data = summary.model_dump(by_alias=True, exclude_none=True)
         if '_id' in segment_data: del segment_data['_id']
         if '_id' in summary_data: del summary_data['_id']
-        segment_collection.insert_one(segment_data)
-        summary_collection.insert_one(summary_data)
-        print("✅ Conversation data saved.")
-    except Exception as e: print(f"❌ Error saving conversation: {e}")
+        with span("db_insert"):
+            segment_result: InsertOneResult = segment_collection.insert_one(segment_data)
+            summary_data['segment_id'] = str(segment_result.inserted_id)  # Links the summary for reprocessing
+            summary_collection.insert_one(summary_data)
+        log.debug("✅ Conversation data saved.")
+    except Exception as e:
+        log.error(f"❌ Error saving conversation: {e}")
+        return
+
+    # Keep the chatbot's retrieval index current (summary_data now carries its _id)
+    from src.summary_index import index_summaries
+    with span("summary_index"):
+        index_summaries([summary_data])
+
+    # Day/week rollups covering this conversation are rebuilt by the background scheduler
+    from src.rollups import mark_rollups_stale
+    mark_rollups_stale(summary_data.get('generated_at') or datetime.now())
+
+    # Today's running recap is extended in the background
+    from src.recap_generator import schedule_recap_update
+    schedule_recap_update(summary_data)
 
 @st.cache_data(ttl=60)
 def get_all_conversations():
@@ -80,6 +112,320 @@ def get_recent_conversations(days=7):
         return [convert_document_id(doc) for doc in docs]
     except Exception as e: print(f"❌ Error fetching recent conversations: {e}"); return []
 
+def get_recent_conversation_ids(days=7) -> list[str]:
+    """IDs of summaries from the last N days, newest first."""
+    if not client: return []
+    try:
+        from datetime import timedelta
+        cutoff = datetime.now() - timedelta(days=days)
+        cursor = summary_collection.find({"generated_at": {"$gte": cutoff}}, {"_id": 1}).sort("generated_at", -1)
+        return [str(doc["_id"]) for doc in cursor]
+    except Exception as e: print(f"❌ Error fetching conversation IDs: {e}"); return []
+
+def get_conversations_by_ids(summary_ids: list[str]):
+    """Summaries with the given IDs, oldest first."""
+    if not client or not summary_ids: return []
+    try:
+        obj_ids = [ObjectId(sid) for sid in summary_ids]
+        docs = list(summary_collection.find({"_id": {"$in": obj_ids}}).sort("generated_at", 1))
+        return [convert_document_id(doc) for doc in docs]
+    except Exception as e: print(f"❌ Error fetching conversations by ID: {e}"); return []
+
+def get_conversations_between(start: datetime, end: datetime):
+    """Summaries generated in [start, end), oldest first."""
+    if not client: return []
+    try:
+        query = {"generated_at": {"$gte": start, "$lt": end}}
+        docs = list(summary_collection.find(query).sort("generated_at", 1))
+        return [convert_document_id(doc) for doc in docs]
+    except Exception as e: print(f"❌ Error fetching conversations: {e}"); return []
+
+def get_recent_transcripts(limit: int = 10) -> list[str]:
+    """Most recent raw transcripts (newest first), e.g. as benchmark inputs."""
+    if not client: return []
+    try:
+        cursor = segment_collection.find({"transcript": {"$exists": True}}, {"transcript": 1}).sort("start_time", -1).limit(limit)
+        return [doc["transcript"] for doc in cursor if doc.get("transcript")]
+    except Exception as e: print(f"❌ Error fetching transcripts: {e}"); return []
+
+def bump_data_version():
+    """Count in-place summary rewrites and backdated inserts, which leave the newest summary _id unchanged."""
+    meta_collection.update_one({"_id": "data_version"}, {"$inc": {"summary_rewrites": 1}}, upsert=True)
+
+def get_data_version() -> str:
+    """Cheap stamp that changes whenever a conversation is saved, summaries are rewritten or a rollup is rebuilt."""
+    if not client: return ""
+    try:
+        latest_summary = summary_collection.find_one({}, {"_id": 1}, sort=[("_id", -1)])
+        latest_rollup = rollup_collection.find_one({}, {"updated_at": 1}, sort=[("updated_at", -1)])
+        rewrites = (meta_collection.find_one({"_id": "data_version"}) or {}).get("summary_rewrites", 0)
+        summary_stamp = str(latest_summary["_id"]) if latest_summary else "none"
+        rollup_stamp = latest_rollup.get("updated_at").isoformat() if latest_rollup and latest_rollup.get("updated_at") else "none"
+        return f"{summary_stamp}:{rewrites}:{rollup_stamp}"
+    except Exception as e: print(f"❌ Error fetching data version: {e}"); return ""
+
+def patient_exists(patient_id: str) -> bool:
+    """True if any conversation has been recorded for this patient."""
+    if not client: return False
+    try:
+        return segment_collection.find_one({"patient_id": patient_id}, {"_id": 1}) is not None
+    except Exception as e: print(f"❌ Error checking patient: {e}"); return False
+
+# --- Reprocessing Functions ---
+def iter_segment_batches(after_id: str | None = None, batch_size: int = 50, since: datetime | None = None):
+    """
+    Yield lists of conversation segments in _id order, starting after `after_id` (a checkpoint).
+
+    Read errors are raised rather than ending the iteration, so a failed read is never mistaken for a finished run.
+    """
+    if not client: return
+    query = {"transcript": {"$exists": True}}
+    if since is not None:
+        query["start_time"] = {"$gte": since}
+    last_id = ObjectId(after_id) if after_id else None
+    while True:
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+        try:
+            batch = list(segment_collection.find(query).sort("_id", 1).limit(batch_size))
+        except Exception as e: print(f"❌ Error reading segments: {e}"); raise
+        if not batch:
+            return
+        yield batch
+        last_id = batch[-1]["_id"]
+
+def count_segments(after_id: str | None = None, since: datetime | None = None) -> int:
+    if not client: return 0
+    query = {"transcript": {"$exists": True}}
+    if since is not None:
+        query["start_time"] = {"$gte": since}
+    if after_id:
+        query["_id"] = {"$gt": ObjectId(after_id)}
+    try:
+        return segment_collection.count_documents(query)
+    except Exception as e: print(f"❌ Error counting segments: {e}"); return 0
+
+def _match_legacy_summaries(segment_ids: list[str]) -> dict:
+    """
+    Map segment IDs with no linked summary to the unlinked legacy summary (segment_id "None")
+    inserted right after the segment, matched by ObjectId creation time.
+    """
+    linked = {s["segment_id"] for s in summary_collection.find({"segment_id": {"$in": segment_ids}}, {"segment_id": 1})}
+    created = {sid: ObjectId(sid).generation_time for sid in segment_ids if sid not in linked and ObjectId.is_valid(sid)}
+    if not created:
+        return {}
+    window = timedelta(seconds=LEGACY_LINK_SECONDS)
+    legacy = list(summary_collection.find({
+        "segment_id": {"$in": ["None", None]},
+        "_id": {"$gte": ObjectId.from_datetime(min(created.values())),
+                "$lte": ObjectId.from_datetime(max(created.values()) + window)},
+    }, {"_id": 1}))
+    matches, claimed = {}, set()
+    for sid, at in sorted(created.items(), key=lambda item: item[1]):
+        candidates = [d["_id"] for d in legacy
+                      if d["_id"] not in claimed and at <= d["_id"].generation_time <= at + window]
+        if candidates:
+            matches[sid] = min(candidates, key=lambda oid: oid.generation_time - at)
+            claimed.add(matches[sid])
+    return matches
+
+def bulk_upsert_summaries(summaries: list[dict]) -> list[dict]:
+    """
+    Upsert summaries keyed by segment_id in one bulk write; returns the stored documents.
+
+    A legacy summary of the same conversation is rewritten in place (and linked) instead of
+    being duplicated. Write errors are raised, so callers never checkpoint past a failed batch.
+    """
+    if not client or not summaries: return []
+    try:
+        legacy = _match_legacy_summaries([s["segment_id"] for s in summaries])
+        summary_collection.bulk_write(
+            [UpdateOne({"_id": legacy[s["segment_id"]]}, {"$set": s}) if s["segment_id"] in legacy
+             else UpdateOne({"segment_id": s["segment_id"]}, {"$set": s}, upsert=True) for s in summaries],
+            ordered=False
+        )
+        bump_data_version()
+        get_all_conversations.clear()
+        return list(summary_collection.find({"segment_id": {"$in": [s["segment_id"] for s in summaries]}}))
+    except Exception as e: print(f"❌ Error upserting summaries: {e}"); raise
+
+def delete_unlinked_summaries() -> int:
+    """Remove summaries saved before segment links existed (segment_id "None")."""
+    if not client: return 0
+    try:
+        result: DeleteResult = summary_collection.delete_many({"segment_id": {"$in": ["None", None]}})
+        if result.deleted_count:
+            bump_data_version()
+        get_all_conversations.clear()
+        return result.deleted_count
+    except Exception as e: print(f"❌ Error deleting unlinked summaries: {e}"); return 0
+
+def get_checkpoint(name: str) -> dict:
+    if not client: return {}
+    try:
+        return meta_collection.find_one({"_id": f"checkpoint:{name}"}) or {}
+    except Exception as e: print(f"❌ Error fetching checkpoint: {e}"); return {}
+
+def save_checkpoint(name: str, data: dict):
+    if not client: return
+    try:
+        meta_collection.update_one({"_id": f"checkpoint:{name}"}, {"$set": {**data, "updated_at": datetime.now()}}, upsert=True)
+    except Exception as e: print(f"❌ Error saving checkpoint: {e}")
+
+# --- Rollup Functions ---
+def mark_rollup_stale(period: str, start: datetime, end: datetime, only_missing: bool = False):
+    """Create or flag the rollup for a period so the scheduler rebuilds it (only_missing: leave existing ones)."""
+    if not client: return
+    try:
+        if only_missing:
+            update = {"$setOnInsert": {"end": end, "stale": True, "stale_version": 1}}
+        else:
+            # The version lets save_rollup tell whether the flag was raised again during a rebuild
+            update = {"$set": {"stale": True}, "$inc": {"stale_version": 1}, "$setOnInsert": {"end": end}}
+        rollup_collection.update_one({"period": period, "start": start}, update, upsert=True)
+    except Exception as e: print(f"❌ Error marking rollup stale: {e}")
+
+def get_stale_rollups(period: str, limit: int = 50):
+    if not client: return []
+    try:
+        return list(rollup_collection.find({"period": period, "stale": True}).sort("start", 1).limit(limit))
+    except Exception as e: print(f"❌ Error fetching stale rollups: {e}"); return []
+
+def save_rollup(period: str, start: datetime, data: dict, stale_version: int | None = None):
+    """
+    Store a rebuilt rollup. It is only marked fresh if no conversation flagged
+    it again while it was being built (stale_version as read before the build).
+    """
+    if not client: return
+    try:
+        key = {"period": period, "start": start}
+        rollup_collection.update_one(key, {"$set": {**data, "updated_at": datetime.now()}}, upsert=True)
+        version_filter = {"stale_version": stale_version} if stale_version is not None else {"stale_version": {"$exists": False}}
+        result = rollup_collection.update_one({**key, **version_filter}, {"$set": {"stale": False}})
+        if result.matched_count == 0:
+            print(f"🔁 Rollup {period} {start:%Y-%m-%d} changed during rebuild; keeping it queued")
+    except Exception as e: print(f"❌ Error saving rollup: {e}")
+
+def get_rollups(period: str, since: datetime, until: datetime | None = None):
+    """Rollups for a period type ("day" or "week") starting on/after `since`, oldest first."""
+    if not client: return []
+    try:
+        query = {"period": period, "start": {"$gte": since}}
+        if until is not None:
+            query["start"]["$lt"] = until
+        docs = list(rollup_collection.find(query).sort("start", 1))
+        return [convert_document_id(doc) for doc in docs]
+    except Exception as e: print(f"❌ Error fetching rollups: {e}"); return []
+
+# --- Running Recap Functions ---
+def get_running_recap(day: str) -> dict | None:
+    """The incrementally maintained recap for a day ("YYYY-MM-DD"), if one exists."""
+    if not client: return None
+    try:
+        return recap_collection.find_one({"day": day})
+    except Exception as e: print(f"❌ Error fetching running recap: {e}"); return None
+
+def save_running_recap(day: str, data: dict):
+    if not client: return
+    try:
+        recap_collection.update_one({"day": day}, {"$set": {**data, "updated_at": datetime.now()}}, upsert=True)
+    except Exception as e: print(f"❌ Error saving running recap: {e}")
+
+# --- Alert Functions ---
+def save_alert(alert: EmergencyAlert) -> str | None:
+    if not client: return None
+    try:
+        alert_data = alert.model_dump(by_alias=True, exclude_none=True)
+        if '_id' in alert_data: del alert_data['_id']
+        result: InsertOneResult = alert_collection.insert_one(alert_data)
+        return str(result.inserted_id)
+    except Exception as e: print(f"❌ Error saving alert: {e}"); return None
+
+def update_alert(alert_id: str, updates: dict):
+    if not client: return
+    try:
+        alert_collection.update_one({"_id": ObjectId(alert_id)}, {"$set": updates})
+    except (InvalidId, TypeError): print(f"❌ Invalid alert ID: {alert_id}")
+    except Exception as e: print(f"❌ Error updating alert: {e}")
+
+def get_active_alerts():
+    """Unacknowledged alerts raised on the dashboard banner, newest first."""
+    if not client: return []
+    try:
+        docs = list(alert_collection.find({"acknowledged": False, "banner": True}).sort("detected_at", -1))
+        return [convert_document_id(doc) for doc in docs]
+    except Exception as e: print(f"❌ Error fetching alerts: {e}"); return []
+
+def get_recent_alerts(limit: int = 200):
+    if not client: return []
+    try:
+        docs = list(alert_collection.find().sort("detected_at", -1).limit(limit))
+        return [convert_document_id(doc) for doc in docs]
+    except Exception as e: print(f"❌ Error fetching alerts: {e}"); return []
+
+def acknowledge_alert(alert_id: str):
+    update_alert(alert_id, {"acknowledged": True, "acknowledged_at": datetime.now()})
+
+# --- Knowledge Base Version ---
+KNOWLEDGE_BASE_ID = "knowledge_base"
+# Fields the patient assistant's knowledge base is built from; other updates (face encodings, reminders) don't count
+KNOWLEDGE_FIELDS = {"name", "relationship", "notes", "time_to_take", "purpose", "dosage", "topic", "details"}
+
+def _bump_knowledge_version(updates: dict | None = None):
+    if not client: return
+    if updates is not None and not KNOWLEDGE_FIELDS & updates.keys(): return
+    try:
+        meta_collection.update_one({"_id": KNOWLEDGE_BASE_ID}, {"$inc": {"version": 1}}, upsert=True)
+    except Exception as e: print(f"❌ Error bumping knowledge base version: {e}")
+
+def get_knowledge_base_meta() -> dict:
+    """Current knowledge base version plus the last snapshot saved for it (if any)."""
+    if not client: return {}
+    try:
+        return meta_collection.find_one_and_update(
+            {"_id": KNOWLEDGE_BASE_ID}, {"$setOnInsert": {"version": 0}}, upsert=True, return_document=ReturnDocument.AFTER
+        )
+    except Exception as e: print(f"❌ Error fetching knowledge base version: {e}"); return {}
+
+def save_knowledge_base_snapshot(version: int, snapshot: str):
+    """Store a built snapshot, unless the data changed again while it was being built."""
+    if not client: return
+    try:
+        meta_collection.update_one(
+            {"_id": KNOWLEDGE_BASE_ID, "version": version},
+            {"$set": {"snapshot": snapshot, "snapshot_version": version}}
+        )
+    except Exception as e: print(f"❌ Error saving knowledge base snapshot: {e}")
+
+# --- Home Information Functions ---
+def add_home_info(item: HomeInfo) -> str | None:
+    if not client: return None
+    try:
+        item_data = item.model_dump(by_alias=True, exclude_none=True)
+        if '_id' in item_data: del item_data['_id']
+        result: InsertOneResult = home_info_collection.insert_one(item_data)
+        _bump_knowledge_version()
+        get_all_home_info.clear()
+        return str(result.inserted_id)
+    except Exception as e: print(f"❌ Error saving home information: {e}"); return None
+
+@st.cache_data(ttl=60)
+def get_all_home_info():
+    if not client: return []
+    try:
+        return [convert_document_id(doc) for doc in home_info_collection.find().sort("topic", 1)]
+    except Exception as e: print(f"❌ Error fetching home information: {e}"); return []
+
+def delete_home_info(item_id: str):
+    if not client: return
+    try:
+        result: DeleteResult = home_info_collection.delete_one({"_id": ObjectId(item_id)})
+        if result.deleted_count > 0:
+            _bump_knowledge_version()
+            get_all_home_info.clear()
+    except InvalidId: print(f"❌ Error: Invalid ID format for deletion: {item_id}")
+    except Exception as e: print(f"❌ Error deleting home information: {e}")
+
 # --- Medication Functions ---
 def add_medication(medication: Medication) -> str | None:
     if not client: return None
@@ -89,6 +435,7 @@ def add_medication(medication: Medication) -> str | None:
         result: InsertOneResult = medication_collection.insert_one(med_data)
         new_id = str(result.inserted_id)
         print(f"✅ Medication '{medication.name}' saved with ID: {new_id}.")
+        _bump_knowledge_version()
         get_all_medications.clear()
         return new_id
     except Exception as e: print(f"❌ Error saving medication: {e}"); return None
@@ -109,6 +456,7 @@ def delete_medication(medication_id: str):
         result: DeleteResult = medication_collection.delete_one({"_id": obj_id})
         if result.deleted_count > 0:
             print(f"✅ Medication '{medication_id}' deleted.")
+            _bump_knowledge_version()
             get_all_medications.clear()
         else:
             print(f"⚠️ Medication '{medication_id}' not found.")
@@ -123,6 +471,7 @@ def update_medication(medication_id: str, updates: dict):
         result: UpdateResult = medication_collection.update_one({"_id": obj_id}, {"$set": updates})
         if result.matched_count > 0:
             print(f"✅ Medication '{medication_id}' updated.")
+            _bump_knowledge_version(updates)
             get_all_medications.clear()
         else:
             print(f"⚠️ Medication '{medication_id}' not found.")
@@ -131,6 +480,18 @@ def update_medication(medication_id: str, updates: dict):
     except Exception as e: print(f"❌ Error updating medication: {e}")
 
 # --- People Functions ---
+def _pack_face_fields(person_data: dict) -> dict:
+    """Store face encodings as packed float32 Binary instead of 128 BSON doubles."""
+    encoding = person_data.get("face_encoding")
+    if encoding is not None and not is_packed_face_encoding(encoding):
+        person_data["face_encoding"] = pack_face_encoding(encoding)
+    encodings = person_data.get("face_encodings")
+    if encodings is not None:
+        person_data["face_encodings"] = [
+            e if is_packed_face_encoding(e) else pack_face_encoding(e) for e in encodings
+        ]
+    return person_data
+
 def add_person(person: PersonProfile) -> str | None:
     if not client: return None
     try:
@@ -138,11 +499,12 @@ def add_person(person: PersonProfile) -> str | None:
         if existing:
              print(f"⚠️ Person '{person.name}' already exists.")
              return str(existing['_id'])
-        person_data = person.model_dump(by_alias=True, exclude_none=True)
+        person_data = _pack_face_fields(person.model_dump(by_alias=True, exclude_none=True))
         if '_id' in person_data: del person_data['_id']
         result: InsertOneResult = people_collection.insert_one(person_data)
         new_id = str(result.inserted_id)
         print(f"✅ Person '{person.name}' saved with ID: {new_id}.")
+        _bump_knowledge_version()
         get_all_people.clear()
         return new_id
     except Exception as e:
@@ -166,6 +528,7 @@ def delete_person(person_id: str):
         result: DeleteResult = people_collection.delete_one({"_id": obj_id})
         if result.deleted_count > 0:
             print(f"✅ Person '{person_id}' deleted.")
+            _bump_knowledge_version()
             get_all_people.clear()
         else:
             print(f"⚠️ Person '{person_id}' not found.")
@@ -177,9 +540,11 @@ def update_person(person_id: str, updates: dict):
     if not client: return
     try:
         obj_id = ObjectId(person_id)
+        updates = _pack_face_fields(dict(updates))
         result: UpdateResult = people_collection.update_one({"_id": obj_id}, {"$set": updates})
         if result.matched_count > 0:
             print(f"✅ Person '{person_id}' updated.")
+            _bump_knowledge_version(updates)
             get_all_people.clear()
         else:
             print(f"⚠️ Person '{person_id}' not found.")
@@ -188,6 +553,25 @@ def update_person(person_id: str, updates: dict):
     except Exception as e:
         print(f"❌ Error updating person: {e}")
 
+def migrate_face_encodings() -> int:
+    """Convert legacy list-of-floats face encodings to the packed Binary format. Returns number migrated."""
+    if not client: return 0
+    migrated = 0
+    try:
+        legacy_query = {"face_encoding": {"$type": "array"}}
+        for doc in people_collection.find(legacy_query, {"face_encoding": 1}):
+            people_collection.update_one(
+                {"_id": doc["_id"], "face_encoding": {"$type": "array"}},
+                {"$set": {"face_encoding": pack_face_encoding(doc["face_encoding"])}}
+            )
+            migrated += 1
+        if migrated:
+            get_all_people.clear()
+        print(f"✅ Migrated {migrated} face encoding(s) to binary format.")
+    except Exception as e:
+        print(f"❌ Error migrating face encodings: {e}")
+    return migrated
+
 # --- NEW: Settings Functions ---
 def get_settings() -> dict:
     """Get app settings, create default if doesn't exist"""
@@ -0,0 +1,171 @@
+# src/face_enrollment.py
+"""
+Background face enrollment for people profiles.
+
+Photos are encoded in a process pool so the Streamlit page never blocks on
+face_recognition. When every photo of a person is done, all encodings plus
+their centroid are written to the profile.
+
+Bulk import from the command line (one sub-folder of photos per person):
+    poetry run python src/face_enrollment.py path/to/people --relationship Family
+"""
+import os
+import sys
+import time
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait
+from datetime import datetime
+from pathlib import Path
+import numpy as np
+
+if __name__ == "__main__":
+    sys.path.insert(0, str(Path(__file__).parent.parent))
+
+PHOTO_EXTENSIONS = {".jpg", ".jpeg", ".png"}
+MAX_ENROLL_SIDE = 1024  # Detection runs on a copy this size; encoding uses the full photo
+ENROLL_WORKERS = int(os.getenv("ENROLL_WORKERS", "0")) or max(1, (os.cpu_count() or 2) - 1)
+
+_executor = None
+_executor_lock = threading.Lock()
+_jobs = {}  # person_id -> job status dict
+_jobs_lock = threading.Lock()
+
+
+# ========================================
+# WORKER (runs in a child process)
+# ========================================
+
+def encode_photo(photo_path: str) -> np.ndarray | None:
+    """Return the encoding of the largest face in a photo, or None if no face is found."""
+    import face_recognition
+    from PIL import Image
+    from src.face_pipeline import detect_faces
+
+    with Image.open(photo_path) as img:
+        image = np.array(img.convert("RGB"))
+
+    locations = detect_faces(image, max_side=MAX_ENROLL_SIDE)
+    if not locations:
+        return None
+    # Enrollment photos are of one person: keep the largest face
+    largest = max(locations, key=lambda box: (box[2] - box[0]) * (box[1] - box[3]))
+    encodings = face_recognition.face_encodings(image, known_face_locations=[largest])
+    return encodings[0].astype(np.float32) if encodings else None
+
+
+# ========================================
+# JOB MANAGEMENT (runs in the app process)
+# ========================================
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # spawn: forking a threaded Streamlit server is unsafe
+            _executor = ProcessPoolExecutor(max_workers=ENROLL_WORKERS,
+                                            mp_context=multiprocessing.get_context("spawn"))
+        return _executor
+
+
+def list_photos(folder: str | Path) -> list[str]:
+    """All photo files directly inside a folder, sorted by name."""
+    folder = Path(folder)
+    if not folder.is_dir():
+        return []
+    return sorted(str(p) for p in folder.iterdir() if p.suffix.lower() in PHOTO_EXTENSIONS)
+
+
+def compute_centroid(encodings: list[np.ndarray]) -> np.ndarray:
+    return np.mean(np.stack(encodings), axis=0).astype(np.float32)
+
+
+def _set_job(person_id: str, **fields):
+    with _jobs_lock:
+        _jobs.setdefault(person_id, {}).update(fields)
+
+
+def get_enrollment_status(person_id: str) -> dict | None:
+    """Status of the latest enrollment job for a person (state: pending, done, failed)."""
+    with _jobs_lock:
+        job = _jobs.get(person_id)
+        return dict(job) if job else None
+
+
+def _collect_results(person_id: str, futures: list):
+    """Wait for a person's photos to finish encoding and save the result to their profile."""
+    from src.database import update_person
+
+    wait(futures)
+    encodings = []
+    for future in futures:
+        try:
+            encoding = future.result()
+            if encoding is not None:
+                encodings.append(encoding)
+        except Exception as e:
+            print(f"⚠️ Could not encode photo for {person_id}: {e}")
+
+    if not encodings:
+        print(f"⚠️ No faces found in {len(futures)} photo(s) for {person_id}")
+        _set_job(person_id, state="failed", encoded=0, finished_at=datetime.now())
+        return
+
+    update_person(person_id, {
+        "face_encodings": encodings,
+        "face_encoding": compute_centroid(encodings),
+    })
+    print(f"✅ Enrolled {len(encodings)}/{len(futures)} face encoding(s) for {person_id}")
+    _set_job(person_id, state="done", encoded=len(encodings), finished_at=datetime.now())
+
+
+def submit_enrollment(person_id: str, photo_paths: list[str]) -> bool:
+    """Queue photos for encoding off the UI thread. Returns False if there is nothing to encode."""
+    photo_paths = [str(p) for p in photo_paths]
+    if not photo_paths:
+        return False
+
+    executor = _get_executor()
+    futures = [executor.submit(encode_photo, path) for path in photo_paths]
+    _set_job(person_id, state="pending", photos=len(photo_paths), encoded=0,
+             submitted_at=datetime.now(), finished_at=None)
+
+    threading.Thread(target=_collect_results, args=(person_id, futures), daemon=True).start()
+    print(f"🧵 Queued {len(photo_paths)} photo(s) for face enrollment ({person_id})")
+    return True
+
+
+def enroll_people_from_directory(root: str | Path, relationship: str) -> list[str]:
+    """Create a profile per sub-folder of `root` and enroll all photos in it. Returns person IDs."""
+    from src.database import add_person
+    from src.schemas import PersonProfile
+
+    person_ids = []
+    for folder in sorted(Path(root).iterdir()):
+        photos = list_photos(folder)
+        if not photos:
+            continue
+        person_id = add_person(PersonProfile(
+            name=folder.name.replace("_", " ").title(),
+            relationship=relationship,
+            photo_url=photos[0],
+        ))
+        if person_id and submit_enrollment(person_id, photos):
+            person_ids.append(person_id)
+    return person_ids
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Bulk-enroll people from a folder of per-person photo folders.")
+    parser.add_argument("root", help="Folder containing one sub-folder of photos per person")
+    parser.add_argument("--relationship", default="Family", help="Relationship stored on new profiles")
+    args = parser.parse_args()
+
+    ids = enroll_people_from_directory(args.root, args.relationship)
+    print(f"⏳ Encoding photos for {len(ids)} people...")
+    for pid in ids:
+        while (get_enrollment_status(pid) or {}).get("state") == "pending":
+            time.sleep(0.5)
+    print("🎉 Bulk enrollment complete!")
@@ -0,0 +1,97 @@
+# src/face_pipeline.py
+"""
+Downscale-then-detect face recognition pipeline.
+
+HOG detection cost grows with pixel count, so faces are located on a small
+copy of the frame and the boxes are mapped back to full resolution, where the
+encodings are computed. Every face in the frame is matched against the gallery
+in one vectorized pass.
+"""
+from dataclasses import dataclass, field
+import time
+import numpy as np
+import face_recognition
+from PIL import Image
+from src.face_gallery import FaceGallery, FaceMatch, DEFAULT_TOLERANCE
+
+DETECTION_MAX_SIDE = 480  # Longest side of the copy used for detection
+DETECTION_UPSAMPLE = 1    # HOG upsampling on the small copy; finds faces down to ~40px
+
+
+@dataclass
+class RecognizedFace:
+    location: tuple[int, int, int, int]  # (top, right, bottom, left) in full-resolution pixels
+    match: FaceMatch | None
+
+
+@dataclass
+class RecognitionResult:
+    faces: list[RecognizedFace] = field(default_factory=list)
+    timings_ms: dict = field(default_factory=dict)
+
+    def timing_summary(self) -> str:
+        return " · ".join(f"{stage} {ms:.0f} ms" for stage, ms in self.timings_ms.items())
+
+
+def _ms_since(start: float) -> float:
+    return (time.perf_counter() - start) * 1000
+
+
+def downscale(image: np.ndarray, max_side: int = DETECTION_MAX_SIDE) -> tuple[np.ndarray, float]:
+    """Return a copy whose longest side is at most max_side, plus the scale factor applied."""
+    height, width = image.shape[:2]
+    scale = min(1.0, max_side / max(height, width))
+    if scale == 1.0:
+        return image, 1.0
+    size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    small = np.asarray(Image.fromarray(image).resize(size, Image.BILINEAR))
+    return small, scale
+
+
+def detect_faces(image: np.ndarray, max_side: int = DETECTION_MAX_SIDE,
+                 upsample: int = DETECTION_UPSAMPLE, timings: dict | None = None) -> list[tuple[int, int, int, int]]:
+    """Locate faces on a downscaled copy and return their boxes in full-resolution coordinates."""
+    timings = timings if timings is not None else {}
+
+    start = time.perf_counter()
+    small, scale = downscale(image, max_side)
+    timings["downscale"] = _ms_since(start)
+
+    start = time.perf_counter()
+    small_boxes = face_recognition.face_locations(small, number_of_times_to_upsample=upsample, model="hog")
+    timings["detect"] = _ms_since(start)
+
+    height, width = image.shape[:2]
+    boxes = []
+    for top, right, bottom, left in small_boxes:
+        boxes.append((
+            max(0, int(top / scale)),
+            min(width, int(round(right / scale))),
+            min(height, int(round(bottom / scale))),
+            max(0, int(left / scale)),
+        ))
+    return boxes
+
+
+def recognize_faces(image: np.ndarray, gallery: FaceGallery, max_side: int = DETECTION_MAX_SIDE,
+                    tolerance: float = DEFAULT_TOLERANCE) -> RecognitionResult:
+    """Detect, encode and identify every face in an RGB frame, with per-stage timings."""
+    total_start = time.perf_counter()
+    result = RecognitionResult()
+
+    boxes = detect_faces(image, max_side=max_side, timings=result.timings_ms)
+    if not boxes:
+        result.timings_ms["total"] = _ms_since(total_start)
+        return result
+
+    start = time.perf_counter()
+    encodings = face_recognition.face_encodings(image, known_face_locations=boxes)
+    result.timings_ms["encode"] = _ms_since(start)
+
+    start = time.perf_counter()
+    matches = gallery.best_matches(encodings, tolerance=tolerance) if len(gallery) else [None] * len(boxes)
+    result.timings_ms["match"] = _ms_since(start)
+
+    result.faces = [RecognizedFace(location=box, match=match) for box, match in zip(boxes, matches)]
+    result.timings_ms["total"] = _ms_since(total_start)
+    return result
@@ -0,0 +1,216 @@
+# src/face_tracker.py
+"""
+Continuous face recognition on a local video stream (webcam or file).
+
+Full detection runs only every Nth frame; in between, tracked boxes are
+moved with a constant-velocity estimate. Identities are cached per track, so
+a face is encoded once when it appears rather than on every frame.
+
+Run standalone with a preview window:
+    poetry run python src/face_tracker.py --source 0 --detect-every 5
+"""
+from collections import deque
+from dataclasses import dataclass, field
+import itertools
+import sys
+import time
+from pathlib import Path
+import numpy as np
+
+if __name__ == "__main__":
+    sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import face_recognition
+from src.face_gallery import FaceGallery, FaceMatch, DEFAULT_TOLERANCE
+from src.face_pipeline import detect_faces, DETECTION_MAX_SIDE
+
+try:
+    import cv2
+except ImportError:  # Only needed to read video; tracking itself is pure numpy
+    cv2 = None
+
+DETECT_EVERY = 5          # Run full detection on every Nth frame
+IOU_MATCH_THRESHOLD = 0.3  # Minimum overlap to treat a detection as the same track
+MAX_MISSED_DETECTIONS = 2  # Drop a track after this many detection rounds without a match
+REIDENTIFY_EVERY = 6       # Retry unknown tracks every N detection rounds
+
+
+@dataclass
+class Track:
+    track_id: int
+    box: np.ndarray  # float (top, right, bottom, left)
+    velocity: np.ndarray = field(default_factory=lambda: np.zeros(4))
+    match: FaceMatch | None = None
+    identified: bool = False
+    missed: int = 0
+    rounds_since_identify: int = 0
+
+    @property
+    def location(self) -> tuple[int, int, int, int]:
+        return tuple(int(round(v)) for v in self.box)
+
+    @property
+    def label(self) -> str:
+        if not self.identified:
+            return "..."
+        return self.match.profile.get("name", "?") if self.match else "Unknown"
+
+
+def box_iou(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Pairwise IoU between (A x 4) and (B x 4) arrays of (top, right, bottom, left) boxes."""
+    if not len(a) or not len(b):
+        return np.zeros((len(a), len(b)))
+    top = np.maximum(a[:, None, 0], b[None, :, 0])
+    right = np.minimum(a[:, None, 1], b[None, :, 1])
+    bottom = np.minimum(a[:, None, 2], b[None, :, 2])
+    left = np.maximum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(bottom - top, 0, None) * np.clip(right - left, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 1] - a[:, 3])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 1] - b[:, 3])
+    return inter / np.maximum(area_a[:, None] + area_b[None, :] - inter, 1e-6)
+
+
+class VideoRecognizer:
+    """Frame-by-frame recognizer with detection skipping and per-track identity caching."""
+
+    def __init__(self, gallery: FaceGallery, detect_every: int = DETECT_EVERY,
+                 max_side: int = DETECTION_MAX_SIDE, tolerance: float = DEFAULT_TOLERANCE):
+        self.gallery = gallery
+        self.detect_every = max(1, detect_every)
+        self.max_side = max_side
+        self.tolerance = tolerance
+        self.tracks: list[Track] = []
+        self.frame_index = 0
+        self._ids = itertools.count(1)
+        self._frame_times = deque(maxlen=30)
+        self.last_timings = {}
+
+    @property
+    def fps(self) -> float:
+        if len(self._frame_times) < 2:
+            return 0.0
+        return (len(self._frame_times) - 1) / max(self._frame_times[-1] - self._frame_times[0], 1e-6)
+
+    def process(self, frame: np.ndarray) -> list[Track]:
+        """Update tracks for one RGB frame and return the current tracks."""
+        if self.frame_index % self.detect_every == 0:
+            self._detect_and_associate(frame)
+        else:
+            for track in self.tracks:
+                track.box = track.box + track.velocity
+        self.frame_index += 1
+        self._frame_times.append(time.perf_counter())
+        return self.tracks
+
+    def _detect_and_associate(self, frame: np.ndarray):
+        timings = {}
+        boxes = np.array(detect_faces(frame, max_side=self.max_side, timings=timings), dtype=float).reshape(-1, 4)
+        iou = box_iou(np.array([t.box for t in self.tracks]).reshape(-1, 4), boxes)
+
+        # Greedy association, highest overlap first
+        matched_tracks, matched_boxes = set(), set()
+        for ti, bi in zip(*np.unravel_index(np.argsort(-iou, axis=None), iou.shape)):
+            if iou[ti, bi] < IOU_MATCH_THRESHOLD:
+                break
+            if ti in matched_tracks or bi in matched_boxes:
+                continue
+            track = self.tracks[ti]
+            track.velocity = (boxes[bi] - track.box) / self.detect_every
+            track.box = boxes[bi]
+            track.missed = 0
+            track.rounds_since_identify += 1
+            matched_tracks.add(ti)
+            matched_boxes.add(bi)
+
+        survivors = []
+        for ti, track in enumerate(self.tracks):
+            if ti not in matched_tracks:
+                track.missed += 1
+                track.velocity = np.zeros(4)
+            if track.missed <= MAX_MISSED_DETECTIONS:
+                survivors.append(track)
+        for bi, box in enumerate(boxes):
+            if bi not in matched_boxes:
+                survivors.append(Track(track_id=next(self._ids), box=box))
+        self.tracks = survivors
+
+        # Encode only faces without a cached identity (or stale unknowns)
+        pending = [t for t in self.tracks if t.missed == 0 and (
+            not t.identified or (t.match is None and t.rounds_since_identify >= REIDENTIFY_EVERY))]
+        if pending:
+            start = time.perf_counter()
+            encodings = face_recognition.face_encodings(frame, known_face_locations=[t.location for t in pending])
+            matches = self.gallery.best_matches(encodings, tolerance=self.tolerance) if len(self.gallery) else [None] * len(pending)
+            for track, match in zip(pending, matches):
+                track.match = match
+                track.identified = True
+                track.rounds_since_identify = 0
+            timings["encode+match"] = (time.perf_counter() - start) * 1000
+        self.last_timings = timings
+
+
+# ========================================
+# VIDEO I/O (requires opencv-python)
+# ========================================
+
+def _require_cv2():
+    if cv2 is None:
+        raise ImportError("opencv-python is required for video recognition: poetry add opencv-python")
+
+
+def open_video_source(source: int | str):
+    """Open a webcam index (e.g. 0) or a video file path."""
+    _require_cv2()
+    capture = cv2.VideoCapture(int(source) if str(source).isdigit() else str(source))
+    if not capture.isOpened():
+        raise IOError(f"Could not open video source: {source}")
+    return capture
+
+
+def annotate_frame(frame: np.ndarray, tracks: list[Track], fps: float | None = None) -> np.ndarray:
+    """Draw track boxes and names onto a copy of an RGB frame."""
+    _require_cv2()
+    out = frame.copy()
+    for track in tracks:
+        top, right, bottom, left = track.location
+        color = (16, 185, 129) if track.match else (239, 68, 68)
+        cv2.rectangle(out, (left, top), (right, bottom), color, 2)
+        cv2.putText(out, track.label, (left, max(0, top - 8)), cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2)
+    if fps is not None:
+        cv2.putText(out, f"{fps:.1f} FPS", (10, 25), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+    return out
+
+
+def run_video_recognition(source: int | str, gallery: FaceGallery, detect_every: int = DETECT_EVERY,
+                          max_side: int = DETECTION_MAX_SIDE):
+    """Yield (rgb_frame, tracks, recognizer) for every frame of a video source until it ends."""
+    capture = open_video_source(source)
+    recognizer = VideoRecognizer(gallery, detect_every=detect_every, max_side=max_side)
+    try:
+        while True:
+            ok, bgr = capture.read()
+            if not ok:
+                break
+            frame = cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB)
+            yield frame, recognizer.process(frame), recognizer
+    finally:
+        capture.release()
+
+
+if __name__ == "__main__":
+    import argparse
+    from src.database import get_all_people
+
+    parser = argparse.ArgumentParser(description="Continuous face recognition preview.")
+    parser.add_argument("--source", default="0", help="Webcam index or video file path")
+    parser.add_argument("--detect-every", type=int, default=DETECT_EVERY)
+    args = parser.parse_args()
+
+    known = FaceGallery.from_people(get_all_people())
+    print(f"👀 Loaded {len(known)} known faces. Press q to quit.")
+    for frame, tracks, recognizer in run_video_recognition(args.source, known, detect_every=args.detect_every):
+        preview = annotate_frame(frame, tracks, fps=recognizer.fps)
+        cv2.imshow("RememberMe - Who Is This", cv2.cvtColor(preview, cv2.COLOR_RGB2BGR))
+        if cv2.waitKey(1) & 0xFF == ord("q"):
+            break
+    cv2.destroyAllWindows()
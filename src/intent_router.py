@@ -0,0 +1,206 @@
+# src/intent_router.py
+"""
+Local fast path for common patient questions.
+
+Bare date/time questions, medication-schedule and "who is <name>" questions
+are answered from the database with templates in a few milliseconds. Anything
+else (including "what time is Sarah coming?", "what is this pill for?" or
+"who is Sarah's husband?") returns None so the caller falls back to the LLM.
+"Did I take my pills?" is answered from the reminder log, saying plainly that
+whether the dose was taken is unknown. Hit rate and latency per route are
+tracked for the Admin page and logs.
+"""
+from collections import defaultdict, deque
+from datetime import datetime
+import re
+import threading
+import time
+from src.database import get_all_people, get_all_medications
+
+INTENT_DATE_TIME = "date_time"
+INTENT_MEDICATION = "medication"
+INTENT_PERSON = "person"
+INTENT_LLM = "llm_fallback"
+
+# Bare clock/date questions only, matched against the whole (normalized) question
+_POLITE_PREFIX = r"(?:(?:hey|oh|so|sorry|please)\s+)*(?:(?:can|could) you (?:tell|remind) me |do you know |tell me |remind me )?"
+_POLITE_SUFFIX = r"(?:\s+(?:right now|now|today|please|again))*"
+_TIME_PATTERN = re.compile(
+    rf"^{_POLITE_PREFIX}(?:what time is it|what'?s the time|what is the time|the time){_POLITE_SUFFIX}$"
+)
+_DATE_PATTERN = re.compile(
+    rf"^{_POLITE_PREFIX}(?:what (?:day|date|month|year) is (?:it|today|this)|what'?s (?:the )?(?:date|day)"
+    rf"|what is (?:the )?(?:date|day)|(?:what'?s |what is )?today'?s date|the date){_POLITE_SUFFIX}$"
+)
+_MEDICATION_PATTERN = re.compile(r"\b(pill|pills|medicine|medicines|medication|medications|meds|tablet|tablets|dose)\b",
+                                 re.IGNORECASE)
+# Only schedule questions: "when do I take…", "what time are my pills", "next medicine", "did I take…"
+_SCHEDULE_PATTERN = re.compile(r"\bwhen\b|\bwhat time\b|\bnext\b|\bschedule", re.IGNORECASE)
+_TAKEN_PATTERN = re.compile(r"\bdid i (?:take|have)\b|\bhave i (?:taken|had)\b", re.IGNORECASE)
+_POSSESSIVE_PATTERN = re.compile(r"'s\b|s'(?:\s|$)")
+_PERSON_PATTERN = re.compile(r"\b(who is|who's|whos|tell me about|remind me who)\s+(?P<name>[a-z][a-z .'-]*)", re.IGNORECASE)
+
+_lock = threading.Lock()
+_counts = defaultdict(int)
+_latencies_ms = defaultdict(lambda: deque(maxlen=500))
+
+
+def _record(intent: str, started: float):
+    with _lock:
+        _counts[intent] += 1
+        _latencies_ms[intent].append((time.perf_counter() - started) * 1000)
+
+
+def record_llm_fallback(started: float):
+    """Record the latency of a question the router could not answer (time.perf_counter() start)."""
+    _record(INTENT_LLM, started)
+
+
+def get_router_stats() -> dict:
+    """Per-route counts and latency percentiles, plus the overall local hit rate."""
+    with _lock:
+        total = sum(_counts.values())
+        local = total - _counts[INTENT_LLM]
+        routes = {}
+        for intent, samples in _latencies_ms.items():
+            ordered = sorted(samples)
+            routes[intent] = {
+                "count": _counts[intent],
+                "p50_ms": ordered[len(ordered) // 2] if ordered else 0.0,
+                "p95_ms": ordered[int(len(ordered) * 0.95) - 1] if len(ordered) >= 20 else (ordered[-1] if ordered else 0.0),
+            }
+        return {"total": total, "local_hit_rate": local / total if total else 0.0, "routes": routes}
+
+
+# ========================================
+# INTENT HANDLERS
+# ========================================
+
+def _is_scheduled_today(med: dict, now: datetime) -> bool:
+    stype = med.get('schedule_type')
+    if stype == 'Daily':
+        return True
+    if stype == 'Weekly':
+        return now.strftime('%A') in (med.get('days_of_week') or [])
+    if stype == 'One-Time':
+        sdate = med.get('specific_date')
+        return isinstance(sdate, datetime) and sdate.date() == now.date()
+    return False
+
+
+def _med_time(med: dict):
+    try:
+        return datetime.strptime(med.get('time_to_take', '12:00 AM'), '%I:%M %p').time()
+    except ValueError:
+        return datetime.min.time()
+
+
+def _normalize(question: str) -> str:
+    return " ".join(re.findall(r"[a-z0-9']+", question.lower().replace("\u2019", "'")))
+
+
+def _answer_date_time(question: str, now: datetime) -> str | None:
+    normalized = _normalize(question)
+    if _TIME_PATTERN.match(normalized):
+        return f"It's {now.strftime('%I:%M %p').lstrip('0')} on {now.strftime('%A')}."
+    if _DATE_PATTERN.match(normalized):
+        return f"Today is {now.strftime('%A, %B %d, %Y').replace(' 0', ' ')}."
+    return None
+
+
+def _last_reminded(med: dict) -> datetime | None:
+    last = med.get('last_reminded')
+    if isinstance(last, str):
+        try:
+            last = datetime.fromisoformat(last)
+        except ValueError:
+            return None
+    return last if isinstance(last, datetime) else None
+
+
+def _answer_taken(named: list[dict], medications: list[dict], now: datetime) -> str:
+    """What the reminder log says about today's doses; it cannot confirm a dose was taken."""
+    due = named or [m for m in medications if _is_scheduled_today(m, now) and _med_time(m) <= now.time()]
+    if not due:
+        return "None of your medicines were due yet today."
+    parts = []
+    for med in sorted(due, key=_med_time):
+        last = _last_reminded(med)
+        if last and last.date() == now.date():
+            parts.append(f"I reminded you to take {med['name']} at {last.strftime('%I:%M %p').lstrip('0')}.")
+        else:
+            parts.append(f"I haven't reminded you about {med['name']} yet today; it's due at {med.get('time_to_take')}.")
+    return " ".join(parts) + " I can't tell whether you took it, so please check your pill box or ask your caregiver."
+
+
+def _answer_medication(question: str, now: datetime) -> str | None:
+    asks_taken = bool(_TAKEN_PATTERN.search(question))
+    if not asks_taken and not _SCHEDULE_PATTERN.search(question):
+        return None
+    medications = get_all_medications()
+    lowered = question.lower()
+
+    # "When do I take Ibuprofen?"
+    named = [m for m in medications
+             if m.get('name') and re.search(rf"\b{re.escape(m['name'].lower())}\b", lowered)]
+    if asks_taken:
+        return _answer_taken(named, medications, now) if named or _MEDICATION_PATTERN.search(question) else None
+    if named:
+        med = named[0]
+        return (f"You take {med['name']} ({med.get('dosage', '')}) at {med.get('time_to_take', 'the usual time')}. "
+                f"It's for {med.get('purpose', 'your health')}.")
+
+    if not _MEDICATION_PATTERN.search(question):
+        return None
+
+    todays = sorted((m for m in medications if _is_scheduled_today(m, now)), key=_med_time)
+    if not todays:
+        return "You don't have any medicine scheduled today."
+    upcoming = [m for m in todays if _med_time(m) >= now.time()]
+    if upcoming:
+        nxt = upcoming[0]
+        return f"Your next medicine is {nxt['name']} at {nxt.get('time_to_take')}. It's for {nxt.get('purpose', 'your health')}."
+    schedule = ", ".join(f"{m['name']} at {m.get('time_to_take')}" for m in todays)
+    return f"You're all done for today. Today's medicines were {schedule}."
+
+
+def _answer_person(question: str) -> str | None:
+    match = _PERSON_PATTERN.search(question)
+    if not match:
+        return None
+    asked = match.group("name").strip(" .?'").lower()
+    if _POSSESSIVE_PATTERN.search(asked):
+        return None  # "Who is Sarah's husband?" asks about someone else
+    asked_tokens = re.sub(r"\s+(?:to me|again)$", "", asked).split()
+    if not asked_tokens:
+        return None
+    for person in get_all_people():
+        tokens = (person.get('name') or '').lower().split()
+        # Whole-token match on the full name or the first name; "Sam" is not "Samantha"
+        if tokens and (asked_tokens == tokens or asked_tokens == tokens[:1]):
+            notes = (person.get('notes') or '').strip()
+            answer = f"{person['name']} is your {person.get('relationship', 'friend').lower()}."
+            return f"{answer} {notes}" if notes else answer
+    return None
+
+
+def route_question(question: str) -> str | None:
+    """Answer a patient question locally, or return None to fall back to the LLM."""
+    started = time.perf_counter()
+    now = datetime.now()
+    # Medication first: "What time should I take aspirin?" is about the dose, not the clock
+    for intent, handler in (
+        (INTENT_MEDICATION, lambda: _answer_medication(question, now)),
+        (INTENT_DATE_TIME, lambda: _answer_date_time(question, now)),
+        (INTENT_PERSON, lambda: _answer_person(question)),
+    ):
+        try:
+            answer = handler()
+        except Exception as e:
+            print(f"⚠️ Intent '{intent}' failed: {e}")
+            continue
+        if answer:
+            _record(intent, started)
+            print(f"⚡ Answered locally ({intent})")
+            return answer
+    return None
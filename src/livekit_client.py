@@ -1,7 +1,11 @@
 # src/livekit_client.py
 import asyncio
 import os
+import re
+import socket
 import sys
+import time
+import uuid
 import wave
 from datetime import datetime
 from pathlib import Path
@@ -16,12 +20,26 @@ if __name__ == "__main__":
 from src.transcriber import transcribe_audio
 from src.summarizer import summarize_transcript_simple, summarize_transcript_clinical, summarize_transcript_caregiver
 from src.schemas import ConversationSegment, ConversationSummary
-from src.database import save_conversation, get_settings
+from src.database import save_conversation
 from src.patient_assistant import answer_patient_question, detect_emergency
+from src.alerts import dispatch_alert
+from src.telemetry import get_logger, fields, span, observe, increment, sampled, start_metrics_server
 
 load_dotenv()
 
 LIVEKIT_URL = os.getenv("LIVEKIT_URL")
+TOKEN_SERVER_URL = os.getenv("TOKEN_SERVER_URL", "http://localhost:5000")
+
+# Room allocation: each agent process serves up to AGENT_ROOM_CAPACITY patient rooms
+AGENT_ID = os.getenv("AGENT_ID") or f"rememberme-agent-{socket.gethostname()}-{os.getpid()}"
+AGENT_ROOM_CAPACITY = int(os.getenv("AGENT_ROOM_CAPACITY", "10"))
+AGENT_API_KEY = os.getenv("AGENT_API_KEY", "")  # Shared secret for the token server's /rooms endpoints
+
+log = get_logger(__name__)
+
+# Emergency checks on partial transcripts while a conversation is still being recorded
+PARTIAL_CHECK_SECONDS = 3    # Transcribe again after this much new audio
+PARTIAL_WINDOW_SECONDS = 6   # Length of the trailing audio window sent to Whisper
 
 
 class AudioReceiverAgent:
@@ -32,7 +50,8 @@ class AudioReceiverAgent:
     - Emergency detection
     """
 
-    def __init__(self):
+    def __init__(self, patient_id: str = "default_patient"):
+        self.patient_id = patient_id  # Every conversation and alert from this room belongs to this patient
         self.room = rtc.Room()
         self.audio_stream = None
         self.is_listening = False
@@ -57,9 +76,16 @@ class AudioReceiverAgent:
         self.assistant_mode = False
         self.last_emergency_check = datetime.now()
 
+        # Emergency detection on partial transcripts
+        self.speech_started_at = None     # time.monotonic() when the current conversation started
+        self.buffered_bytes = 0
+        self.partial_checked_bytes = 0
+        self.partial_task = None
+        self.emergency_reported = False
+
         Path("recordings").mkdir(exist_ok=True)
 
-        print("🎤 AudioReceiverAgent initialized with patient tracking")
+        log.info("🎤 AudioReceiverAgent initialized with patient tracking", extra=fields(patient_id=patient_id))
 
     def is_speech(self, audio_frame):
         """Detect speech in audio frame"""
@@ -79,14 +105,17 @@ class AudioReceiverAgent:
             return rms > self.ENERGY_THRESHOLD
 
         except Exception as e:
+            increment("vad_errors_total")
             if not hasattr(self, '_error_logged'):
-                print(f"⚠️ Error in is_speech: {e}")
+                log.warning(f"⚠️ Error in is_speech: {e}")
                 self._error_logged = True
             return False
 
     def add_frame(self, audio_frame):
         """Add frame and detect conversation boundaries"""
+        started = time.perf_counter()
         has_speech = self.is_speech(audio_frame)
+        observe("stage_seconds", time.perf_counter() - started, stage="vad")
 
         if has_speech:
             self.speech_frames += 1
@@ -94,116 +123,180 @@ class AudioReceiverAgent:
 
             if not self.is_recording and self.speech_frames >= self.MIN_SPEECH_FRAMES:
                 self.is_recording = True
+                self.speech_started_at = time.monotonic()
                 speaker_name = self.current_speaker
-                print(f"🎙️ Conversation started - Recording ({speaker_name} speaking)...")
+                increment("conversations_started_total")
+                log.info("🎙️ Conversation started - Recording...", extra=fields(speaker=speaker_name))
 
             if self.is_recording:
                 if hasattr(audio_frame, 'data'):
                     self.audio_buffer.append(audio_frame.data)
+                    self.buffered_bytes += len(audio_frame.data)
 
         else:
             if self.is_recording:
                 self.silence_frames += 1
                 if hasattr(audio_frame, 'data'):
                     self.audio_buffer.append(audio_frame.data)
+                    self.buffered_bytes += len(audio_frame.data)
 
                 if self.silence_frames >= self.SILENCE_THRESHOLD:
-                    print(f"🛑 Silence detected - Ending conversation")
+                    log.info("🛑 Silence detected - Ending conversation",
+                             extra=fields(frames=len(self.audio_buffer), seconds=round(self.buffered_bytes / (self.SAMPLE_RATE * 2), 1)))
                     return True
 
             self.speech_frames = 0
 
         return False
 
+    def report_emergency(self, emergency_type: str, transcript: str, source: str):
+        """Alert caregivers once per conversation, with latency measured from speech start."""
+        if self.emergency_reported:
+            return
+        self.emergency_reported = True
+        latency = time.monotonic() - self.speech_started_at if self.speech_started_at else 0.0
+        increment("emergencies_detected_total", source=source)
+        observe("emergency_detection_seconds", latency, source=source)
+        log.critical(f"🚨🚨🚨 EMERGENCY DETECTED: {emergency_type} 🚨🚨🚨",
+                     extra=fields(source=source, latency_s=round(latency, 1), heard=transcript[-200:]))
+        dispatch_alert(emergency_type, transcript=transcript, source=source,
+                       speaker=self.current_speaker, speech_to_detection_s=round(latency, 2),
+                       patient_id=self.patient_id)
+
+    def maybe_check_partial(self):
+        """Start a background emergency check once enough new audio has been buffered."""
+        if not self.is_recording or self.emergency_reported:
+            return
+        if self.partial_task and not self.partial_task.done():
+            return  # Previous partial transcription still running
+        bytes_per_second = self.SAMPLE_RATE * 2
+        if self.buffered_bytes - self.partial_checked_bytes < PARTIAL_CHECK_SECONDS * bytes_per_second:
+            return
+
+        # Trailing window of audio, so each request stays small regardless of conversation length
+        window, size = [], 0
+        for chunk in reversed(self.audio_buffer):
+            window.append(chunk)
+            size += len(chunk)
+            if size >= PARTIAL_WINDOW_SECONDS * bytes_per_second:
+                break
+        self.partial_checked_bytes = self.buffered_bytes
+        self.partial_task = asyncio.ensure_future(self.check_partial_transcript(b''.join(reversed(window))))
+
+    async def check_partial_transcript(self, audio: bytes):
+        """Transcribe a rolling audio chunk off the event loop and scan it for emergencies."""
+        filename = f"recordings/partial_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.wav"
+        try:
+            with wave.open(filename, 'wb') as wf:
+                wf.setnchannels(1)
+                wf.setsampwidth(2)
+                wf.setframerate(self.SAMPLE_RATE)
+                wf.writeframes(audio)
+            with span("partial_transcription"):
+                transcript = await asyncio.to_thread(transcribe_audio, filename)
+            if not transcript or transcript.startswith("Error"):
+                return
+            is_emergency, emergency_type = detect_emergency(transcript)
+            if is_emergency and self.is_recording:
+                self.report_emergency(emergency_type, transcript, source="partial")
+        except Exception as e:
+            log.warning(f"⚠️ Partial emergency check failed: {e}")
+        finally:
+            Path(filename).unlink(missing_ok=True)
+
     async def save_conversation(self):
         """Save, transcribe, and analyze conversation"""
         if not self.audio_buffer or len(self.audio_buffer) < 10:
-            print("⚠️ Buffer too short, skipping save")
+            log.info("⚠️ Buffer too short, skipping save", extra=fields(frames=len(self.audio_buffer)))
             self.reset()
             return False
 
         try:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            speaker_label = self.current_speaker
-            audio_filename = f"recordings/conversation_{speaker_label}_{timestamp}.wav"
+            with span("conversation", patient_id=self.patient_id, speaker=self.current_speaker,
+                      frames=len(self.audio_buffer)):
+                saved = await self._process_conversation()
+            increment("conversations_saved_total" if saved else "conversations_failed_total")
+            return saved
 
-            print(f"💾 Saving conversation from {speaker_label} ({len(self.audio_buffer)} frames)")
+        except Exception as e:
+            increment("conversations_failed_total")
+            log.exception(f"❌ Error saving conversation: {e}")
+            return False
+        finally:
+            self.reset()
 
-            # Save audio
+    async def _process_conversation(self) -> bool:
+        """WAV write → transcription → emergency check → summaries → database, one span per stage."""
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        speaker_label = self.current_speaker
+        # Unique per patient and recording: agents for several households share this directory
+        patient_label = re.sub(r"[^A-Za-z0-9_-]", "_", self.patient_id)
+        audio_filename = f"recordings/conversation_{patient_label}_{speaker_label}_{timestamp}_{uuid.uuid4().hex[:8]}.wav"
+
+        log.info("💾 Saving conversation", extra=fields(speaker=speaker_label, frames=len(self.audio_buffer)))
+
+        # Save audio
+        with span("wav_write"):
             with wave.open(audio_filename, 'wb') as wf:
                 wf.setnchannels(1)
                 wf.setsampwidth(2)
                 wf.setframerate(self.SAMPLE_RATE)
                 wf.writeframes(b''.join(self.audio_buffer))
 
-            print(f"✅ Audio saved: {audio_filename}")
+        log.info("✅ Audio saved", extra=fields(path=audio_filename))
 
-            # Transcribe
-            print("🤖 Transcribing conversation...")
-            transcript = transcribe_audio(audio_filename)
+        # Transcribe
+        with span("transcription"):
+            transcript = await asyncio.to_thread(transcribe_audio, audio_filename)
 
-            if not transcript or transcript.startswith("Error"):
-                print(f"❌ Transcription failed: {transcript}")
-                self.reset()
-                return False
+        if not transcript or transcript.startswith("Error"):
+            log.error(f"❌ Transcription failed: {transcript}")
+            return False
 
-            print(f"📝 Transcript: {transcript[:100]}...")
-
-            # Check for emergency if in assistant mode
-            settings = get_settings()
-            if settings.get('assistant_mode_enabled', False):
-                is_emergency, emergency_type = detect_emergency(transcript)
-                if is_emergency:
-                    print(f"🚨🚨🚨 EMERGENCY DETECTED: {emergency_type} 🚨🚨🚨")
-                    # You could send notification here (email, SMS, etc.)
-                    # For now, just log it prominently
-
-            # Generate summaries
-            print("✨ Generating summaries...")
-            simple_summary = summarize_transcript_simple(transcript)
-            caregiver_summary = summarize_transcript_caregiver(transcript)  # NEW
-            clinical_data = summarize_transcript_clinical(transcript)
-
-            if "error" in clinical_data:
-                print(f"❌ Summarization failed")
-                self.reset()
-                return False
+        log.debug(f"📝 Transcript: {transcript[:100]}...")
 
-            print(f"✅ Summaries generated")
-            print(f"   Patient summary: {simple_summary[:50]}...")
-            print(f"   Caregiver summary: {caregiver_summary[:50]}...")
+        # Always check the full transcript before summarizing (partial checks may have missed it)
+        is_emergency, emergency_type = detect_emergency(transcript)
+        if is_emergency:
+            self.report_emergency(emergency_type, transcript, source="full")
 
-            # Save to database
-            print("💾 Saving to database...")
+        # Summaries and the database write block on the network; keep them off the event loop
+        # shared by every patient room in this process
+        return await asyncio.to_thread(self._summarize_and_save, transcript, speaker_label)
 
-            segment = ConversationSegment(
-                start_time=datetime.now(),
-                end_time=datetime.now(),
-                transcript=transcript,
-                speaker_identity=speaker_label
-            )
+    def _summarize_and_save(self, transcript: str, speaker_label: str) -> bool:
+        # Generate summaries (each summarizer records its own span)
+        simple_summary = summarize_transcript_simple(transcript)
+        caregiver_summary = summarize_transcript_caregiver(transcript)  # NEW
+        clinical_data = summarize_transcript_clinical(transcript)
 
-            summary = ConversationSummary(
-                segment_id=str(segment.id),
-                simple_summary=simple_summary,
-                caregiver_summary=caregiver_summary,  # NEW
-                **clinical_data
-            )
+        if "error" in clinical_data:
+            log.error("❌ Summarization failed")
+            return False
 
-            save_conversation(segment, summary)
+        log.debug("✅ Summaries generated", extra=fields(patient=simple_summary[:50], caregiver=caregiver_summary[:50]))
 
-            print("🎉 Conversation saved to database!")
-            print("=" * 50)
+        # Save to database
+        segment = ConversationSegment(
+            patient_id=self.patient_id,
+            start_time=datetime.now(),
+            end_time=datetime.now(),
+            transcript=transcript,
+            speaker_identity=speaker_label
+        )
 
-            self.reset()
-            return True
+        summary = ConversationSummary(
+            patient_id=self.patient_id,
+            segment_id=str(segment.id),
+            simple_summary=simple_summary,
+            caregiver_summary=caregiver_summary,  # NEW
+            **clinical_data
+        )
 
-        except Exception as e:
-            print(f"❌ Error saving conversation: {e}")
-            import traceback
-            traceback.print_exc()
-            self.reset()
-            return False
+        save_conversation(segment, summary)
+
+        log.info("🎉 Conversation saved to database!", extra=fields(transcript_chars=len(transcript)))
+        return True
 
     def reset(self):
         """Reset recorder state"""
@@ -211,14 +304,19 @@ class AudioReceiverAgent:
         self.is_recording = False
         self.silence_frames = 0
         self.speech_frames = 0
-        print("🔄 Recorder reset, ready for next conversation")
+        self.speech_started_at = None
+        self.buffered_bytes = 0
+        self.partial_checked_bytes = 0
+        self.partial_task = None
+        self.emergency_reported = False
+        log.debug("🔄 Recorder reset, ready for next conversation")
 
     async def start(self, identity: str, token: str):
         """Connect to LiveKit room"""
         try:
-            print(f"Connecting to {LIVEKIT_URL} as {identity}...")
+            log.info("Connecting to LiveKit...", extra=fields(url=LIVEKIT_URL, identity=identity))
             await self.room.connect(LIVEKIT_URL, token)
-            print(f"✅ Successfully connected to room: {self.room.name}")
+            log.info("✅ Successfully connected to room", extra=fields(room=self.room.name))
 
             @self.room.on("track_subscribed")
             def on_track_subscribed(track: rtc.Track, publication: rtc.TrackPublication,
@@ -235,7 +333,7 @@ class AudioReceiverAgent:
                 else:
                     self.current_speaker = participant_name
 
-                print(f"🎵 Track from: {participant_name} (identified as: {self.current_speaker})")
+                log.info("🎵 Track subscribed", extra=fields(participant=participant_name, speaker=self.current_speaker))
 
                 if track.kind == rtc.TrackKind.KIND_AUDIO:
                     asyncio.ensure_future(self.process_audio_track(track, participant))
@@ -245,15 +343,13 @@ class AudioReceiverAgent:
                 participant_name = participant.identity
                 self.participant_identities[participant.sid] = participant_name
 
-                print(f"  - Existing participant: {participant_name}")
+                log.info("Existing participant", extra=fields(participant=participant_name))
                 for track_pub in participant.track_publications.values():
                     if track_pub.track and track_pub.kind == rtc.TrackKind.KIND_AUDIO:
                         asyncio.ensure_future(self.process_audio_track(track_pub.track, participant))
 
         except Exception as e:
-            print(f"❌ Error connecting to LiveKit: {e}")
-            import traceback
-            traceback.print_exc()
+            log.exception(f"❌ Error connecting to LiveKit: {e}")
 
     async def process_audio_track(self, track: rtc.Track, participant: rtc.RemoteParticipant):
         """Process incoming audio stream"""
@@ -268,7 +364,7 @@ class AudioReceiverAgent:
             else:
                 self.current_speaker = participant_name
 
-            print(f"📡 Processing audio from: {participant_name} (speaker: {self.current_speaker})")
+            log.info("📡 Processing audio", extra=fields(participant=participant_name, speaker=self.current_speaker))
 
             audio_stream = rtc.AudioStream(track)
             self.is_listening = True
@@ -278,47 +374,107 @@ class AudioReceiverAgent:
             async for event in audio_stream:
                 frame_count += 1
 
-                if frame_count % 100 == 0:
+                if sampled(frame_count):  # One status line every FRAME_LOG_EVERY frames
                     status = "🎙️ RECORDING" if self.is_recording else "👂 Listening"
-                    print(
-                        f"{status} ({self.current_speaker}) - Frames: {frame_count}, Buffer: {len(self.audio_buffer)}")
+                    log.info(status, extra=fields(speaker=self.current_speaker, frames=frame_count,
+                                                  buffer=len(self.audio_buffer)))
 
                 audio_frame = event.frame
                 should_save = self.add_frame(audio_frame)
 
                 if should_save:
+                    if self.partial_task and not self.partial_task.done():
+                        self.partial_task.cancel()
                     await self.save_conversation()
+                else:
+                    self.maybe_check_partial()
 
         except Exception as e:
-            print(f"❌ Error processing audio track: {e}")
-            import traceback
-            traceback.print_exc()
+            log.exception(f"❌ Error processing audio track: {e}")
 
     async def stop(self):
         """Disconnect from room"""
         if self.room.connection_state != rtc.ConnectionState.CONN_DISCONNECTED:
-            print("Disconnecting from room...")
+            log.info("Disconnecting from room...")
             await self.room.disconnect()
             self.is_listening = False
-            print("✅ Disconnected")
+            log.info("✅ Disconnected")
 
 
-def get_token(identity: str) -> str:
-    """Get access token from token server"""
-    try:
-        print(f"🎫 Requesting token for: {identity}")
-        res = requests.get(f"http://localhost:5000/get_token?identity={identity}", timeout=5)
+class RoomSupervisor:
+    """
+    Runs one AudioReceiverAgent per patient room assigned by the token server.
+
+    Every lease/3 seconds it calls /rooms/allocate, which renews this agent's
+    leases and hands it any unserved rooms up to its capacity. Agents for rooms
+    it no longer holds are stopped, so two processes never record one household.
+    If the token server is unreachable, agents keep running only until their
+    lease would have expired, since the server may hand the room to another agent.
+    """
+
+    def __init__(self, agent_id: str = AGENT_ID, capacity: int = AGENT_ROOM_CAPACITY):
+        self.agent_id = agent_id
+        self.capacity = capacity
+        self.agents = {}  # patient_id -> AudioReceiverAgent
+        self.lease_deadlines = {}  # patient_id -> time.monotonic() by which the lease must be renewed
+        self.poll_seconds = 10.0
+
+    def _post(self, path: str, payload: dict) -> dict:
+        res = requests.post(f"{TOKEN_SERVER_URL}{path}", json={"agent_id": self.agent_id, **payload},
+                            headers={"X-Agent-Key": AGENT_API_KEY}, timeout=5)
         res.raise_for_status()
-        token_data = res.json()
-        print(f"✅ Token received")
-        return token_data["token"]
-    except requests.RequestException as e:
-        print(f"❌ Error getting token: {e}")
-        print("=" * 50)
-        print("Make sure token server is running:")
-        print("  poetry run python src/token_server.py")
-        print("=" * 50)
-        return None
+        return res.json()
+
+    async def _stop_agent(self, patient_id: str):
+        self.lease_deadlines.pop(patient_id, None)
+        await self.agents.pop(patient_id).stop()
+
+    async def sync_rooms(self):
+        requested = time.monotonic()
+        try:
+            allocation = await asyncio.to_thread(self._post, "/rooms/allocate", {"capacity": self.capacity})
+        except requests.RequestException as e:
+            log.warning(f"⚠️ Room allocation failed: {e}")
+            now = time.monotonic()
+            for patient_id in [p for p in self.agents if self.lease_deadlines.get(p, 0.0) <= now]:
+                log.warning("⚠️ Room lease expired without renewal, stopping agent", extra=fields(patient_id=patient_id))
+                await self._stop_agent(patient_id)
+            return
+        lease_seconds = allocation.get("lease_seconds", 30)
+        self.poll_seconds = max(1.0, lease_seconds / 3)
+        assigned = {room["patient_id"]: room for room in allocation.get("rooms", [])}
+        # Measured from before the request, so the local deadline never outlives the server's lease
+        for patient_id in assigned:
+            self.lease_deadlines[patient_id] = requested + lease_seconds
+
+        for patient_id in set(self.agents) - set(assigned):
+            log.info("Room no longer assigned, stopping agent", extra=fields(patient_id=patient_id))
+            await self._stop_agent(patient_id)
+
+        for patient_id, room in assigned.items():
+            if patient_id not in self.agents:
+                log.info("🏠 Joining patient room", extra=fields(patient_id=patient_id, room=room["room"]))
+                agent = AudioReceiverAgent(patient_id=patient_id)
+                self.agents[patient_id] = agent
+                await agent.start(identity=self.agent_id, token=room["token"])
+                if agent.room.connection_state == rtc.ConnectionState.CONN_DISCONNECTED:
+                    self.agents.pop(patient_id)  # start() already logged why; retried on the next sync
+                    self.lease_deadlines.pop(patient_id, None)
+
+    async def run(self):
+        while True:
+            await self.sync_rooms()
+            await asyncio.sleep(self.poll_seconds)
+
+    async def shutdown(self):
+        for agent in self.agents.values():
+            await agent.stop()
+        self.agents.clear()
+        self.lease_deadlines.clear()
+        try:
+            await asyncio.to_thread(self._post, "/rooms/release", {})  # Let another agent take over right away
+        except requests.RequestException:
+            pass
 
 
 async def main():
@@ -326,15 +482,10 @@ async def main():
     print("🎙️ RememberMe LiveKit Agent (Patient Tracking)")
     print("=" * 50)
 
-    token = get_token(identity="rememberme-agent")
-    if not token:
-        print("❌ Failed to get token")
-        return
-
-    agent = AudioReceiverAgent()
+    start_metrics_server()
+    supervisor = RoomSupervisor()
     try:
-        await agent.start(identity="rememberme-agent", token=token)
-
+        print(f"Agent {supervisor.agent_id} serving up to {supervisor.capacity} patient room(s)")
         print("\n" + "=" * 50)
         print("✅ Agent running with patient identity tracking")
         print("=" * 50)
@@ -344,17 +495,14 @@ async def main():
         print("\nPress Ctrl+C to stop")
         print("=" * 50 + "\n")
 
-        while True:
-            await asyncio.sleep(1)
+        await supervisor.run()
 
-    except KeyboardInterrupt:
+    except (KeyboardInterrupt, asyncio.CancelledError):
         print("\n👋 Stopping agent...")
     except Exception as e:
-        print(f"❌ Error: {e}")
-        import traceback
-        traceback.print_exc()
+        log.exception(f"❌ Error: {e}")
     finally:
-        await agent.stop()
+        await supervisor.shutdown()
         print("Agent stopped")
 
 
@@ -362,4 +510,4 @@ if __name__ == "__main__":
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
-        print("\n👋 Goodbye!")
\ No newline at end of file
+        print("\n👋 Goodbye!")
@@ -0,0 +1,248 @@
+# src/llm_gateway.py
+"""
+Single entry point for chat, embedding, transcription and speech calls to OpenAI.
+
+Every call names its task (see src/model_router.py) and gets:
+- a per-task timeout, so a slow API cannot stall the agent or scheduler
+- jittered exponential retries on rate limits, timeouts and 5xx errors
+- a concurrency limit shared by all threads in the process
+- a token-bucket rate limit shared by every process on this machine
+  (the Streamlit app, the LiveKit agent, the scheduler) through SQLite,
+  opened on the first call; without SQLite only the concurrency limit applies
+- per-task latency histograms for the Admin page and logs
+"""
+from collections import defaultdict, deque
+import os
+import random
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from openai import OpenAI, RateLimitError, APITimeoutError, APIConnectionError, InternalServerError
+from dotenv import load_dotenv
+from src.model_router import model_for
+from src.token_budget import count_message_tokens, budget_for
+from src.telemetry import get_logger, fields, observe, increment
+
+load_dotenv()
+
+log = get_logger(__name__)
+
+try:
+    client = OpenAI()
+except Exception as e:
+    log.error(f"Error initializing OpenAI client: {e}")
+    client = None
+
+MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+REQUESTS_PER_MINUTE = float(os.getenv("LLM_REQUESTS_PER_MINUTE", "120"))
+BURST = int(os.getenv("LLM_BURST", "10"))
+RATE_LIMIT_DB = Path(os.getenv("LLM_RATE_LIMIT_DB", "data/llm_rate_limit.sqlite"))
+
+MAX_RETRIES = 3
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_CAP_SECONDS = 8.0
+DEFAULT_TIMEOUT_SECONDS = 30.0
+TASK_TIMEOUTS = {
+    "assistant": 10.0,   # The patient is waiting for a spoken answer
+    "reminder": 20.0,
+    "embedding": 15.0,
+    "recap": 60.0,
+    "transcription": 15.0,  # On the agent's hot path, including partial emergency checks
+    "tts": 30.0,
+}
+LATENCY_BUCKETS_MS = (250, 500, 1000, 2000, 5000, 10000, 30000)
+
+RETRYABLE_ERRORS = (RateLimitError, APITimeoutError, APIConnectionError, InternalServerError)
+
+_semaphore = threading.BoundedSemaphore(MAX_CONCURRENCY)
+_stats_lock = threading.Lock()
+_histograms = defaultdict(lambda: [0] * (len(LATENCY_BUCKETS_MS) + 1))
+_samples_ms = defaultdict(lambda: deque(maxlen=500))
+_counters = defaultdict(lambda: {"calls": 0, "errors": 0, "retries": 0, "prompt_tokens": 0})
+
+
+# ========================================
+# CROSS-PROCESS RATE LIMIT
+# ========================================
+
+class TokenBucket:
+    """Token bucket stored in SQLite so every local process draws from the same budget."""
+
+    def __init__(self, path: Path, rate_per_second: float, capacity: int, name: str = "openai"):
+        self.path = Path(path)
+        self.rate = rate_per_second
+        self.capacity = capacity
+        self.name = name
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS buckets (name TEXT PRIMARY KEY, tokens REAL, updated REAL)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10, isolation_level=None)
+
+    def _try_take(self) -> float:
+        """Take one token if available; otherwise return the seconds until one is."""
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")  # Serializes processes for the read-modify-write
+            now = time.time()
+            row = conn.execute("SELECT tokens, updated FROM buckets WHERE name = ?", (self.name,)).fetchone()
+            tokens, updated = row if row else (float(self.capacity), now)
+            tokens = min(self.capacity, tokens + (now - updated) * self.rate)
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / self.rate
+            conn.execute("INSERT OR REPLACE INTO buckets (name, tokens, updated) VALUES (?, ?, ?)",
+                         (self.name, tokens, now))
+            conn.execute("COMMIT")
+            return wait
+        finally:
+            conn.close()
+
+    def acquire(self, timeout: float | None = None) -> bool:
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while True:
+            try:
+                wait = self._try_take()
+            except sqlite3.Error as e:
+                log.warning(f"⚠️ Rate limiter unavailable, continuing without it: {e}")
+                return True
+            if not wait:
+                return True
+            if deadline is not None and time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+_bucket = None
+_bucket_lock = threading.Lock()
+_bucket_unavailable = False
+
+
+def _get_bucket() -> TokenBucket | None:
+    """The shared token bucket, created on first use; None when SQLite is unavailable."""
+    global _bucket, _bucket_unavailable
+    if _bucket is not None or _bucket_unavailable:
+        return _bucket
+    with _bucket_lock:
+        if _bucket is None and not _bucket_unavailable:
+            try:
+                _bucket = TokenBucket(RATE_LIMIT_DB, REQUESTS_PER_MINUTE / 60.0, BURST)
+            except (sqlite3.Error, OSError) as e:
+                log.warning(f"⚠️ Rate limiter unavailable, using the in-process concurrency limit only: {e}")
+                _bucket_unavailable = True
+    return _bucket
+
+
+# ========================================
+# CALLS
+# ========================================
+
+def _record(task: str, started: float, retries: int, failed: bool):
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    bucket = next((i for i, edge in enumerate(LATENCY_BUCKETS_MS) if elapsed_ms <= edge), len(LATENCY_BUCKETS_MS))
+    with _stats_lock:
+        _histograms[task][bucket] += 1
+        _samples_ms[task].append(elapsed_ms)
+        counters = _counters[task]
+        counters["calls"] += 1
+        counters["retries"] += retries
+        counters["errors"] += int(failed)
+    observe("llm_call_seconds", elapsed_ms / 1000, task=task)
+    increment("llm_calls_total", task=task, outcome="error" if failed else "ok")
+    if retries:
+        increment("llm_retries_total", retries, task=task)
+
+
+def _backoff(attempt: int) -> float:
+    # "Full jitter": spreads retries from many processes instead of synchronizing them
+    return random.uniform(0, min(BACKOFF_CAP_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+
+
+def _execute(task: str, request, timeout: float | None = None):
+    """Run `request(client_with_timeout)` under the concurrency/rate limits, with retries."""
+    if not client:
+        raise ConnectionError("OpenAI client not initialized.")
+    timeout = timeout or TASK_TIMEOUTS.get(task, DEFAULT_TIMEOUT_SECONDS)
+    scoped_client = client.with_options(timeout=timeout, max_retries=0)  # Retries are handled here
+    started = time.perf_counter()
+    bucket = _get_bucket()
+
+    for attempt in range(MAX_RETRIES + 1):
+        if bucket is not None and not bucket.acquire(timeout=timeout):
+            _record(task, started, attempt, failed=True)
+            raise TimeoutError(f"Rate limit wait exceeded {timeout:.0f}s for task '{task}'")
+        try:
+            with _semaphore:
+                result = request(scoped_client)
+            _record(task, started, attempt, failed=False)
+            return result
+        except RETRYABLE_ERRORS as e:
+            if attempt == MAX_RETRIES:
+                _record(task, started, attempt, failed=True)
+                raise
+            delay = _backoff(attempt)
+            log.warning("⚠️ LLM call failed, retrying",
+                        extra=fields(task=task, error=type(e).__name__, delay_s=round(delay, 1)))
+            time.sleep(delay)
+        except Exception:
+            _record(task, started, attempt, failed=True)
+            raise
+
+
+def chat_completion(task: str, messages: list[dict], model: str | None = None, timeout: float | None = None, **kwargs):
+    """
+    chat.completions.create for a task; the model comes from the router unless given.
+
+    With stream=True the stream object is returned once the response starts, so
+    latency is time to first byte and the concurrency slot is freed right away.
+    """
+    model = model or model_for(task)
+    prompt_tokens = count_message_tokens(messages)
+    with _stats_lock:
+        _counters[task]["prompt_tokens"] += prompt_tokens
+    if prompt_tokens > 2 * budget_for(task):  # Budget covers the variable input; allow for the template
+        log.warning("⚠️ Prompt over budget", extra=fields(task=task, tokens=prompt_tokens, budget=budget_for(task)))
+    return _execute(task, lambda c: c.chat.completions.create(model=model, messages=messages, **kwargs), timeout)
+
+
+def create_embeddings(texts: list[str], model: str, timeout: float | None = None):
+    return _execute("embedding", lambda c: c.embeddings.create(model=model, input=texts), timeout)
+
+
+def transcribe_file(path: str | Path, model: str = "whisper-1", timeout: float | None = None) -> str:
+    """Plain-text Whisper transcription; the file is reopened for each retry."""
+    def request(c):
+        with open(path, "rb") as audio_file:
+            return c.audio.transcriptions.create(model=model, file=audio_file, response_format="text")
+    return _execute("transcription", request, timeout)
+
+
+def synthesize_speech(text: str, output_path: str | Path, model: str = "tts-1", voice: str = "nova",
+                      timeout: float | None = None) -> Path:
+    """Render speech to `output_path`."""
+    def request(c):
+        response = c.audio.speech.create(model=model, voice=voice, input=text)
+        response.stream_to_file(Path(output_path))
+        return Path(output_path)
+    return _execute("tts", request, timeout)
+
+
+def get_llm_stats() -> dict:
+    """Per-task call counts, errors, retries, latency percentiles and histogram buckets."""
+    labels = [f"<={edge}ms" for edge in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}ms"]
+    with _stats_lock:
+        stats = {}
+        for task, counters in _counters.items():
+            ordered = sorted(_samples_ms[task])
+            stats[task] = {
+                **counters,
+                "avg_prompt_tokens": counters["prompt_tokens"] / counters["calls"] if counters["calls"] else 0.0,
+                "p50_ms": ordered[len(ordered) // 2] if ordered else 0.0,
+                "p95_ms": ordered[max(int(len(ordered) * 0.95) - 1, 0)] if ordered else 0.0,
+                "histogram": dict(zip(labels, _histograms[task])),
+            }
+        return stats
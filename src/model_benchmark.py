@@ -0,0 +1,215 @@
+# src/model_benchmark.py
+"""
+Benchmark candidate models on the project's real prompts.
+
+For each task (patient summary, caregiver summary, clinical JSON, assistant
+answer) every candidate model runs the same inputs; the report shows latency,
+token usage, estimated cost and agreement with a reference model, which is the
+evidence for moving a task to a cheaper tier in src/model_router.py.
+
+Usage:
+    poetry run python -m src.model_benchmark --models gpt-4o-mini gpt-4o --reference gpt-4 --json report.json
+"""
+import argparse
+import json
+import re
+import sys
+import time
+from pathlib import Path
+
+if __name__ == "__main__":
+    sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from dotenv import load_dotenv
+import numpy as np
+from src.database import get_all_people, get_recent_transcripts
+from src.model_router import (
+    model_for, estimate_cost, TIER_MODELS, TIER_BASELINE,
+    TASK_SIMPLE_SUMMARY, TASK_CAREGIVER_SUMMARY, TASK_CLINICAL, TASK_ASSISTANT
+)
+from src.summarizer import SIMPLE_SUMMARY_PROMPT, CAREGIVER_SUMMARY_PROMPT, CLINICAL_SUMMARY_PROMPT, CLINICAL_JSON_SCHEMA
+from src.patient_assistant import build_assistant_prompt, build_knowledge_base
+from src.llm_gateway import client, chat_completion
+
+load_dotenv()
+
+# Used when the database has no recorded conversations yet
+SAMPLE_TRANSCRIPTS = [
+    "Hi Mom, it's Sarah. Did you take your blood pressure pills this morning? "
+    "I think so, I'm not sure. I keep forgetting where I put them. "
+    "They're in the kitchen by the sink. I'll come by Saturday with the kids.",
+    "Good afternoon, it's Dr. Levy. How have you been sleeping? "
+    "Not well, I wake up at night and I don't know where I am. I feel a bit dizzy in the mornings. "
+    "Let's keep an eye on that and check your medication next week.",
+    "Dad, it's David. The game is on tonight, do you want to watch it together? "
+    "Oh yes, I love the game. Is it Tuesday already? It's Thursday, Dad. I'll bring dinner.",
+]
+SAMPLE_QUESTIONS = [
+    "Where is the bathroom?",
+    "Is Sarah coming today?",
+    "What is the ibuprofen for?",
+    "I feel lonely, who can I call?",
+]
+
+
+# ========================================
+# TASK RUNNERS
+# ========================================
+
+def _known_people() -> str:
+    people = get_all_people()
+    return "\n".join(f"- {p.get('name')} ({p.get('relationship')})" for p in people) if people else "No people profiles available."
+
+
+def build_cases(samples: int) -> dict:
+    """task -> list of (messages, request kwargs), built with the production prompts."""
+    transcripts = get_recent_transcripts(samples) or SAMPLE_TRANSCRIPTS[:samples]
+    known_people = _known_people()
+    knowledge_base = build_knowledge_base()
+    schema = json.dumps(CLINICAL_JSON_SCHEMA, indent=2)
+
+    def system(content):
+        return [{"role": "system", "content": content}]
+
+    return {
+        TASK_SIMPLE_SUMMARY: [
+            (system(SIMPLE_SUMMARY_PROMPT.format(transcript=t, known_people=known_people)),
+             {"temperature": 0.1, "max_tokens": 100}) for t in transcripts],
+        TASK_CAREGIVER_SUMMARY: [
+            (system(CAREGIVER_SUMMARY_PROMPT.format(transcript=t, known_people=known_people)),
+             {"temperature": 0.1, "max_tokens": 150}) for t in transcripts],
+        TASK_CLINICAL: [
+            (system(CLINICAL_SUMMARY_PROMPT.format(transcript=t, schema=schema)),
+             {"temperature": 0.1, "max_tokens": 300, "response_format": {"type": "json_object"}}) for t in transcripts],
+        TASK_ASSISTANT: [
+            (system(build_assistant_prompt(q, knowledge_base)), {"temperature": 0.3, "max_tokens": 100})
+            for q in SAMPLE_QUESTIONS[:samples]],
+    }
+
+
+def run_case(task: str, model: str, messages: list[dict], kwargs: dict) -> dict:
+    started = time.perf_counter()
+    try:
+        completion = chat_completion(task, messages, model=model, **kwargs)
+        usage = completion.usage
+        return {
+            "output": completion.choices[0].message.content.strip(),
+            "latency_ms": (time.perf_counter() - started) * 1000,
+            "prompt_tokens": usage.prompt_tokens if usage else 0,
+            "completion_tokens": usage.completion_tokens if usage else 0,
+        }
+    except Exception as e:
+        print(f"❌ {model} failed: {e}")
+        return {"output": None, "latency_ms": (time.perf_counter() - started) * 1000,
+                "prompt_tokens": 0, "completion_tokens": 0}
+
+
+# ========================================
+# AGREEMENT
+# ========================================
+
+def _words(text: str) -> set:
+    return set(re.findall(r"[a-z0-9']+", text.lower()))
+
+
+def _jaccard(a: set, b: set) -> float:
+    return len(a & b) / len(a | b) if a | b else 1.0
+
+
+def text_agreement(outputs: list[str], references: list[str]) -> list[float]:
+    """Cosine similarity of embeddings (word overlap if embeddings are unavailable)."""
+    try:
+        from src.summary_index import embed_texts
+        vectors = embed_texts(outputs + references)
+        n = len(outputs)
+        return [float(vectors[i] @ vectors[n + i]) for i in range(n)]
+    except Exception as e:
+        print(f"⚠️ Embedding agreement unavailable, using word overlap: {e}")
+        return [_jaccard(_words(o), _words(r)) for o, r in zip(outputs, references)]
+
+
+def clinical_agreement(output: str, reference: str) -> float:
+    """Share of clinical fields that agree: mood exactly, participant/topics/concerns by word overlap."""
+    try:
+        a, b = json.loads(output), json.loads(reference)
+    except (TypeError, json.JSONDecodeError):
+        return 0.0
+    as_words = lambda v: _words(" ".join(v) if isinstance(v, list) else str(v))
+    scores = [
+        float(str(a.get("patient_mood", "")).lower() == str(b.get("patient_mood", "")).lower()),
+        _jaccard(as_words(a.get("participant", "")), as_words(b.get("participant", ""))),
+        _jaccard(as_words(a.get("topics_discussed", [])), as_words(b.get("topics_discussed", []))),
+        _jaccard(as_words(a.get("key_concerns", [])), as_words(b.get("key_concerns", []))),
+    ]
+    return sum(scores) / len(scores)
+
+
+# ========================================
+# BENCHMARK
+# ========================================
+
+def benchmark(models: list[str], reference: str, samples: int = 3, tasks: list[str] | None = None) -> dict:
+    """task -> model -> latency / token / cost / agreement profile."""
+    cases = build_cases(samples)
+    report = {}
+    for task, task_cases in cases.items():
+        if tasks and task not in tasks:
+            continue
+        print(f"🏁 {task}: {len(task_cases)} case(s) x {len(models)} model(s)")
+        results = {m: [run_case(task, m, msgs, kw) for msgs, kw in task_cases] for m in dict.fromkeys([reference, *models])}
+        references = [r["output"] for r in results[reference]]
+
+        report[task] = {"current_model": model_for(task)}
+        for model, runs in results.items():
+            pairs = [(r["output"], ref) for r, ref in zip(runs, references) if r["output"] and ref]
+            if model == reference:
+                agreement = [1.0] * len(pairs)
+            elif task == TASK_CLINICAL:
+                agreement = [clinical_agreement(o, ref) for o, ref in pairs]
+            else:
+                agreement = text_agreement([o for o, _ in pairs], [ref for _, ref in pairs]) if pairs else []
+            latencies = [r["latency_ms"] for r in runs]
+            prompt_tokens = sum(r["prompt_tokens"] for r in runs)
+            completion_tokens = sum(r["completion_tokens"] for r in runs)
+            cost = estimate_cost(model, prompt_tokens, completion_tokens)
+            report[task][model] = {
+                "p50_ms": float(np.percentile(latencies, 50)),
+                "p95_ms": float(np.percentile(latencies, 95)),
+                "prompt_tokens": prompt_tokens / len(runs),
+                "completion_tokens": completion_tokens / len(runs),
+                "cost_per_call": cost / len(runs) if cost is not None else None,
+                "agreement": float(np.mean(agreement)) if agreement else 0.0,
+                "failures": sum(r["output"] is None for r in runs),
+            }
+    return report
+
+
+def print_report(report: dict, reference: str):
+    for task, models in report.items():
+        print(f"\n=== {task} (currently {models['current_model']}, agreement vs {reference}) ===")
+        print(f"{'model':<16}{'p50 ms':>9}{'p95 ms':>9}{'in tok':>9}{'out tok':>9}{'$/call':>10}{'agree':>8}{'fail':>6}")
+        for model, p in models.items():
+            if model == "current_model":
+                continue
+            cost = f"{p['cost_per_call']:.5f}" if p['cost_per_call'] is not None else "?"
+            print(f"{model:<16}{p['p50_ms']:>9.0f}{p['p95_ms']:>9.0f}{p['prompt_tokens']:>9.0f}"
+                  f"{p['completion_tokens']:>9.0f}{cost:>10}{p['agreement']:>8.2f}{p['failures']:>6}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare models on RememberMe prompts")
+    parser.add_argument("--models", nargs="+", default=sorted(set(TIER_MODELS.values())))
+    parser.add_argument("--reference", default=TIER_MODELS[TIER_BASELINE],
+                        help="Model whose outputs count as correct (default: the baseline tier in use today)")
+    parser.add_argument("--samples", type=int, default=3)
+    parser.add_argument("--tasks", nargs="*", help="Subset of tasks to run")
+    parser.add_argument("--json", help="Also write the report to this file")
+    args = parser.parse_args()
+
+    if not client:
+        sys.exit("OpenAI client not initialized.")
+    result = benchmark(args.models, args.reference, args.samples, args.tasks)
+    print_report(result, args.reference)
+    if args.json:
+        Path(args.json).write_text(json.dumps(result, indent=2))
+        print(f"\n💾 Report written to {args.json}")
@@ -0,0 +1,86 @@
+# src/model_router.py
+"""
+Per-task model routing.
+
+Every LLM call names its task; each task belongs to a tier, and each tier maps
+to a model. Both are configurable in one place (or through the environment:
+MODEL_TIER_FAST=..., TASK_TIER_ASSISTANT=fast), so a hot path can move to a
+faster model once `python -m src.model_benchmark` shows it agrees closely
+enough with the baseline one.
+
+Until a benchmark report justifies a switch, every task stays on the model it
+used before routing existed: the baseline tier (gpt-4), or the strong tier
+(gpt-4-turbo) for the recaps, which already used it for grounding.
+"""
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+TIER_FAST = "fast"
+TIER_STANDARD = "standard"
+TIER_STRONG = "strong"
+TIER_BASELINE = "baseline"
+
+TIER_MODELS = {
+    TIER_FAST: os.getenv("MODEL_TIER_FAST", "gpt-4o-mini"),
+    TIER_STANDARD: os.getenv("MODEL_TIER_STANDARD", "gpt-4o"),
+    TIER_STRONG: os.getenv("MODEL_TIER_STRONG", "gpt-4-turbo"),
+    TIER_BASELINE: os.getenv("MODEL_TIER_BASELINE", "gpt-4"),  # What every task used before routing
+}
+
+TASK_SIMPLE_SUMMARY = "simple_summary"
+TASK_CAREGIVER_SUMMARY = "caregiver_summary"
+TASK_CLINICAL = "clinical_json"
+TASK_RECAP = "recap"
+TASK_RECAP_EVENT = "recap_event"
+TASK_RECAP_BLOCK = "recap_block"
+TASK_ROLLUP = "rollup"
+TASK_REMINDER = "reminder"
+TASK_ASSISTANT = "assistant"
+TASK_CHATBOT = "chatbot"
+
+# Candidates once benchmarked: fast for the patient summary, reminder, assistant and per-event
+# recap paragraphs; standard for the caregiver/clinical summaries, rollups and chatbot
+TASK_TIERS = {
+    TASK_SIMPLE_SUMMARY: TIER_BASELINE,  # 50 words for the patient
+    TASK_CAREGIVER_SUMMARY: TIER_BASELINE,
+    TASK_CLINICAL: TIER_BASELINE,        # Structured JSON; feeds rollups and the dashboard
+    TASK_RECAP: TIER_STRONG,             # Whole-day narrative, grounding matters most
+    TASK_RECAP_EVENT: TIER_STRONG,       # One paragraph per conversation
+    TASK_RECAP_BLOCK: TIER_STRONG,       # Map step of busy-day recaps
+    TASK_ROLLUP: TIER_BASELINE,
+    TASK_REMINDER: TIER_BASELINE,
+    TASK_ASSISTANT: TIER_BASELINE,       # 30-word spoken answers, latency-critical
+    TASK_CHATBOT: TIER_BASELINE,
+}
+
+# Approximate USD per 1M tokens (input, output), for benchmark cost estimates
+MODEL_PRICES = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4-turbo": (10.00, 30.00),
+    "gpt-4": (30.00, 60.00),
+}
+
+
+def tier_for(task: str) -> str:
+    """Tier for a task; TASK_TIER_<TASK> in the environment overrides the default."""
+    tier = os.getenv(f"TASK_TIER_{task.upper()}", TASK_TIERS.get(task, TIER_BASELINE))
+    return tier if tier in TIER_MODELS else TIER_BASELINE
+
+
+def model_for(task: str) -> str:
+    return TIER_MODELS[tier_for(task)]
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float | None:
+    prices = MODEL_PRICES.get(model)
+    if not prices:
+        return None
+    return (prompt_tokens * prices[0] + completion_tokens * prices[1]) / 1_000_000
+
+
+def get_routing_table() -> dict:
+    """task -> {"tier", "model"}, as currently configured."""
+    return {task: {"tier": tier_for(task), "model": model_for(task)} for task in TASK_TIERS}
@@ -1,63 +1,160 @@
 # src/patient_assistant.py
-from openai import OpenAI
 from dotenv import load_dotenv
-from src.database import get_all_people, get_all_medications
+from src.database import (
+    get_all_people, get_all_medications, get_all_home_info, get_knowledge_base_meta, save_knowledge_base_snapshot
+)
+from src.intent_router import route_question, record_llm_fallback
+from src.model_router import TASK_ASSISTANT
+from src.llm_gateway import client, chat_completion
 from datetime import datetime
+import re
+import threading
+import time
 
 load_dotenv()
 
-try:
-    client = OpenAI()
-except Exception as e:
-    print(f"Error initializing OpenAI client: {e}")
-    client = None
 
 EMERGENCY_KEYWORDS = [
     "help", "emergency", "call 911", "can't breathe", "chest pain",
     "falling", "fell down", "hurt badly", "bleeding", "dizzy"
 ]
 
+# Spoken variants for each keyword; any variant reports its canonical keyword
+EMERGENCY_VARIANTS = {
+    "help": ["help", "help me", "need help", "somebody help", "someone help"],
+    "emergency": ["emergency"],
+    "call 911": ["call 911", "call nine one one", "call an ambulance", "get an ambulance", "ambulance"],
+    "can't breathe": ["can't breathe", "cant breathe", "cannot breathe", "can not breathe",
+                      "hard to breathe", "trouble breathing", "not breathing"],
+    "chest pain": ["chest pain", "chest pains", "chest hurts", "pain in my chest"],
+    "falling": ["falling"],
+    "fell down": ["fell down", "i fell", "fallen down", "have fallen", "fell over"],
+    "hurt badly": ["hurt badly", "badly hurt", "really hurt", "hurt really bad"],
+    "bleeding": ["bleeding", "blood everywhere"],
+    "dizzy": ["dizzy", "light headed", "lightheaded", "going to faint", "fainted"],
+}
+
+# "I'm not dizzy", "I don't need help" are not emergencies. Interjections like "oh no",
+# "no no" or "stop it" are not negations and must never hide a call for help.
+NEGATIONS = {"not", "don't", "dont", "didn't", "didnt", "doesn't", "doesnt", "never", "isn't", "wasn't", "aren't"}
+# Words allowed between a negation and the phrase it governs ("don't really need help", "not feeling dizzy")
+NEGATION_BRIDGE = {"need", "needed", "want", "wanted", "feel", "feeling", "felt", "am", "be", "being", "get",
+                   "getting", "think", "really", "very", "too", "so", "any", "an", "a", "have", "call"}
+NEGATION_WINDOW = 3  # Max bridge words between the negation and the match
+
+_VARIANT_TO_KEYWORD = {
+    variant: keyword for keyword, variants in EMERGENCY_VARIANTS.items() for variant in variants
+}
+# One alternation, longest variants first, with word boundaries ("helpful" does not match "help")
+_EMERGENCY_PATTERN = re.compile(
+    r"\b(?:" + "|".join(re.escape(v).replace(r"\ ", r"\s+")
+                         for v in sorted(_VARIANT_TO_KEYWORD, key=len, reverse=True)) + r")\b",
+    re.IGNORECASE
+)
+_CLAUSE_BREAK = re.compile(r"[.!?,;:]")
+
+
+def _is_negated(text: str, match_start: int) -> bool:
+    """True only when a negation directly governs the match, optionally through a few bridge words."""
+    clause = _CLAUSE_BREAK.split(text[:match_start])[-1]
+    for bridged, word in enumerate(reversed(clause.split())):
+        word = word.strip("'\"").lower()
+        if word in NEGATIONS:
+            return True
+        if word not in NEGATION_BRIDGE or bridged >= NEGATION_WINDOW:
+            return False
+    return False
+
 
 def detect_emergency(transcript: str) -> tuple[bool, str]:
-    transcript_lower = transcript.lower()
-    for keyword in EMERGENCY_KEYWORDS:
-        if keyword in transcript_lower:
-            print(f"🚨 EMERGENCY DETECTED: '{keyword}'")
-            return True, keyword
+    """Single-pass scan for emergency phrases; negated mentions are ignored."""
+    if not transcript:
+        return False, ""
+    text = transcript.replace("\u2019", "'")
+    for match in _EMERGENCY_PATTERN.finditer(text):
+        if _is_negated(text, match.start()):
+            continue
+        keyword = _VARIANT_TO_KEYWORD[" ".join(match.group(0).lower().split())]
+        print(f"🚨 EMERGENCY DETECTED: '{keyword}'")
+        return True, keyword
     return False, ""
 
 
+# Used until a caregiver adds home information in Admin Tools
+DEFAULT_HOME_INFO = [
+    {"topic": "Bathroom", "details": "down the hall"},
+    {"topic": "Bedroom", "details": "at the end of the hallway"},
+]
+KB_VERSION_CHECK_SECONDS = 5  # Questions within this window reuse the snapshot without touching the database
+
+_kb_lock = threading.Lock()
+_kb_snapshot = {"version": None, "text": None, "checked_at": 0.0}
+
+
 def build_knowledge_base() -> str:
-    knowledge = []
-    try:
-        people = get_all_people()
-        if people:
-            knowledge.append("**Family & Friends:**")
-            for person in people:
-                name = person.get('name')
-                relationship = person.get('relationship')
-                notes = person.get('notes', '')
-                knowledge.append(f"- {name} ({relationship}): {notes}")
-    except:
-        pass
+    """Render people, medications and home information into the assistant's prompt text."""
+    # Rebuilds are rare, so always read fresh rows rather than a cached page query
+    for loader in (get_all_people, get_all_medications, get_all_home_info):
+        loader.clear()
 
-    try:
-        medications = get_all_medications()
-        if medications:
-            knowledge.append("\n**Medications:**")
-            for med in medications:
-                name = med.get('name')
-                time_to_take = med.get('time_to_take')
-                purpose = med.get('purpose')
-                knowledge.append(f"- {name}: Take at {time_to_take} for {purpose}")
-    except:
-        pass
+    knowledge = []
+    people = get_all_people()
+    if people:
+        knowledge.append("**Family & Friends:**")
+        for person in people:
+            knowledge.append(f"- {person.get('name')} ({person.get('relationship')}): {person.get('notes', '')}")
+
+    medications = get_all_medications()
+    if medications:
+        knowledge.append("\n**Medications:**")
+        for med in medications:
+            knowledge.append(f"- {med.get('name')}: Take at {med.get('time_to_take')} for {med.get('purpose')}")
 
     knowledge.append("\n**Home Information:**")
-    knowledge.append("- The bathroom is down the hall")
-    knowledge.append("- Your bedroom is at the end of the hallway")
-
-    return "\n".join(knowledge) if knowledge else "No information available."
+    for item in get_all_home_info() or DEFAULT_HOME_INFO:
+        knowledge.append(f"- {item.get('topic')}: {item.get('details')}")
+
+    return "\n".join(knowledge)
+
+
+def get_knowledge_base() -> str:
+    """
+    Versioned knowledge base snapshot.
+
+    Writes to people, medications or home information bump a version counter;
+    the snapshot is rebuilt (and shared through the database with other
+    processes) only when that version changes.
+    """
+    with _kb_lock:
+        if _kb_snapshot["text"] is not None and time.monotonic() - _kb_snapshot["checked_at"] < KB_VERSION_CHECK_SECONDS:
+            return _kb_snapshot["text"]
+
+        meta = get_knowledge_base_meta()
+        version = meta.get("version")
+        if version is None:  # Database unavailable: keep serving what we have
+            if _kb_snapshot["text"] is None:
+                _kb_snapshot["text"] = build_knowledge_base()
+            return _kb_snapshot["text"]
+
+        if version != _kb_snapshot["version"]:
+            if meta.get("snapshot_version") == version and meta.get("snapshot"):
+                text = meta["snapshot"]
+            else:
+                text = build_knowledge_base()
+                save_knowledge_base_snapshot(version, text)
+                print(f"📚 Knowledge base rebuilt (version {version})")
+            _kb_snapshot.update(version=version, text=text)
+        _kb_snapshot["checked_at"] = time.monotonic()
+        return _kb_snapshot["text"]
+
+
+def build_assistant_prompt(question: str, knowledge_base: str) -> str:
+    now = datetime.now()
+    return f"""You are a helpful assistant for a person with dementia.
+Answer their question using ONLY this information: {knowledge_base}
+Keep answer under 30 words. Be warm and simple.
+Today is {now.strftime('%A, %B %d, %Y')}.
+Question: {question}"""
 
 
 def answer_patient_question(question: str) -> tuple[str, bool]:
@@ -70,18 +167,17 @@ def answer_patient_question(question: str) -> tuple[str, bool]:
     if is_emergency:
         return "I'm calling your caregiver right now to help you.", True
 
-    knowledge_base = build_knowledge_base()
-    now = datetime.now()
+    # Date/time, medication and "who is" questions are answered locally
+    local_answer = route_question(question)
+    if local_answer:
+        return local_answer, False
 
-    prompt = f"""You are a helpful assistant for a person with dementia.
-Answer their question using ONLY this information: {knowledge_base}
-Keep answer under 30 words. Be warm and simple.
-Today is {now.strftime('%A, %B %d, %Y')}.
-Question: {question}"""
+    llm_started = time.perf_counter()
+    prompt = build_assistant_prompt(question, get_knowledge_base())
 
     try:
-        completion = client.chat.completions.create(
-            model="gpt-4",
+        completion = chat_completion(
+            task=TASK_ASSISTANT,
             messages=[{"role": "system", "content": prompt}],
             temperature=0.3,
             max_tokens=100
@@ -91,4 +187,6 @@ Question: {question}"""
         return answer, False
     except Exception as e:
         print(f"❌ Error: {e}")
-        return "I'm not sure about that.", False
\ No newline at end of file
+        return "I'm not sure about that.", False
+    finally:
+        record_llm_fallback(llm_started)
\ No newline at end of file
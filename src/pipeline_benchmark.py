@@ -0,0 +1,397 @@
+# src/pipeline_benchmark.py
+"""
+End-to-end benchmark of the capture → transcribe → summarize → store path.
+
+Synthetic 10 ms audio frames are fed into AudioReceiverAgent.add_frame exactly
+as process_audio_track does, so VAD, partial emergency checks, WAV writing,
+transcription, the three summaries and the database insert all run unmodified.
+OpenAI is replaced by a local HTTP server with configurable latency and MongoDB
+by mongomock (or a local instance via --mongo-uri), so runs are repeatable and
+free. The report lists per-stage latency percentiles, conversations per minute
+and memory; --output/--baseline save a run and flag regressions against it.
+
+Usage:
+    poetry run python -m src.pipeline_benchmark --conversations 50 --agents 4 --chat-ms 600
+    poetry run python -m src.pipeline_benchmark --output baseline.json
+    poetry run python -m src.pipeline_benchmark --baseline baseline.json   # exits 1 on regression
+"""
+import argparse
+import asyncio
+import contextlib
+import contextvars
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import numpy as np
+
+if __name__ == "__main__":
+    sys.path.insert(0, str(Path(__file__).parent.parent))
+
+FRAME_SAMPLES = 480  # 10 ms at 48 kHz, LiveKit's default frame size
+SAMPLE_RATE = 48000
+EMBEDDING_DIMENSIONS = 256
+REGRESSION_TOLERANCE = 0.2  # Flag stages whose p95 got more than 20% slower
+
+FAKE_TRANSCRIPTS = [
+    "Hi Mom, it's Sarah. Did you take your blood pressure pills this morning? "
+    "I think so, I'm not sure. They're in the kitchen by the sink. I'll come by Saturday with the kids.",
+    "Good afternoon, it's Dr. Levy. How have you been sleeping? "
+    "Not well, I wake up at night. Let's check your medication next week.",
+    "Dad, it's David. The game is on tonight, do you want to watch it together? "
+    "Oh yes, is it Tuesday already? It's Thursday, Dad. I'll bring dinner.",
+]
+FAKE_CLINICAL = {
+    "participant": "Sarah",
+    "topics_discussed": ["Medication", "Family visit"],
+    "patient_mood": "neutral",
+    "cognitive_state": "Slightly unsure about the morning routine.",
+    "key_concerns": ["Unsure whether medication was taken"],
+}
+
+
+# ========================================
+# FAKE OPENAI SERVER
+# ========================================
+
+class FakeOpenAIServer:
+    """Local stand-in for the OpenAI endpoints the pipeline calls, with simulated latency."""
+
+    def __init__(self, latency_ms: dict, jitter: float = 0.2):
+        self.latency_ms = latency_ms
+        self.jitter = jitter
+        self.requests = defaultdict(int)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}/v1"
+
+    def start(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self._server.shutdown()
+
+    def _delay(self, endpoint: str):
+        base = self.latency_ms.get(endpoint, 0) / 1000
+        time.sleep(max(0.0, base * random.uniform(1 - self.jitter, 1 + self.jitter)))
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, body: bytes, content_type: str):
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                raw = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                endpoint = self.path.rstrip("/").split("/v1/")[-1]
+                with fake._lock:
+                    fake.requests[endpoint] += 1
+
+                if endpoint == "audio/transcriptions":
+                    fake._delay("transcription")
+                    self._send(random.choice(FAKE_TRANSCRIPTS).encode(), "text/plain")
+                elif endpoint == "audio/speech":
+                    fake._delay("tts")
+                    self._send(b"\xff\xfb" + bytes(2048), "audio/mpeg")
+                elif endpoint == "embeddings":
+                    fake._delay("embedding")
+                    texts = json.loads(raw).get("input", [])
+                    texts = [texts] if isinstance(texts, str) else texts
+                    data = [{"object": "embedding", "index": i,
+                             "embedding": np.random.default_rng(hash(t) % 2 ** 32).random(EMBEDDING_DIMENSIONS).tolist()}
+                            for i, t in enumerate(texts)]
+                    self._send(json.dumps({"object": "list", "data": data, "model": "fake",
+                                           "usage": {"prompt_tokens": 0, "total_tokens": 0}}).encode(),
+                               "application/json")
+                elif endpoint == "chat/completions":
+                    fake._delay("chat")
+                    request = json.loads(raw)
+                    wants_json = (request.get("response_format") or {}).get("type") == "json_object"
+                    content = json.dumps(FAKE_CLINICAL) if wants_json else "You spoke with Sarah about your pills."
+                    self._send(json.dumps({
+                        "id": "chatcmpl-fake", "object": "chat.completion", "created": int(time.time()),
+                        "model": request.get("model", "fake"),
+                        "choices": [{"index": 0, "finish_reason": "stop",
+                                     "message": {"role": "assistant", "content": content}}],
+                        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+                    }).encode(), "application/json")
+                else:
+                    self.send_error(404)
+
+        return Handler
+
+
+# ========================================
+# STAGE TIMING
+# ========================================
+
+class StageTimer:
+    """Collects per-stage durations (ms) from every agent and thread."""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, ms: float):
+        with self._lock:
+            self.samples[stage].append(ms)
+
+    def wrap(self, stage: str, func):
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.add(stage, (time.perf_counter() - started) * 1000)
+        return timed
+
+
+def percentile(ordered: list[float], q: float) -> float:
+    return ordered[max(int(len(ordered) * q) - 1, 0)] if ordered else 0.0
+
+
+_save_started = contextvars.ContextVar("save_started", default=None)
+
+
+def instrument_agent_module(livekit_client, timer: StageTimer):
+    """Time each stage by wrapping the functions AudioReceiverAgent calls; the agent code itself is unchanged."""
+    transcribe = livekit_client.transcribe_audio
+
+    def timed_transcribe(path):
+        started = time.perf_counter()
+        save_started = _save_started.get()
+        if save_started is not None and "partial_" not in str(path):
+            timer.add("wav_write", (started - save_started) * 1000)  # save_conversation start → transcription
+        try:
+            return transcribe(path)
+        finally:
+            stage = "partial_transcription" if "partial_" in str(path) else "transcription"
+            timer.add(stage, (time.perf_counter() - started) * 1000)
+
+    livekit_client.transcribe_audio = timed_transcribe
+    livekit_client.summarize_transcript_simple = timer.wrap("simple_summary", livekit_client.summarize_transcript_simple)
+    livekit_client.summarize_transcript_caregiver = timer.wrap("caregiver_summary", livekit_client.summarize_transcript_caregiver)
+    livekit_client.summarize_transcript_clinical = timer.wrap("clinical_summary", livekit_client.summarize_transcript_clinical)
+    livekit_client.save_conversation = timer.wrap("store", livekit_client.save_conversation)
+
+
+# ========================================
+# SYNTHETIC AUDIO
+# ========================================
+
+class SyntheticFrame:
+    __slots__ = ("data",)
+
+    def __init__(self, data: bytes):
+        self.data = data
+
+
+def build_frames(seed: int) -> tuple[list[SyntheticFrame], SyntheticFrame]:
+    """A few voiced frames (tones with noise, well above the VAD threshold) and one silent frame."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(FRAME_SAMPLES) / SAMPLE_RATE
+    speech = []
+    for freq in (140, 180, 220, 260):
+        wave = 4000 * np.sin(2 * np.pi * freq * t) + rng.normal(0, 400, FRAME_SAMPLES)
+        speech.append(SyntheticFrame(wave.astype(np.int16).tobytes()))
+    return speech, SyntheticFrame(bytes(FRAME_SAMPLES * 2))
+
+
+async def run_agent(agent, conversations: int, speech_seconds: float, timer: StageTimer, seed: int) -> int:
+    """Feed `conversations` speech+silence sequences through one agent, as process_audio_track does."""
+    speech, silence = build_frames(seed)
+    speech_frames = int(speech_seconds * 100)
+    saved = 0
+    for _ in range(conversations):
+        frames = [silence] * 20 + [speech[i % len(speech)] for i in range(speech_frames)] \
+            + [silence] * (agent.SILENCE_THRESHOLD + 5)
+        for frame in frames:
+            started = time.perf_counter()
+            should_save = agent.add_frame(frame)
+            timer.add("vad_frame", (time.perf_counter() - started) * 1000)
+            if should_save:
+                if agent.partial_task and not agent.partial_task.done():
+                    agent.partial_task.cancel()
+                token = _save_started.set(time.perf_counter())
+                started = time.perf_counter()
+                ok = await agent.save_conversation()
+                timer.add("conversation_total", (time.perf_counter() - started) * 1000)
+                _save_started.reset(token)
+                saved += int(ok)
+                break
+            agent.maybe_check_partial()
+            await asyncio.sleep(0)  # Let partial checks run, as the real frame stream would
+    return saved
+
+
+def _peak_rss_mb() -> float:
+    try:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KB on Linux
+    except ImportError:
+        return 0.0
+
+
+# ========================================
+# RUN + REPORT
+# ========================================
+
+def _configure_environment(args, workdir: str, base_url: str):
+    """Point every module at the fake server and a scratch directory; must run before src imports."""
+    os.environ["OPENAI_BASE_URL"] = base_url
+    os.environ["OPENAI_API_KEY"] = "benchmark"
+    os.environ["LLM_REQUESTS_PER_MINUTE"] = str(args.requests_per_minute)
+    os.environ["LLM_BURST"] = str(max(10, args.agents * 4))
+    os.environ["LLM_RATE_LIMIT_DB"] = str(Path(workdir) / "llm_rate_limit.sqlite")
+    os.environ["SUMMARY_INDEX_PATH"] = str(Path(workdir) / "summary_index.npz")
+    if not args.verbose:
+        os.environ["LOG_LEVEL"] = "ERROR"
+    if args.mongo_uri:
+        os.environ["MONGO_CONNECTION_STRING"] = args.mongo_uri
+        return
+    try:
+        import mongomock
+    except ImportError:
+        print("❌ mongomock is not installed. Install it or pass --mongo-uri for a throwaway local MongoDB.")
+        sys.exit(2)
+    import pymongo
+    pymongo.MongoClient = mongomock.MongoClient  # src.database builds its client from this at import
+    os.environ["MONGO_CONNECTION_STRING"] = "mongodb://in-memory"
+
+
+async def _run(args, timer: StageTimer) -> int:
+    from src import livekit_client
+    instrument_agent_module(livekit_client, timer)
+    agents = [livekit_client.AudioReceiverAgent() for _ in range(args.agents)]
+    per_agent = [args.conversations // args.agents + (i < args.conversations % args.agents) for i in range(args.agents)]
+    results = await asyncio.gather(*(
+        run_agent(agent, n, args.speech_seconds, timer, args.seed + i) for i, (agent, n) in enumerate(zip(agents, per_agent))
+    ))
+    return sum(results)
+
+
+def benchmark(args) -> dict:
+    random.seed(args.seed)
+    server = FakeOpenAIServer({"transcription": args.transcribe_ms, "chat": args.chat_ms,
+                               "embedding": args.embed_ms, "tts": args.tts_ms}, jitter=args.jitter)
+    server.start()
+    workdir = tempfile.mkdtemp(prefix="rememberme_bench_")
+    _configure_environment(args, workdir, server.base_url)
+    os.chdir(workdir)  # recordings/ and recap_audio/ land in the scratch directory
+
+    timer = StageTimer()
+    rss_before = _peak_rss_mb()
+    output = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+    started = time.perf_counter()
+    with output:
+        saved = asyncio.run(_run(args, timer))
+    wall_s = time.perf_counter() - started
+
+    stages = {}
+    for stage, samples in timer.samples.items():
+        ordered = sorted(samples)
+        stages[stage] = {"count": len(ordered), "p50_ms": percentile(ordered, 0.50), "p95_ms": percentile(ordered, 0.95),
+                         "p99_ms": percentile(ordered, 0.99), "max_ms": ordered[-1]}
+    return {
+        "settings": {k: v for k, v in vars(args).items() if k not in ("output", "baseline", "verbose")},
+        "conversations_saved": saved,
+        "wall_seconds": wall_s,
+        "conversations_per_minute": saved / wall_s * 60 if wall_s else 0.0,
+        "peak_rss_mb": _peak_rss_mb(),
+        "rss_growth_mb": _peak_rss_mb() - rss_before,
+        "fake_api_requests": dict(server.requests),
+        "stages": stages,
+        "workdir": workdir,
+    }
+
+
+STAGE_ORDER = ["vad_frame", "partial_transcription", "wav_write", "transcription", "simple_summary",
+               "caregiver_summary", "clinical_summary", "store", "conversation_total"]
+
+
+def print_report(report: dict):
+    print("\n" + "=" * 78)
+    print(f"Pipeline benchmark: {report['conversations_saved']} conversations in {report['wall_seconds']:.1f}s "
+          f"→ {report['conversations_per_minute']:.1f} conversations/min")
+    print(f"Memory: peak RSS {report['peak_rss_mb']:.0f} MB (+{report['rss_growth_mb']:.0f} MB during run)")
+    print(f"Fake API requests: {report['fake_api_requests']}")
+    print("=" * 78)
+    print(f"{'stage':<24}{'count':>8}{'p50 ms':>11}{'p95 ms':>11}{'p99 ms':>11}{'max ms':>11}")
+    stages = report["stages"]
+    for stage in STAGE_ORDER + sorted(set(stages) - set(STAGE_ORDER)):
+        if stage in stages:
+            s = stages[stage]
+            print(f"{stage:<24}{s['count']:>8}{s['p50_ms']:>11.2f}{s['p95_ms']:>11.2f}{s['p99_ms']:>11.2f}{s['max_ms']:>11.2f}")
+
+
+def compare_to_baseline(report: dict, baseline: dict, tolerance: float = REGRESSION_TOLERANCE) -> list[str]:
+    """Human-readable regressions: slower p95 per stage, or lower throughput."""
+    regressions = []
+    for stage, current in report["stages"].items():
+        previous = baseline.get("stages", {}).get(stage)
+        if previous and previous["p95_ms"] > 0 and current["p95_ms"] > previous["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{stage}: p95 {previous['p95_ms']:.1f} → {current['p95_ms']:.1f} ms")
+    previous_rate = baseline.get("conversations_per_minute", 0)
+    if previous_rate and report["conversations_per_minute"] < previous_rate * (1 - tolerance):
+        regressions.append(f"throughput: {previous_rate:.1f} → {report['conversations_per_minute']:.1f} conversations/min")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the conversation pipeline end to end with local stand-ins")
+    parser.add_argument("--conversations", type=int, default=20)
+    parser.add_argument("--agents", type=int, default=1, help="Agents running concurrently in one event loop")
+    parser.add_argument("--speech-seconds", type=float, default=15.0, help="Length of each synthetic conversation")
+    parser.add_argument("--transcribe-ms", type=float, default=800)
+    parser.add_argument("--chat-ms", type=float, default=500)
+    parser.add_argument("--embed-ms", type=float, default=100)
+    parser.add_argument("--tts-ms", type=float, default=300)
+    parser.add_argument("--jitter", type=float, default=0.2, help="Latency varies uniformly by ± this fraction")
+    parser.add_argument("--requests-per-minute", type=float, default=100000,
+                        help="LLM gateway rate limit during the run (high by default to measure the pipeline alone)")
+    parser.add_argument("--mongo-uri", help="Throwaway local MongoDB; default is in-memory mongomock")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", type=Path, help="Write the report as JSON")
+    parser.add_argument("--baseline", type=Path, help="Earlier --output file; exit 1 if this run regressed")
+    parser.add_argument("--verbose", action="store_true", help="Show the pipeline's own log output")
+    args = parser.parse_args()
+    args.output = args.output.resolve() if args.output else None
+    args.baseline = args.baseline.resolve() if args.baseline else None
+
+    report = benchmark(args)
+    print_report(report)
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2, default=str))
+        print(f"\n📄 Report written to {args.output}")
+    if args.baseline:
+        regressions = compare_to_baseline(report, json.loads(args.baseline.read_text()))
+        if regressions:
+            print("\n❌ Regressions against baseline:")
+            for line in regressions:
+                print(f"   {line}")
+            sys.exit(1)
+        print("\n✅ No regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
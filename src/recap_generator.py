@@ -1,16 +1,19 @@
 # src/recap_generator.py
-from openai import OpenAI
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+import threading
 from dotenv import load_dotenv
 # --- UPDATED IMPORT ---
-from src.database import get_todays_conversations, get_all_people
+from src.database import get_todays_conversations, get_all_people, get_running_recap, save_running_recap
+from src.rollups import get_period_rollups
+from src.text_to_speech import text_to_speech, MAX_TTS_CHARS
+from src.model_router import TASK_RECAP, TASK_RECAP_EVENT, TASK_RECAP_BLOCK
+from src.token_budget import count_tokens, budget_for
+from src.llm_gateway import client, chat_completion
 
 load_dotenv()
 
-try:
-    client = OpenAI()
-except Exception as e:
-    print(f"Error initializing OpenAI client: {e}")
-    client = None
     
 # --- UPDATED PROMPT ---
 DAILY_RECAP_PROMPT = """
@@ -31,6 +34,83 @@ You are RememberMe AI. Your job is to report the key events of the day for a per
 **Factual Summaries (Use ONLY these facts):**
 {summaries}
 """
+# ========================================
+# MAP-REDUCE FOR BUSY DAYS
+# ========================================
+# When the day's summaries exceed the token budget, they are grouped into time
+# blocks, each block is condensed concurrently (map), and the block overviews
+# feed the recap prompt (reduce). Blocks are re-merged until they fit.
+
+RECAP_TOKEN_BUDGET = budget_for(TASK_RECAP)  # Input tokens for the summaries in one prompt
+RECAP_BLOCK_HOURS = 2
+MAP_WORKERS = 6
+
+BLOCK_SUMMARY_PROMPT = """
+You are condensing part of a day for a person with dementia.
+Using ONLY the conversation summaries below, write a factual overview of {label} in at most {max_words} words.
+Keep every person's name, and the main events in time order. Do not invent details.
+
+**Conversation Summaries:**
+{summaries}
+"""
+
+
+def group_into_blocks(lines: list[tuple[datetime, str]], hours: int, budget: int) -> list[list[tuple[datetime, str]]]:
+    """Split time-ordered (time, text) lines into blocks of `hours`, further split so no block exceeds `budget`."""
+    blocks, current, current_key, current_tokens = [], [], None, 0
+    for at, text in lines:
+        key = (at.date(), at.hour // hours)
+        tokens = count_tokens(text)
+        if current and (key != current_key or current_tokens + tokens > budget):
+            blocks.append(current)
+            current, current_tokens = [], 0
+        current.append((at, text))
+        current_key = key
+        current_tokens += tokens
+    if current:
+        blocks.append(current)
+    return blocks
+
+
+def _block_label(block: list[tuple[datetime, str]]) -> str:
+    start, end = block[0][0], block[-1][0]
+    return f"{start.strftime('%I:%M %p')} to {end.strftime('%I:%M %p')}"
+
+
+def _summarize_block(block: list[tuple[datetime, str]], max_words: int) -> tuple[datetime, str]:
+    label = _block_label(block)
+    summaries = "\n".join(f"- {text}" for _, text in block)
+    try:
+        completion = chat_completion(
+            task=TASK_RECAP_BLOCK,
+            messages=[{"role": "system", "content": BLOCK_SUMMARY_PROMPT.format(
+                label=label, max_words=max_words, summaries=summaries)}],
+            temperature=0.2,
+            max_tokens=max_words * 2
+        )
+        overview = completion.choices[0].message.content.strip()
+    except Exception as e:
+        print(f"❌ Error summarizing recap block ({label}): {e}")
+        overview = " ".join(text for _, text in block)[:max_words * 6]
+    return block[0][0], f"{label}: {overview}"
+
+
+def reduce_to_budget(lines: list[tuple[datetime, str]], budget: int = RECAP_TOKEN_BUDGET) -> list[tuple[datetime, str]]:
+    """Condense time-ordered (time, text) lines block by block until they fit in `budget` tokens."""
+    hours = RECAP_BLOCK_HOURS
+    while sum(count_tokens(text) for _, text in lines) > budget:
+        blocks = group_into_blocks(lines, hours, budget)
+        if len(blocks) == len(lines) and hours >= 24:
+            break  # Nothing left to merge
+        # Give each block an equal share of the budget for its overview
+        max_words = max(25, min(120, budget * 3 // (4 * len(blocks))))
+        with ThreadPoolExecutor(max_workers=MAP_WORKERS) as pool:
+            lines = list(pool.map(lambda b: _summarize_block(b, max_words), blocks))
+        print(f"🗂️ Recap map step: {len(blocks)} block(s) of up to {hours}h")
+        hours = min(hours * 2, 24)  # Merge wider blocks if another pass is needed
+    return lines
+
+
 def generate_daily_recap() -> str:
     """
     Fetches today's conversations and generates a narrative recap script.
@@ -47,9 +127,13 @@ def generate_daily_recap() -> str:
         print("No conversations found for today.")
         return "It was a quiet day today. I hope you had a chance to rest."
 
-    # 2. Format the summaries for the prompt
+    # 2. Format the summaries for the prompt (condensed by time block on busy days)
+    lines = [(s.get('generated_at') or datetime.now(), s.get('simple_summary', '')) for s in todays_summaries]
+    if sum(count_tokens(text) for _, text in lines) > RECAP_TOKEN_BUDGET:
+        print(f"📚 {len(lines)} conversations exceed the recap budget, using map-reduce")
+        lines = reduce_to_budget(lines)
     formatted_summaries = "\n".join(
-        [f"- {s.get('simple_summary', '')}" for s in todays_summaries]
+        [f"- {text}" for _, text in lines]
     )
 
     # --- NEW: Get Known People (Step 1) ---
@@ -68,8 +152,8 @@ def generate_daily_recap() -> str:
 
     # 3. Call the AI
     try:
-        completion = client.chat.completions.create(
-            model="gpt-4-turbo", # Use a stronger model for better grounding
+        completion = chat_completion(
+            task=TASK_RECAP,
             messages=[
                 {
                     "role": "system",
@@ -87,6 +171,286 @@ def generate_daily_recap() -> str:
         print(f"❌ Error generating recap script: {e}")
         return f"I'm sorry, I had trouble remembering today's events. Error: {e}"
 
+# ========================================
+# RUNNING (INCREMENTAL) DAILY RECAP
+# ========================================
+# Each saved conversation appends one paragraph to today's recap. Its audio is
+# re-rendered in the background once conversations stop arriving for a while
+# (debounced), so a busy hour costs one TTS call, not one per conversation.
+# "Tell Me About My Day" and the scheduled recap render any pending audio
+# on demand. Before rendering, a busy day's events are condensed by time block
+# (the same map-reduce as above) so the spoken script fits its token budget and
+# the TTS input limit.
+
+RECAP_GREETING = "Hello! Here is what happened today:"
+RECAP_CLOSING = "I hope you have a peaceful evening."
+QUIET_DAY_RECAP = "It was a quiet day today. I hope you had a chance to rest."
+RECAP_AUDIO_DIR = Path("recap_audio")
+CATCH_UP_WORKERS = 4
+RECAP_RENDER_DEBOUNCE_SECONDS = 120
+RECAP_SCRIPT_MAX_CHARS = MAX_TTS_CHARS
+RECAP_SCRIPT_TOKEN_BUDGET = min(RECAP_TOKEN_BUDGET, RECAP_SCRIPT_MAX_CHARS // 5)  # ~4 characters per token, with headroom
+
+RECAP_EVENT_PROMPT = """
+You are RememberMe AI, reporting one event of the day to a person with dementia.
+Write ONE short, simple paragraph (1-2 sentences) about the conversation summary below.
+
+**CRITICAL RULES:**
+1.  **DO NOT INVENT OR HALLUCINATE.** Use only the facts in the summary.
+2.  Speak directly to the person using "you". Mention the time of day if it is given.
+3.  If you see a name that is in the "Known People" list, use their name and relationship (e.g., "You spoke with Sarah, your daughter.").
+4.  Do not add a greeting or a closing.
+
+**Known People (Use these details):**
+{known_people}
+
+**Conversation Summary ({time}):**
+{summary}
+"""
+
+_recap_lock = threading.Lock()
+_recap_updates = ThreadPoolExecutor(max_workers=1, thread_name_prefix="running-recap")  # Serializes updates
+_render_lock = threading.Lock()
+_render_timers = {}  # day -> pending debounced render
+
+
+def _today_key() -> str:
+    return datetime.now().strftime('%Y-%m-%d')
+
+
+def _format_known_people() -> str:
+    people = get_all_people()
+    if not people:
+        return "No people profiles available."
+    return "\n".join([f"- {p.get('name')} ({p.get('relationship')})" for p in people])
+
+
+def _describe_event(summary: dict, known_people: str) -> str:
+    """One recap paragraph for a single conversation."""
+    simple_summary = summary.get('simple_summary', '')
+    if not client:
+        return simple_summary
+    at = summary.get('generated_at')
+    try:
+        completion = chat_completion(
+            task=TASK_RECAP_EVENT,
+            messages=[{
+                "role": "system",
+                "content": RECAP_EVENT_PROMPT.format(
+                    known_people=known_people,
+                    time=at.strftime('%I:%M %p') if isinstance(at, datetime) else "unknown time",
+                    summary=simple_summary
+                )
+            }],
+            temperature=0.2,
+            max_tokens=120
+        )
+        return completion.choices[0].message.content.strip()
+    except Exception as e:
+        print(f"❌ Error describing recap event: {e}")
+        return simple_summary
+
+
+def assemble_recap(events: list[dict]) -> str:
+    """The recap script, keeping the most recent events that fit in one TTS call (see build_recap_script)."""
+    if not events:
+        return QUIET_DAY_RECAP
+    texts = [e['text'] for e in events]
+    kept, length = [], len(RECAP_GREETING) + len(RECAP_CLOSING) + 200  # Room for separators and the lead line
+    for text in reversed(texts):
+        length += len(text) + 2
+        if length > RECAP_SCRIPT_MAX_CHARS and kept:
+            break
+        kept.insert(0, text)
+    skipped = len(texts) - len(kept)
+    if skipped:
+        kept.insert(0, f"Earlier today you had {skipped} other conversation{'s' if skipped != 1 else ''}.")
+    return "\n\n".join([RECAP_GREETING, *kept, RECAP_CLOSING])
+
+
+def build_recap_script(events: list[dict]) -> str:
+    """The spoken recap, with events condensed by time block when they exceed the script budget."""
+    lines = [(e['at'], e['text']) for e in events]
+    if sum(count_tokens(text) for _, text in lines) > RECAP_SCRIPT_TOKEN_BUDGET:
+        print(f"📚 {len(lines)} recap events exceed the script budget, condensing by time block")
+        lines = reduce_to_budget(lines, RECAP_SCRIPT_TOKEN_BUDGET)
+    return assemble_recap([{"text": text} for _, text in lines])
+
+
+def _render_recap_audio(day: str, script: str) -> str | None:
+    RECAP_AUDIO_DIR.mkdir(exist_ok=True)
+    target = RECAP_AUDIO_DIR / f"recap_{day}.mp3"
+    tmp = target.with_suffix(".tmp.mp3")
+    try:
+        text_to_speech(script, output_filename=str(tmp))
+        tmp.replace(target)  # Atomic, so the Patient View never plays a half-written file
+        return str(target)
+    except Exception as e:
+        print(f"⚠️ Could not render recap audio: {e}")
+        return None
+
+
+def update_running_recap(summaries: list[dict]) -> dict:
+    """Append conversations not yet in today's running recap, then schedule a debounced audio render."""
+    with _recap_lock:
+        day = _today_key()
+        recap = get_running_recap(day) or {"events": []}
+        included = {e['summary_id'] for e in recap.get('events', [])}
+        new = [s for s in summaries if s.get('_id') is not None and str(s['_id']) not in included]
+        if not new:
+            return recap
+
+        known_people = _format_known_people()
+        with ThreadPoolExecutor(max_workers=CATCH_UP_WORKERS) as pool:
+            texts = list(pool.map(lambda s: _describe_event(s, known_people), new))
+
+        events = recap.get('events', []) + [
+            {"summary_id": str(s['_id']), "at": s.get('generated_at') or datetime.now(), "text": text}
+            for s, text in zip(new, texts)
+        ]
+        events.sort(key=lambda e: e['at'])
+        recap = {**recap, "events": events, "script": assemble_recap(events)}
+        save_running_recap(day, {"events": events, "script": recap["script"]})
+        print(f"✅ Running recap updated ({len(events)} event(s))")
+    _schedule_render(day)
+    return recap
+
+
+def _schedule_render(day: str):
+    """(Re)start the debounce timer for a day's recap audio."""
+    with _render_lock:
+        if day in _render_timers:
+            _render_timers[day].cancel()
+        timer = threading.Timer(RECAP_RENDER_DEBOUNCE_SECONDS, render_running_recap_audio, args=(day,))
+        timer.daemon = True
+        _render_timers[day] = timer
+        timer.start()
+
+
+def _audio_is_current(recap: dict) -> bool:
+    audio_path = recap.get('audio_path')
+    return bool(audio_path) and recap.get('audio_script') == recap.get('script') and Path(audio_path).exists()
+
+
+def render_running_recap_audio(day: str) -> dict:
+    """Condense and render a day's recap audio now, unless it already matches the script."""
+    with _render_lock:
+        timer = _render_timers.pop(day, None)
+        if timer:
+            timer.cancel()
+    with _recap_lock:
+        recap = get_running_recap(day) or {}
+        if not recap.get('events') or _audio_is_current(recap):
+            return recap
+        events = recap['events']
+        if recap.get('script_events') == len(events):
+            script = recap['script']  # Already condensed; only the audio failed last time
+        else:
+            script = build_recap_script(events)
+        recap = {**recap, "script": script, "script_events": len(events)}
+        update = {"script": script, "script_events": len(events)}
+        audio_path = _render_recap_audio(day, script)
+        if audio_path:
+            recap.update(audio_path=audio_path, audio_script=script)
+            update.update(audio_path=audio_path, audio_script=script)
+        save_running_recap(day, update)
+        return recap
+
+
+def schedule_recap_update(summary: dict):
+    """Queue a newly saved conversation for today's running recap (returns immediately)."""
+    _recap_updates.submit(update_running_recap, [summary])
+
+
+def get_daily_recap() -> tuple[str, str | None]:
+    """
+    Today's recap script and audio path, normally straight from the running recap.
+
+    Conversations the running recap missed (e.g. saved while no update worker
+    was alive) are caught up first. The audio path is None if it could not be
+    rendered; callers then fall back to text_to_speech themselves.
+    """
+    todays_summaries = get_todays_conversations()
+    if not todays_summaries:
+        return QUIET_DAY_RECAP, None
+
+    day = _today_key()
+    recap = get_running_recap(day) or {}
+    included = {e['summary_id'] for e in recap.get('events', [])}
+    if any(str(s['_id']) not in included for s in todays_summaries):
+        update_running_recap(todays_summaries)
+        recap = get_running_recap(day) or recap
+
+    if not _audio_is_current(recap):
+        recap = render_running_recap_audio(day)  # Don't wait out the debounce when someone is listening
+    audio_path = recap.get('audio_path') if _audio_is_current(recap) else None
+    return recap.get('script') or assemble_recap(recap.get('events', [])), audio_path
+
+
+PERIOD_RECAP_PROMPT = """
+You are RememberMe AI. Tell a person with dementia what happened over the last {days} days, based ONLY on the daily or weekly overviews below.
+
+**CRITICAL RULES:**
+1.  **DO NOT INVENT OR HALLUCINATE.** Use only facts from the overviews.
+2.  Speak directly to the person using "you", in simple, warm language.
+3.  Mention each day or week briefly, oldest first, in under 150 words total.
+4.  If you see a name from the "Known People" list, use their name and relationship.
+5.  If there are no overviews, your entire response MUST be: "It has been a quiet time. I hope you have been resting."
+
+**Known People (Use these details):**
+{known_people}
+
+**Overviews (Use ONLY these facts):**
+{overviews}
+"""
+
+def generate_period_recap(days_back: int = 7) -> str:
+    """
+    Recap of a wider date range built from day/week rollups instead of individual conversations.
+    """
+    if not client:
+        return "Error: OpenAI client not initialized."
+
+    print(f"📝 Generating {days_back}-day recap script from rollups...")
+
+    rollups = [r for r in get_period_rollups(days_back) if r.get('conversation_count')]
+    if not rollups:
+        return "It has been a quiet time. I hope you have been resting."
+
+    formatted_overviews = "\n".join(
+        [f"- {r['start'].strftime('%A, %B %d')}: {r.get('summary', '')}" for r in rollups]
+    )
+
+    try:
+        people = get_all_people()
+        formatted_people = "\n".join(
+            [f"- {p.get('name')} ({p.get('relationship')})" for p in people]
+        ) if people else "No people profiles available."
+    except Exception as e:
+        print(f"Warning: Could not fetch people list. {e}")
+        formatted_people = "Error fetching people list."
+
+    try:
+        completion = chat_completion(
+            task=TASK_RECAP,
+            messages=[
+                {
+                    "role": "system",
+                    "content": PERIOD_RECAP_PROMPT.format(
+                        days=days_back,
+                        overviews=formatted_overviews,
+                        known_people=formatted_people
+                    )
+                }
+            ]
+        )
+        recap_script = completion.choices[0].message.content
+        print("✅ Period recap script generated!")
+        return recap_script
+    except Exception as e:
+        print(f"❌ Error generating period recap script: {e}")
+        return f"I'm sorry, I had trouble remembering the last few days. Error: {e}"
+
 if __name__ == "__main__":
     print("--- Testing Recap Generator Module ---")
     recap = generate_daily_recap()
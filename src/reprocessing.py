@@ -0,0 +1,130 @@
+# src/reprocessing.py
+"""
+Re-summarize stored conversation segments after a prompt or model change.
+
+Segments are streamed from Mongo in _id order, summarized concurrently with
+bounded parallelism (every call still goes through the LLM gateway's rate
+limit), and written back with one bulk upsert per batch, replacing any legacy
+unlinked summary of the same conversation. A checkpoint with the last
+completed _id is saved after each batch, so an interrupted run (or one stopped
+by a database error, which is raised) resumes where it stopped.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import time
+from src.database import (
+    iter_segment_batches, count_segments, bulk_upsert_summaries, delete_unlinked_summaries,
+    get_checkpoint, save_checkpoint
+)
+from src.schemas import ConversationSummary
+from src.summarizer import summarize_transcript_simple, summarize_transcript_caregiver, summarize_transcript_clinical
+from src.model_router import model_for, TASK_SIMPLE_SUMMARY, TASK_CAREGIVER_SUMMARY, TASK_CLINICAL
+
+DEFAULT_BATCH_SIZE = 50
+DEFAULT_PARALLELISM = 4
+
+
+def _is_error_text(text: str) -> bool:
+    return not text or text.startswith("Error")
+
+
+def summarize_segment(segment: dict) -> dict | None:
+    """Summary document for one stored segment, or None if summarization failed."""
+    transcript = segment.get('transcript', '')
+    clinical_data = summarize_transcript_clinical(transcript)
+    if "error" in clinical_data or clinical_data.get("participant") == "Error":
+        return None
+    simple_summary = summarize_transcript_simple(transcript)
+    caregiver_summary = summarize_transcript_caregiver(transcript)
+    # The text summarizers return "Error…" instead of raising; never write that over a stored summary
+    if _is_error_text(simple_summary) or _is_error_text(caregiver_summary):
+        return None
+
+    summary = ConversationSummary(
+        patient_id=segment.get('patient_id', 'default_patient'),  # Never reassign a household's summaries
+        segment_id=str(segment['_id']),
+        generated_at=segment.get('end_time') or segment.get('start_time') or datetime.now(),
+        simple_summary=simple_summary,
+        caregiver_summary=caregiver_summary,
+        **clinical_data
+    )
+    summary_data = summary.model_dump(by_alias=True, exclude_none=True)
+    summary_data.pop('_id', None)
+    summary_data['reprocessed_at'] = datetime.now()
+    summary_data['models'] = {task: model_for(task) for task in (TASK_SIMPLE_SUMMARY, TASK_CAREGIVER_SUMMARY, TASK_CLINICAL)}
+    return summary_data
+
+
+def _refresh_derived_data(stored: list[dict]):
+    """Re-embed the rewritten summaries and queue their day/week rollups for rebuilding."""
+    from src.summary_index import index_summaries
+    from src.rollups import mark_rollups_stale
+
+    index_summaries(stored, reindex=True)
+    for day in {s['generated_at'].date() for s in stored if isinstance(s.get('generated_at'), datetime)}:
+        mark_rollups_stale(datetime.combine(day, datetime.min.time()))
+
+
+def reprocess_segments(run_name: str = "default", batch_size: int = DEFAULT_BATCH_SIZE,
+                       parallelism: int = DEFAULT_PARALLELISM, since: datetime | None = None,
+                       limit: int | None = None, restart: bool = False) -> dict:
+    """
+    Re-summarize segments, resuming from the checkpoint stored under `run_name`.
+
+    Returns the final checkpoint (processed/failed counts, last _id, done flag).
+    """
+    checkpoint = {} if restart else get_checkpoint(run_name)
+    if checkpoint.get('done') and not restart:
+        print(f"✅ Run '{run_name}' already finished ({checkpoint.get('processed', 0)} segments). Use --restart to run again.")
+        return checkpoint
+
+    after_id = checkpoint.get('last_id')
+    processed, failed = checkpoint.get('processed', 0), checkpoint.get('failed', 0)
+    remaining = count_segments(after_id, since)
+    if limit is not None:
+        remaining = min(remaining, limit)
+    print(f"🔁 Reprocessing {remaining} segment(s) for run '{run_name}'"
+          + (f", resuming after {after_id}" if after_id else ""))
+
+    started = time.perf_counter()
+    done_this_run = 0
+    with ThreadPoolExecutor(max_workers=parallelism) as pool:
+        for batch in iter_segment_batches(after_id, batch_size, since):
+            if limit is not None:
+                batch = batch[:limit - done_this_run]
+                if not batch:
+                    break
+            results = list(pool.map(summarize_segment, batch))
+            summaries = [r for r in results if r is not None]
+            stored = bulk_upsert_summaries(summaries)  # Raises on failure, before the checkpoint moves
+            if len(stored) < len(summaries):
+                raise RuntimeError(f"Only {len(stored)} of {len(summaries)} summaries were stored for the batch "
+                                   f"after {after_id}")
+            if stored:
+                _refresh_derived_data(stored)
+
+            processed += len(summaries)
+            failed += len(batch) - len(summaries)
+            done_this_run += len(batch)
+            after_id = str(batch[-1]['_id'])
+            # Only advance the checkpoint once the batch is written; upserts make a replay harmless
+            save_checkpoint(run_name, {"last_id": after_id, "processed": processed, "failed": failed,
+                                       "since": since, "done": False})
+
+            rate = done_this_run / max(time.perf_counter() - started, 1e-6) * 60
+            print(f"   {done_this_run}/{remaining} segments ({failed} failed) · {rate:.1f} segments/min")
+            if limit is not None and done_this_run >= limit:
+                break
+
+    finished = limit is None or done_this_run < limit
+    checkpoint = {"last_id": after_id, "processed": processed, "failed": failed, "since": since, "done": finished}
+    save_checkpoint(run_name, checkpoint)
+    print(f"🎉 Reprocessing {'finished' if finished else 'paused'}: {processed} summarized, {failed} failed")
+    return checkpoint
+
+
+def remove_unlinked_summaries() -> int:
+    """After a full run with no failures, drop legacy summaries that could never be matched to their segment."""
+    removed = delete_unlinked_summaries()
+    print(f"🧹 Removed {removed} unlinked legacy summaries")
+    return removed
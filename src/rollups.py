@@ -0,0 +1,186 @@
+# src/rollups.py
+"""
+Hierarchical daily and weekly rollups of conversation summaries.
+
+Saving a conversation marks its day and week rollups stale; the background
+scheduler rebuilds stale rollups (days first, then weeks from the day texts).
+Each rollup stores a short narrative plus mood, concern and topic counts, so
+questions about a month or more read a handful of rollups instead of dozens
+of individual summaries.
+"""
+from collections import Counter
+from datetime import datetime, timedelta, time
+from time import monotonic
+from dotenv import load_dotenv
+from src.model_router import TASK_ROLLUP
+from src.llm_gateway import client, chat_completion
+from src.token_budget import fit_lines
+from src.database import (
+    get_conversations_between, mark_rollup_stale, get_stale_rollups, save_rollup, get_rollups
+)
+
+load_dotenv()
+
+
+ROLLUP_DAY = "day"
+ROLLUP_WEEK = "week"
+
+DAILY_ROLLUP_PROMPT = """
+You are summarizing one day of conversations for a CAREGIVER monitoring a dementia patient.
+Using ONLY the conversation summaries below, write 2-3 sentences (under 80 words) in the third person
+covering who the patient talked to, their overall mood, and any concerns. Do not invent details.
+
+**Conversation Summaries ({date}):**
+{summaries}
+"""
+
+WEEKLY_ROLLUP_PROMPT = """
+You are summarizing one week for a CAREGIVER monitoring a dementia patient.
+Using ONLY the daily overviews below, write 3-4 sentences (under 100 words) in the third person
+describing mood trends, recurring concerns and notable events. Do not invent details.
+
+**Daily Overviews (week of {date}):**
+{summaries}
+"""
+
+
+# ========================================
+# PERIOD HELPERS
+# ========================================
+
+def period_bounds(period: str, moment: datetime) -> tuple[datetime, datetime]:
+    """Start (inclusive) and end (exclusive) of the day or ISO week containing `moment`."""
+    day_start = datetime.combine(moment.date(), time.min)
+    if period == ROLLUP_DAY:
+        return day_start, day_start + timedelta(days=1)
+    week_start = day_start - timedelta(days=day_start.weekday())
+    return week_start, week_start + timedelta(days=7)
+
+
+def mark_rollups_stale(moment: datetime, only_missing: bool = False):
+    """Flag the day and week rollups that contain `moment` for rebuilding."""
+    for period in (ROLLUP_DAY, ROLLUP_WEEK):
+        mark_rollup_stale(period, *period_bounds(period, moment), only_missing=only_missing)
+
+
+def backfill_rollups(days_back: int = 90):
+    """Queue rollups for any day/week in the last N days that has never been built."""
+    today = datetime.now()
+    for offset in range(days_back + 1):
+        mark_rollups_stale(today - timedelta(days=offset), only_missing=True)
+
+
+# ========================================
+# BUILDING ROLLUPS
+# ========================================
+
+def _count(values) -> list[dict]:
+    # Stored as a list, not a dict: concern/topic text may contain '.' or '$', which Mongo keys reject
+    counts = Counter(v.strip() for v in values if v and v.strip() and v.strip() != "None")
+    return [{"value": value, "count": n} for value, n in counts.most_common()]
+
+
+def _narrate(prompt_template: str, date_label: str, lines: list[str]) -> str:
+    if not lines:
+        return "No conversations recorded."
+    lines = fit_lines(lines, TASK_ROLLUP)
+    if not client:
+        return " ".join(lines)[:500]
+    try:
+        completion = chat_completion(
+            task=TASK_ROLLUP,
+            messages=[{"role": "system", "content": prompt_template.format(
+                date=date_label, summaries="\n".join(f"- {line}" for line in lines))}],
+            temperature=0.2,
+            max_tokens=200
+        )
+        return completion.choices[0].message.content.strip()
+    except Exception as e:
+        print(f"❌ Error generating rollup narrative: {e}")
+        return " ".join(lines)[:500]
+
+
+def build_day_rollup(start: datetime, end: datetime) -> dict:
+    conversations = get_conversations_between(start, end)
+    lines = [
+        f"{c['generated_at'].strftime('%I:%M %p')}: {c.get('caregiver_summary') or c.get('simple_summary', '')} "
+        f"(mood: {c.get('patient_mood', 'unknown')})"
+        for c in conversations
+    ]
+    return {
+        "end": end,
+        "conversation_count": len(conversations),
+        "mood_counts": _count(c.get('patient_mood', 'unknown').lower() for c in conversations),
+        "concern_counts": _count(concern for c in conversations for concern in c.get('key_concerns', [])),
+        "topic_counts": _count(topic for c in conversations for topic in c.get('topics_discussed', [])),
+        "summary": _narrate(DAILY_ROLLUP_PROMPT, start.strftime('%A, %B %d'), lines),
+    }
+
+
+def build_week_rollup(start: datetime, end: datetime) -> dict:
+    days = [d for d in get_rollups(ROLLUP_DAY, start, end) if d.get('conversation_count')]
+
+    def merged(field):
+        total = Counter()
+        for day in days:
+            for item in day.get(field, []):
+                total[item["value"]] += item["count"]
+        return [{"value": value, "count": n} for value, n in total.most_common()]
+
+    lines = [f"{d['start'].strftime('%A')}: {d.get('summary', '')}" for d in days]
+    return {
+        "end": end,
+        "conversation_count": sum(d.get('conversation_count', 0) for d in days),
+        "mood_counts": merged("mood_counts"),
+        "concern_counts": merged("concern_counts"),
+        "topic_counts": merged("topic_counts"),
+        "summary": _narrate(WEEKLY_ROLLUP_PROMPT, start.strftime('%B %d'), lines),
+    }
+
+
+def refresh_stale_rollups(limit: int = 50, time_budget_s: float | None = None) -> int:
+    """
+    Rebuild stale rollups, days before weeks. Returns the number rebuilt.
+
+    With time_budget_s, stops starting new rebuilds once the budget is spent;
+    the rest stay flagged for the next call.
+    """
+    deadline = monotonic() + time_budget_s if time_budget_s is not None else None
+    rebuilt = 0
+    for period, builder in ((ROLLUP_DAY, build_day_rollup), (ROLLUP_WEEK, build_week_rollup)):
+        for rollup in get_stale_rollups(period, limit=limit):
+            if deadline is not None and monotonic() >= deadline:
+                break
+            start = rollup['start']
+            end = rollup.get('end') or period_bounds(period, start)[1]
+            save_rollup(period, start, builder(start, end), stale_version=rollup.get('stale_version'))
+            rebuilt += 1
+    if rebuilt:
+        print(f"✅ Refreshed {rebuilt} rollup(s)")
+    return rebuilt
+
+
+# ========================================
+# READING ROLLUPS
+# ========================================
+
+def format_rollup(rollup: dict) -> str:
+    """One prompt-ready block describing a rollup."""
+    if rollup.get('period') == ROLLUP_WEEK:
+        label = f"Week of {rollup['start'].strftime('%B %d')}"
+    else:
+        label = rollup['start'].strftime('%A, %B %d')
+    moods = ', '.join(f"{m['value']} {m['count']}" for m in rollup.get('mood_counts', [])) or 'none'
+    concerns = ', '.join(f"{c['value']} ({c['count']}x)" for c in rollup.get('concern_counts', [])[:5]) or 'None'
+    return (f"{label} - {rollup.get('conversation_count', 0)} conversations:\n"
+            f"- Overview: {rollup.get('summary', '')}\n"
+            f"- Mood counts: {moods}\n"
+            f"- Top concerns: {concerns}")
+
+
+def get_period_rollups(days_back: int) -> list[dict]:
+    """Daily rollups for windows up to two weeks, weekly rollups beyond that."""
+    since = datetime.combine((datetime.now() - timedelta(days=days_back)).date(), time.min)
+    if days_back <= 14:
+        return get_rollups(ROLLUP_DAY, since)
+    return get_rollups(ROLLUP_WEEK, period_bounds(ROLLUP_WEEK, since)[0])
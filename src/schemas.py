@@ -21,6 +21,7 @@ class ConversationSegment(BaseModel):
 
 class ConversationSummary(BaseModel):
     id: Optional[str] = Field(default=None, alias="_id")
+    patient_id: str = "default_patient"
     segment_id: str
     generated_at: datetime = Field(default_factory=datetime.utcnow)
     simple_summary: str
@@ -63,8 +64,23 @@ class PersonProfile(BaseModel):
     name: str
     relationship: str
     photo_url: str
+    photo_hash: Optional[str] = None  # Content hash of the photo, keys its cached thumbnails
     notes: Optional[str] = ""
-    face_encoding: Optional[List[float]] = None
+    face_encoding: Optional[List[float]] = None  # Stored as packed float32 Binary, see src/face_gallery.py
+    face_encodings: Optional[List[List[float]]] = None  # One per enrollment photo; face_encoding holds their centroid
+
+    class Config:
+        populate_by_name = True
+        arbitrary_types_allowed = True
+
+
+# --- Home Information Schema ---
+
+class HomeInfo(BaseModel):
+    id: Optional[str] = Field(default=None, alias="_id")
+    patient_id: str = "default_patient"
+    topic: str  # e.g. "Bathroom"
+    details: str  # e.g. "Down the hall, second door on the left"
 
     class Config:
         populate_by_name = True
@@ -82,4 +98,25 @@ class AppSettings(BaseModel):
 
     class Config:
         populate_by_name = True
-        arbitrary_types_allowed = True
\ No newline at end of file
+        arbitrary_types_allowed = True
+
+# --- Emergency Alert Schema ---
+
+class EmergencyAlert(BaseModel):
+    id: Optional[str] = Field(default=None, alias="_id")
+    patient_id: str = "default_patient"
+    emergency_type: str
+    transcript: str = ""
+    source: str = "full"  # "partial" (while recording) or "full" transcript
+    speaker_identity: str = "patient"
+    detected_at: datetime = Field(default_factory=datetime.now)
+    speech_to_detection_s: Optional[float] = None
+    notifications: dict = Field(default_factory=dict)  # Notifier name -> {status, attempts, latency_ms, error}
+    notification_latency_ms: Optional[float] = None  # Detection to first successful external (webhook/email) notification
+    dashboard_latency_ms: Optional[float] = None  # Detection to the dashboard banner write
+    acknowledged: bool = False
+    acknowledged_at: Optional[datetime] = None
+
+    class Config:
+        populate_by_name = True
+        arbitrary_types_allowed = True
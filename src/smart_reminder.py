@@ -1,19 +1,16 @@
 import os
-from openai import OpenAI
 from dotenv import load_dotenv
 # Corrected import name based on previous steps
 from src.database import get_todays_conversations
 from src.text_to_speech import text_to_speech
+from src.model_router import TASK_REMINDER
+from src.llm_gateway import client, chat_completion
+from src.token_budget import fit_lines
 # We don't strictly need Medication schema here, but can use dict
 # from src.schemas import Medication
 
 load_dotenv()
 
-try:
-    client = OpenAI()
-except Exception as e:
-    print(f"Error initializing OpenAI client: {e}")
-    client = None
 
 # This is the AI "brain" for the smart reminder feature.
 SMART_REMINDER_PROMPT = """
@@ -70,7 +67,7 @@ def generate_smart_reminder(medication: dict) -> str | None:
             concerns = s.get('key_concerns', [])
             if concerns:
                  context_items.append(f"  - Concerns noted: {', '.join(concerns)}")
-        context_text = "\n".join(context_items)
+        context_text = "\n".join(fit_lines(context_items, TASK_REMINDER))
 
 
     # 2. Format the prompt with all the necessary information
@@ -85,9 +82,8 @@ def generate_smart_reminder(medication: dict) -> str | None:
     try:
         # 3. Call GPT to generate the script
         print("🤖 Calling GPT to generate reminder script...")
-        completion = client.chat.completions.create(
-            # Using GPT-4 for better adherence to instructions and context linking
-            model="gpt-4", 
+        completion = chat_completion(
+            task=TASK_REMINDER,
             messages=[{"role": "system", "content": prompt}]
         )
         reminder_script = completion.choices[0].message.content
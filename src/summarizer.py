@@ -1,18 +1,17 @@
 # src/summarizer.py
 import os
 import json
-import traceback
-from openai import OpenAI
 from dotenv import load_dotenv
 from src.database import get_all_people
+from src.model_router import TASK_SIMPLE_SUMMARY, TASK_CAREGIVER_SUMMARY, TASK_CLINICAL
+from src.llm_gateway import client, chat_completion
+from src.token_budget import compress_transcript
+from src.telemetry import get_logger, span
 
 load_dotenv()
 
-try:
-    client = OpenAI()
-except Exception as e:
-    print(f"Error initializing OpenAI client: {e}")
-    client = None
+log = get_logger(__name__)
+
 
 # ========================================
 # PATIENT SUMMARY (for patient to hear)
@@ -129,7 +128,8 @@ def summarize_transcript_simple(transcript: str) -> str:
     if not transcript or len(transcript.strip()) < 10:
         return "The recording was too short or unclear."
 
-    print("🧠 Generating patient summary...")
+    log.debug("🧠 Generating patient summary...")
+    transcript = compress_transcript(transcript, TASK_SIMPLE_SUMMARY)
 
     try:
         people = get_all_people()
@@ -140,35 +140,36 @@ def summarize_transcript_simple(transcript: str) -> str:
                 [f"- {p.get('name')} ({p.get('relationship')})" for p in people]
             )
     except Exception as e:
-        print(f"Warning: Could not fetch people list. {e}")
+        log.warning(f"Warning: Could not fetch people list. {e}")
         formatted_people = "Error fetching people list."
 
     try:
-        completion = client.chat.completions.create(
-            model="gpt-4",
-            messages=[
-                {
-                    "role": "system",
-                    "content": SIMPLE_SUMMARY_PROMPT.format(
-                        transcript=transcript,
-                        known_people=formatted_people
-                    )
-                }
-            ],
-            temperature=0.1,
-            max_tokens=100
-        )
+        with span("simple_summary"):
+            completion = chat_completion(
+                task=TASK_SIMPLE_SUMMARY,
+                messages=[
+                    {
+                        "role": "system",
+                        "content": SIMPLE_SUMMARY_PROMPT.format(
+                            transcript=transcript,
+                            known_people=formatted_people
+                        )
+                    }
+                ],
+                temperature=0.1,
+                max_tokens=100
+            )
         summary = completion.choices[0].message.content.strip()
 
         if len(summary) > 200:
-            print("⚠️ Summary too long, truncating.")
+            log.warning("⚠️ Summary too long, truncating.")
             summary = summary[:197] + "..."
 
-        print("✅ Patient summary complete!")
+        log.debug("✅ Patient summary complete!")
         return summary
 
     except Exception as e:
-        print(f"❌ Error during patient summarization: {e}")
+        log.error(f"❌ Error during patient summarization: {e}")
         return "Error creating summary."
 
 def summarize_transcript_caregiver(transcript: str) -> str:
@@ -178,7 +179,8 @@ def summarize_transcript_caregiver(transcript: str) -> str:
     if not transcript or len(transcript.strip()) < 10:
         return "Recording too short or unclear to analyze."
 
-    print("🩺 Generating caregiver summary...")
+    log.debug("🩺 Generating caregiver summary...")
+    transcript = compress_transcript(transcript, TASK_CAREGIVER_SUMMARY)
 
     try:
         people = get_all_people()
@@ -189,35 +191,36 @@ def summarize_transcript_caregiver(transcript: str) -> str:
                 [f"- {p.get('name')} ({p.get('relationship')})" for p in people]
             )
     except Exception as e:
-        print(f"Warning: Could not fetch people list. {e}")
+        log.warning(f"Warning: Could not fetch people list. {e}")
         formatted_people = "Error fetching people list."
 
     try:
-        completion = client.chat.completions.create(
-            model="gpt-4",
-            messages=[
-                {
-                    "role": "system",
-                    "content": CAREGIVER_SUMMARY_PROMPT.format(
-                        transcript=transcript,
-                        known_people=formatted_people
-                    )
-                }
-            ],
-            temperature=0.1,
-            max_tokens=150
-        )
+        with span("caregiver_summary"):
+            completion = chat_completion(
+                task=TASK_CAREGIVER_SUMMARY,
+                messages=[
+                    {
+                        "role": "system",
+                        "content": CAREGIVER_SUMMARY_PROMPT.format(
+                            transcript=transcript,
+                            known_people=formatted_people
+                        )
+                    }
+                ],
+                temperature=0.1,
+                max_tokens=150
+            )
         summary = completion.choices[0].message.content.strip()
 
         if len(summary) > 300:
-            print("⚠️ Caregiver summary too long, truncating.")
+            log.warning("⚠️ Caregiver summary too long, truncating.")
             summary = summary[:297] + "..."
 
-        print("✅ Caregiver summary complete!")
+        log.debug("✅ Caregiver summary complete!")
         return summary
 
     except Exception as e:
-        print(f"❌ Error during caregiver summarization: {e}")
+        log.error(f"❌ Error during caregiver summarization: {e}")
         return "Error creating caregiver summary."
 
 def summarize_transcript_clinical(transcript: str) -> dict:
@@ -233,7 +236,8 @@ def summarize_transcript_clinical(transcript: str) -> dict:
             "key_concerns": []
         }
 
-    print("🩺 Generating clinical summary...")
+    log.debug("🩺 Generating clinical summary...")
+    transcript = compress_transcript(transcript, TASK_CLINICAL)
 
     prompt_content = CLINICAL_SUMMARY_PROMPT.format(
         transcript=transcript,
@@ -241,15 +245,16 @@ def summarize_transcript_clinical(transcript: str) -> dict:
     )
 
     try:
-        completion = client.chat.completions.create(
-            model="gpt-4",
-            response_format={"type": "json_object"},
-            messages=[
-                {"role": "system", "content": prompt_content}
-            ],
-            temperature=0.1,
-            max_tokens=300
-        )
+        with span("clinical_summary"):
+            completion = chat_completion(
+                task=TASK_CLINICAL,
+                response_format={"type": "json_object"},
+                messages=[
+                    {"role": "system", "content": prompt_content}
+                ],
+                temperature=0.1,
+                max_tokens=300
+            )
 
         clinical_data = json.loads(completion.choices[0].message.content)
 
@@ -258,12 +263,11 @@ def summarize_transcript_clinical(transcript: str) -> dict:
             if field not in clinical_data:
                 clinical_data[field] = "Unknown" if field != "key_concerns" else []
 
-        print("✅ Clinical summary complete!")
+        log.debug("✅ Clinical summary complete!")
         return clinical_data
 
     except Exception as e:
-        print(f"❌ Error in clinical summarization:")
-        traceback.print_exc()
+        log.exception("❌ Error in clinical summarization")
 
         return {
             "participant": "Error",
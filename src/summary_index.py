@@ -0,0 +1,172 @@
+# src/summary_index.py
+"""
+Local embedding index over conversation summaries.
+
+Each summary is embedded once (when it is saved) and stored in a numpy
+matrix persisted to data/summary_index.npz. The caregiver chatbot retrieves
+only the top-k most relevant conversations for a question, so the prompt
+stays the same size whether it covers a week or months of history.
+"""
+import os
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+import numpy as np
+from dotenv import load_dotenv
+from src.llm_gateway import client, create_embeddings
+
+load_dotenv()
+
+INDEX_PATH = Path(os.getenv("SUMMARY_INDEX_PATH", "data/summary_index.npz"))
+EMBEDDING_MODEL = "text-embedding-3-small"
+EMBED_BATCH_SIZE = 256
+DEFAULT_TOP_K = 12
+
+
+def summary_text(doc: dict) -> str:
+    """Text that represents a conversation in the index."""
+    summary = doc.get('caregiver_summary') or doc.get('simple_summary', '')
+    topics = ', '.join(doc.get('topics_discussed', []))
+    concerns = ', '.join(doc.get('key_concerns', []))
+    return (f"{summary}\nParticipant: {doc.get('participant', 'Unknown')}\nTopics: {topics}\n"
+            f"Mood: {doc.get('patient_mood', 'unknown')}\nConcerns: {concerns or 'None'}")
+
+
+def embed_texts(texts: list[str]) -> np.ndarray:
+    """L2-normalized float32 embeddings, one row per text."""
+    if not client:
+        raise ConnectionError("OpenAI client not initialized.")
+    vectors = []
+    for i in range(0, len(texts), EMBED_BATCH_SIZE):
+        response = create_embeddings(texts[i:i + EMBED_BATCH_SIZE], model=EMBEDDING_MODEL)
+        vectors.extend(item.embedding for item in response.data)
+    matrix = np.asarray(vectors, dtype=np.float32)
+    matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+    return matrix
+
+
+class SummaryIndex:
+    """Append-only matrix of summary embeddings with their IDs and timestamps."""
+
+    def __init__(self, path: Path = INDEX_PATH):
+        self.path = Path(path)
+        self.vectors = np.empty((0, 0), dtype=np.float32)
+        self.ids = np.empty(0, dtype=object)
+        self.times = np.empty(0, dtype="datetime64[s]")
+        self._id_set = set()
+        self._loaded_mtime = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, summary_id: str) -> bool:
+        return summary_id in self._id_set
+
+    def refresh(self):
+        """(Re)load from disk if another process has written a newer file."""
+        try:
+            mtime = self.path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime == self._loaded_mtime:
+            return
+        with self._lock, np.load(self.path, allow_pickle=False) as data:
+            self.vectors = data["vectors"]
+            self.ids = data["ids"].astype(object)
+            self.times = data["times"]
+            self._id_set = set(self.ids)
+            self._loaded_mtime = mtime
+
+    def add(self, ids: list[str], vectors: np.ndarray, times: list[datetime], replace: bool = False):
+        """Append new entries and persist. Already-indexed IDs are skipped, or re-embedded with replace=True."""
+        with self._lock:
+            if replace and self._id_set & set(ids):
+                stale = np.isin(self.ids, list(ids))
+                self.vectors, self.ids, self.times = self.vectors[~stale], self.ids[~stale], self.times[~stale]
+                self._id_set.difference_update(ids)
+            keep = [i for i, sid in enumerate(ids) if sid not in self._id_set]
+            if not keep:
+                return
+            new_vectors = np.asarray(vectors, dtype=np.float32)[keep]
+            self.vectors = new_vectors if not len(self.ids) else np.vstack([self.vectors, new_vectors])
+            self.ids = np.concatenate([self.ids, np.array([ids[i] for i in keep], dtype=object)])
+            self.times = np.concatenate([self.times, np.array([times[i] for i in keep], dtype="datetime64[s]")])
+            self._id_set.update(ids[i] for i in keep)
+            self._save()
+
+    def _save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp.npz")
+        np.savez(tmp, vectors=self.vectors, ids=self.ids.astype(str), times=self.times)
+        tmp.replace(self.path)  # Atomic swap so readers never see a partial file
+        self._loaded_mtime = self.path.stat().st_mtime_ns
+
+    def search(self, query_vector: np.ndarray, k: int = DEFAULT_TOP_K, since: datetime | None = None) -> list[tuple[str, float]]:
+        """Top-k (summary_id, cosine similarity) pairs, optionally restricted to entries after `since`."""
+        if not len(self.ids):
+            return []
+        candidates = np.arange(len(self.ids))
+        if since is not None:
+            candidates = np.flatnonzero(self.times >= np.datetime64(since, "s"))
+            if not len(candidates):
+                return []
+        scores = self.vectors[candidates] @ np.asarray(query_vector, dtype=np.float32)
+        k = min(k, len(candidates))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.ids[candidates[i]], float(scores[i])) for i in top]
+
+
+_index = SummaryIndex()
+
+
+def get_index() -> SummaryIndex:
+    _index.refresh()
+    return _index
+
+
+def index_summaries(docs: list[dict], reindex: bool = False) -> int:
+    """Embed and add summary documents that are not yet indexed (all of them with reindex). Returns number added."""
+    index = get_index()
+    docs = [d for d in docs if d.get('_id') is not None and (reindex or str(d['_id']) not in index)]
+    if not docs:
+        return 0
+    try:
+        vectors = embed_texts([summary_text(d) for d in docs])
+        index.add([str(d['_id']) for d in docs], vectors, [d.get('generated_at') or datetime.now() for d in docs],
+                  replace=reindex)
+        print(f"✅ Indexed {len(docs)} summary embedding(s).")
+        return len(docs)
+    except Exception as e:
+        print(f"❌ Error indexing summaries: {e}")
+        return 0
+
+
+def retrieve_relevant_conversations(question: str, days_back: int = 7, k: int = DEFAULT_TOP_K) -> list[dict]:
+    """
+    The k conversations from the last `days_back` days most relevant to a question, oldest first.
+
+    Small windows (k or fewer conversations) are returned whole without embedding
+    anything; summaries missing from the index are backfilled before searching.
+    """
+    from src.database import get_recent_conversation_ids, get_conversations_by_ids
+
+    recent_ids = get_recent_conversation_ids(days=days_back)
+    if len(recent_ids) <= k:
+        return get_conversations_by_ids(recent_ids)
+
+    index = get_index()
+    missing = [summary_id for summary_id in recent_ids if summary_id not in index]
+    if missing:
+        index_summaries(get_conversations_by_ids(missing))
+
+    try:
+        query_vector = embed_texts([question])[0]
+        hits = get_index().search(query_vector, k=k, since=datetime.now() - timedelta(days=days_back))
+        hit_ids = [summary_id for summary_id, _ in hits]
+    except Exception as e:
+        print(f"⚠️ Retrieval failed, using most recent conversations: {e}")
+        hit_ids = recent_ids[:k]
+
+    return get_conversations_by_ids(hit_ids)
@@ -0,0 +1,238 @@
+# src/telemetry.py
+"""
+Lightweight tracing, metrics and structured logging.
+
+- `span("transcription")` times a pipeline stage into a latency histogram and
+  counts its errors; nested spans share a trace id for the log lines.
+- `increment` / `observe` record counters and histograms in-process.
+- `start_metrics_server()` serves them in Prometheus text format on
+  localhost (METRICS_PORT, default 9100) for scraping or a quick curl.
+- `get_logger(name)` returns a logger whose records carry key=value fields,
+  or one JSON object per line with LOG_FORMAT=json.
+- `sampled(n)` keeps per-frame logging to one line every FRAME_LOG_EVERY frames.
+
+Only the standard library is used, so this is safe to import everywhere.
+"""
+from collections import defaultdict
+from contextlib import contextmanager
+import contextvars
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")  # "text" or "json"
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9100"))
+FRAME_LOG_EVERY = int(os.getenv("FRAME_LOG_EVERY", "1000"))  # 10 s of 10 ms frames
+
+METRIC_PREFIX = "rememberme"
+LATENCY_BUCKETS_SECONDS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+_lock = threading.Lock()
+_counters = defaultdict(float)
+_histograms = {}
+_trace_id = contextvars.ContextVar("trace_id", default=None)
+_metrics_server = None
+
+
+# ========================================
+# LOGGING
+# ========================================
+
+class _Formatter(logging.Formatter):
+    """Appends a record's `fields` (and trace id) as key=value pairs, or renders everything as JSON."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        fields = dict(getattr(record, "fields", None) or {})
+        trace_id = _trace_id.get()
+        if trace_id:
+            fields.setdefault("trace_id", trace_id)
+        if LOG_FORMAT == "json":
+            entry = {"ts": round(record.created, 3), "level": record.levelname, "logger": record.name,
+                     "message": record.getMessage(), **fields}
+            if record.exc_info:
+                entry["exception"] = self.formatException(record.exc_info)
+            return json.dumps(entry, default=str, ensure_ascii=False)
+        line = f"{self.formatTime(record, '%H:%M:%S')} {record.levelname:<7} {record.name}: {record.getMessage()}"
+        if fields:
+            line += "  " + " ".join(f"{k}={v}" for k, v in fields.items())
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        return line
+
+
+def _configure_root() -> logging.Logger:
+    root = logging.getLogger(METRIC_PREFIX)
+    if not root.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(_Formatter())
+        root.addHandler(handler)
+        root.setLevel(LOG_LEVEL)
+        root.propagate = False
+    return root
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Logger under the project's root logger; pass structured data as extra={"fields": {...}}."""
+    _configure_root()
+    return logging.getLogger(f"{METRIC_PREFIX}.{name.removeprefix('src.')}")
+
+
+def fields(**values) -> dict:
+    """Shorthand for logging extras: log.info("saved", extra=fields(frames=120))."""
+    return {"fields": values}
+
+
+def sampled(count: int, every: int = FRAME_LOG_EVERY) -> bool:
+    """True once every `every` calls; used for per-frame log lines."""
+    return every > 0 and count % every == 0
+
+
+_log = get_logger("telemetry")
+
+
+# ========================================
+# METRICS
+# ========================================
+
+def _key(name: str, labels: dict) -> tuple:
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def increment(name: str, value: float = 1, **labels):
+    with _lock:
+        _counters[_key(name, labels)] += value
+
+
+def observe(name: str, value: float, buckets: tuple = LATENCY_BUCKETS_SECONDS, **labels):
+    """Add a sample to a histogram (bucket counts, sum and count, as Prometheus expects)."""
+    key = _key(name, labels)
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = {"buckets": buckets, "counts": [0] * len(buckets), "sum": 0.0, "count": 0}
+        for i, edge in enumerate(histogram["buckets"]):
+            if value <= edge:
+                histogram["counts"][i] += 1
+                break
+        histogram["sum"] += value
+        histogram["count"] += 1
+
+
+@contextmanager
+def span(stage: str, **attributes):
+    """
+    Time a stage into `stage_seconds{stage=...}` and count failures in `stage_errors_total`.
+
+    The first span in a context starts a trace id, which log lines inside it carry.
+    Yields a dict; keys added to it are logged with the span at DEBUG level.
+    """
+    token = _trace_id.set(uuid.uuid4().hex[:12]) if _trace_id.get() is None else None
+    attrs = dict(attributes)
+    started = time.perf_counter()
+    failed = False
+    try:
+        yield attrs
+    except BaseException:
+        failed = True
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        observe("stage_seconds", elapsed, stage=stage)
+        if failed:
+            increment("stage_errors_total", stage=stage)
+        if _log.isEnabledFor(logging.DEBUG):
+            _log.debug(f"span {stage}", extra=fields(stage=stage, ms=round(elapsed * 1000, 2), failed=failed, **attrs))
+        if token is not None:
+            _trace_id.reset(token)
+
+
+def get_stage_stats() -> dict:
+    """stage -> count, errors and mean seconds, from the span histograms."""
+    with _lock:
+        stats = {}
+        for (name, labels), h in _histograms.items():
+            if name != "stage_seconds":
+                continue
+            stage = dict(labels)["stage"]
+            stats[stage] = {"count": h["count"], "mean_s": h["sum"] / h["count"] if h["count"] else 0.0,
+                            "errors": int(_counters.get(_key("stage_errors_total", {"stage": stage}), 0))}
+        return stats
+
+
+# ========================================
+# PROMETHEUS EXPORT
+# ========================================
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(pairs, extra: dict | None = None) -> str:
+    items = list(pairs) + list((extra or {}).items())
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in items) + "}"
+
+
+def render_metrics() -> str:
+    """All counters and histograms in the Prometheus text exposition format."""
+    lines, typed = [], set()
+    with _lock:
+        for (name, labels), value in sorted(_counters.items()):
+            metric = f"{METRIC_PREFIX}_{name}"
+            if metric not in typed:
+                lines.append(f"# TYPE {metric} counter")
+                typed.add(metric)
+            lines.append(f"{metric}{_labels(labels)} {value:g}")
+        for (name, labels), h in sorted(_histograms.items(), key=lambda item: item[0]):
+            metric = f"{METRIC_PREFIX}_{name}"
+            if metric not in typed:
+                lines.append(f"# TYPE {metric} histogram")
+                typed.add(metric)
+            cumulative = 0
+            for edge, count in zip(h["buckets"], h["counts"]):
+                cumulative += count
+                lines.append(f"{metric}_bucket{_labels(labels, {'le': f'{edge:g}'})} {cumulative}")
+            lines.append(f"{metric}_bucket{_labels(labels, {'le': '+Inf'})} {h['count']}")
+            lines.append(f"{metric}_sum{_labels(labels)} {h['sum']:.6f}")
+            lines.append(f"{metric}_count{_labels(labels)} {h['count']}")
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_metrics().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_metrics_server(port: int | None = None) -> int | None:
+    """Serve /metrics on localhost in a daemon thread (once per process). Returns the port, or None if taken."""
+    global _metrics_server
+    with _lock:
+        if _metrics_server is not None:
+            return _metrics_server.server_address[1]
+        port = METRICS_PORT if port is None else port
+        try:
+            _metrics_server = ThreadingHTTPServer(("127.0.0.1", port), _MetricsHandler)
+        except OSError as e:
+            _log.warning("⚠️ Metrics endpoint not started", extra=fields(port=port, error=str(e)))
+            return None
+        _metrics_server.daemon_threads = True
+    threading.Thread(target=_metrics_server.serve_forever, daemon=True, name="metrics").start()
+    _log.info("📈 Metrics available", extra=fields(url=f"http://127.0.0.1:{_metrics_server.server_address[1]}/metrics"))
+    return _metrics_server.server_address[1]
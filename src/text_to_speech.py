@@ -1,18 +1,27 @@
 """
 Module for converting text to speech using OpenAI's TTS API.
 """
-import os
-from openai import OpenAI
+import re
 from dotenv import load_dotenv
 from pathlib import Path
+from src.llm_gateway import client, synthesize_speech
+from src.telemetry import get_logger, fields, span
 
 load_dotenv()
 
-try:
-    client = OpenAI()
-except Exception as e:
-    print(f"Error initializing OpenAI client: {e}")
-    client = None
+log = get_logger(__name__)
+
+MAX_TTS_CHARS = 4096  # Hard input limit of the TTS API
+
+_SENTENCE_END = re.compile(r"[.!?](?=\s|$)")
+
+def fit_for_speech(text: str, limit: int = MAX_TTS_CHARS) -> str:
+    """Cut text to at most `limit` characters, at the last sentence end that fits."""
+    if len(text) <= limit:
+        return text
+    head = text[:limit]
+    ends = [m.end() for m in _SENTENCE_END.finditer(head)]
+    return head[:ends[-1]] if ends else head.rsplit(" ", 1)[0]
 
 def text_to_speech(text_to_speak: str, output_filename: str = "temp_recap.mp3") -> Path:
     """
@@ -27,26 +36,29 @@ def text_to_speech(text_to_speak: str, output_filename: str = "temp_recap.mp3")
     """
     if not client:
         raise ConnectionError("OpenAI client not initialized.")
+
+    if len(text_to_speak) > MAX_TTS_CHARS:
+        log.warning("✂️ Text too long for speech, cutting at a sentence end",
+                    extra=fields(chars=len(text_to_speak), limit=MAX_TTS_CHARS))
+        text_to_speak = fit_for_speech(text_to_speak)
     
-    print(f"🗣️ Converting text to speech...")
+    log.debug("🗣️ Converting text to speech...", extra=fields(chars=len(text_to_speak)))
     
     try:
-        # Using the TTS API
-        response = client.audio.speech.create(
-            model="tts-1",
-            voice="nova", # A warm, friendly female voice
-            input=text_to_speak
-        )
-
-        # Stream the audio data to a file
-        output_path = Path(output_filename)
-        response.stream_to_file(output_path)
+        with span("tts"):
+            # Through the gateway: timeout, retries and the shared rate limit
+            output_path = synthesize_speech(
+                text_to_speak,
+                Path(output_filename),
+                model="tts-1",
+                voice="nova"  # A warm, friendly female voice
+            )
         
-        print(f"✅ Audio saved to: {output_path}")
+        log.info("✅ Audio saved", extra=fields(path=str(output_path)))
         return output_path
 
     except Exception as e:
-        print(f"❌ Error during text-to-speech conversion: {e}")
+        log.error(f"❌ Error during text-to-speech conversion: {e}")
         raise e
 
 # --- Test this module independently ---
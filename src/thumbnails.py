@@ -0,0 +1,89 @@
+# src/thumbnails.py
+"""
+Thumbnail cache for people photos.
+
+Originals in images/ can be several megabytes. Resized JPEG variants are
+generated once (at upload, or lazily the first time a photo is shown) and
+stored under images/thumbnails/ keyed by the content hash of the original,
+so renames or duplicate uploads reuse the same files.
+"""
+import hashlib
+import threading
+from pathlib import Path
+from PIL import Image, ImageOps
+
+THUMBNAIL_DIR = Path("images") / "thumbnails"
+THUMBNAIL_SIZES = {
+    "small": 160,   # Admin people list, recap sentences
+    "medium": 400,  # Who Is This match card
+}
+JPEG_QUALITY = 82
+
+_hash_cache = {}  # (path, mtime_ns, size) -> content hash
+_lock = threading.Lock()
+
+
+def content_hash(photo_path: str | Path) -> str:
+    """SHA-1 of a file's bytes, memoized per path/mtime so unchanged files are read once."""
+    path = Path(photo_path)
+    stat = path.stat()
+    key = (str(path.resolve()), stat.st_mtime_ns, stat.st_size)
+    with _lock:
+        if key in _hash_cache:
+            return _hash_cache[key]
+
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    photo_hash = digest.hexdigest()
+
+    with _lock:
+        _hash_cache[key] = photo_hash
+    return photo_hash
+
+
+def _thumbnail_path(photo_hash: str, size: str) -> Path:
+    return THUMBNAIL_DIR / f"{photo_hash}_{size}.jpg"
+
+
+def create_thumbnails(photo_path: str | Path) -> str | None:
+    """Generate every thumbnail size for a photo. Returns its content hash, or None on failure."""
+    try:
+        photo_hash = content_hash(photo_path)
+        missing = [size for size in THUMBNAIL_SIZES if not _thumbnail_path(photo_hash, size).exists()]
+        if not missing:
+            return photo_hash
+
+        THUMBNAIL_DIR.mkdir(parents=True, exist_ok=True)
+        with Image.open(photo_path) as img:
+            img = ImageOps.exif_transpose(img).convert("RGB")
+            # Largest first so each smaller size resamples an already reduced image
+            for size in sorted(missing, key=THUMBNAIL_SIZES.get, reverse=True):
+                max_side = THUMBNAIL_SIZES[size]
+                img.thumbnail((max_side, max_side), Image.LANCZOS)
+                target = _thumbnail_path(photo_hash, size)
+                tmp = target.with_suffix(".tmp")
+                img.save(tmp, "JPEG", quality=JPEG_QUALITY, optimize=True)
+                tmp.replace(target)  # Atomic, so concurrent reruns never see half-written files
+        return photo_hash
+    except Exception as e:
+        print(f"⚠️ Could not create thumbnails for {photo_path}: {e}")
+        return None
+
+
+def get_thumbnail(photo_path: str | None, size: str = "small", photo_hash: str | None = None) -> str | None:
+    """
+    Path of a cached thumbnail for a local photo, generating it if needed.
+
+    Returns None when the photo is not a local file (e.g. a URL or placeholder).
+    Pass the stored `photo_hash` to skip hashing the original entirely.
+    """
+    if photo_hash:
+        cached = _thumbnail_path(photo_hash, size)
+        if cached.exists():
+            return str(cached)
+    if not photo_path or not Path(photo_path).is_file():
+        return None
+    photo_hash = create_thumbnails(photo_path)
+    return str(_thumbnail_path(photo_hash, size)) if photo_hash else photo_path
@@ -0,0 +1,197 @@
+# src/token_budget.py
+"""
+Token counting and per-task prompt budgets.
+
+Inputs are measured before a prompt is built and, when over the task's
+budget, compressed: disfluencies (um/uh) removed, repeated lines dropped, and
+finally the oldest context truncated. Clinical extraction and the caregiver
+summary only ever get truncated, since hedges ("kind of dizzy") and repeated
+complaints carry meaning there. Savings are logged and tallied per task, so
+the size (and so the latency and cost) of every prompt has a hard upper bound.
+"""
+from collections import defaultdict
+import os
+import re
+import threading
+from src.telemetry import get_logger, fields
+from src.model_router import TASK_CLINICAL, TASK_CAREGIVER_SUMMARY
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("o200k_base")
+except Exception:  # E.g. offline on first run (the encoding is downloaded): fall back to a character-based estimate
+    _encoding = None
+
+# Input budgets, in tokens, for the variable part of each task's prompt
+TASK_BUDGETS = {
+    "simple_summary": 3000,
+    "caregiver_summary": 3000,
+    "clinical_json": 3000,
+    "recap": int(os.getenv("RECAP_TOKEN_BUDGET", "2000")),
+    "rollup": 2500,
+    "reminder": 1200,
+    "assistant": 1500,
+    "chatbot": 5000,
+}
+DEFAULT_BUDGET = 3000
+VERBATIM_TASKS = {TASK_CLINICAL, TASK_CAREGIVER_SUMMARY}  # No filler removal or dedupe, only truncation
+DEDUPE_MIN_WORDS = 8  # Shorter lines ("Are you okay?", "Yes.") are only collapsed when consecutive
+HEAD_SHARE = 0.2  # Share of a truncated transcript kept from its start (greetings say who is speaking)
+
+# Pure disfluencies only; "kind of", "I mean" and "uh-huh" (yes) carry meaning
+_FILLER_PATTERN = re.compile(r"(?<!-)\b(?:um+|uh+|erm+|hmm+)\b(?!-),?\s*", re.IGNORECASE)
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+|\n+")
+
+log = get_logger(__name__)
+
+_lock = threading.Lock()
+_saved = defaultdict(lambda: {"calls": 0, "trimmed": 0, "tokens_before": 0, "tokens_after": 0})
+
+
+def count_tokens(text: str) -> int:
+    """Exact count with tiktoken when installed, otherwise ~4 characters per token."""
+    if not text:
+        return 0
+    if _encoding is not None:
+        return len(_encoding.encode(text, disallowed_special=()))
+    return len(text) // 4 + 1
+
+
+def count_message_tokens(messages: list[dict]) -> int:
+    return sum(count_tokens(m.get("content") or "") + 4 for m in messages)  # ~4 tokens of framing per message
+
+
+def budget_for(task: str) -> int:
+    return TASK_BUDGETS.get(task, DEFAULT_BUDGET)
+
+
+def _log(task: str, before: int, after: int):
+    with _lock:
+        stats = _saved[task]
+        stats["calls"] += 1
+        stats["tokens_before"] += before
+        stats["tokens_after"] += after
+        stats["trimmed"] += int(after < before)
+    if after < before:
+        log.info("✂️ Prompt input trimmed", extra=fields(task=task, tokens_before=before, tokens_after=after))
+
+
+def _normalize(line: str) -> str:
+    return " ".join(re.findall(r"[a-z0-9']+", line.lower()))
+
+
+def dedupe_lines(lines: list[str]) -> list[str]:
+    """
+    Drop lines that repeat the previous line, or repeat an earlier line of at
+    least DEDUPE_MIN_WORDS words (ignoring case and punctuation). Short repeated
+    questions and answers are part of the conversation and are kept.
+    """
+    seen, unique, previous = set(), [], None
+    for line in lines:
+        key = _normalize(line)
+        if key and (key == previous or (key in seen and len(key.split()) >= DEDUPE_MIN_WORDS)):
+            continue
+        seen.add(key)
+        previous = key
+        unique.append(line)
+    return unique
+
+
+def remove_fillers(text: str) -> str:
+    text = _FILLER_PATTERN.sub("", text)
+    text = re.sub(r"[ \t]+([,.!?])", r"\1", text)  # "number 5 uh." -> "number 5."
+    text = re.sub(r",+([.!?])", r"\1", text)  # "the garden, um." -> "the garden."
+    text = re.sub(r",(?:[ \t]*,)+", ",", text)
+    return re.sub(r"[ \t]{2,}", " ", text).strip()
+
+
+def truncate_to_tokens(text: str, budget: int) -> str:
+    """The start of `text`, cut on a word boundary to fit `budget` tokens."""
+    if count_tokens(text) <= budget:
+        return text
+    words = text.split()
+    low, high = 0, len(words)
+    while low < high:  # Longest word prefix that fits, leaving room for the marker
+        mid = (low + high + 1) // 2
+        if count_tokens(" ".join(words[:mid])) <= budget - 2:
+            low = mid
+        else:
+            high = mid - 1
+    return " ".join(words[:low]) + " …"
+
+
+def compress_transcript(transcript: str, task: str, budget: int | None = None) -> str:
+    """
+    Fit a transcript into a task's budget.
+
+    Fillers and repeated sentences are removed only when the transcript is over
+    budget (never for VERBATIM_TASKS); if it still does not fit, the middle is
+    cut, keeping the opening (who is speaking) and the most recent part.
+    """
+    budget = budget or budget_for(task)
+    before = count_tokens(transcript)
+    if before <= budget:
+        _log(task, before, before)
+        return transcript
+
+    if task in VERBATIM_TASKS:
+        sentences = [s for s in _SENTENCE_SPLIT.split(transcript) if s.strip()]
+    else:
+        sentences = dedupe_lines([s for s in _SENTENCE_SPLIT.split(remove_fillers(transcript)) if s.strip()])
+    compressed = " ".join(sentences)
+
+    if count_tokens(compressed) > budget:
+        # Cut on sentence boundaries, or on words if a few run-on "sentences" make up the transcript
+        units = sentences if max(count_tokens(s) for s in sentences) <= budget // 4 else compressed.split()
+        head_budget = int(budget * HEAD_SHARE)
+        head, tail, used = [], [], 0
+        for sentence in units:
+            tokens = count_tokens(sentence)
+            if used + tokens > head_budget:
+                break
+            head.append(sentence)
+            used += tokens
+        for sentence in reversed(units[len(head):]):
+            tokens = count_tokens(sentence)
+            if used + tokens > budget - 10:
+                break
+            tail.append(sentence)
+            used += tokens
+        omitted = len(units) - len(head) - len(tail)
+        unit = "sentences" if units is sentences else "words"
+        compressed = " ".join(head + [f"[... {omitted} earlier {unit} omitted ...]"] + list(reversed(tail)))
+
+    _log(task, before, count_tokens(compressed))
+    return compressed
+
+
+def fit_lines(lines: list[str], task: str, budget: int | None = None, separator: str = "\n") -> list[str]:
+    """
+    Dedupe time-ordered context lines (oldest first) and drop the oldest until they fit the budget.
+    A newest line that alone exceeds the budget is cut short rather than dropped.
+    """
+    budget = budget or budget_for(task)
+    before = count_tokens(separator.join(lines))
+    if before <= budget:
+        _log(task, before, before)
+        return lines
+
+    kept, used = [], 0
+    unique = dedupe_lines(lines)
+    for line in reversed(unique):
+        tokens = count_tokens(line) + 1
+        if used + tokens > budget:
+            break
+        kept.append(line)
+        used += tokens
+    kept.reverse()
+    if not kept and unique:
+        kept = [truncate_to_tokens(unique[-1], budget - 1)]
+    _log(task, before, count_tokens(separator.join(kept)))
+    return kept
+
+
+def get_budget_stats() -> dict:
+    """Per-task count of budgeted inputs, how many were trimmed, and tokens saved."""
+    with _lock:
+        return {task: {**s, "tokens_saved": s["tokens_before"] - s["tokens_after"]} for task, s in _saved.items()}
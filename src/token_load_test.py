@@ -0,0 +1,105 @@
+# src/token_load_test.py
+"""
+Load test for the token server.
+
+Worker threads hit /get_token (or /health) over keep-alive connections for a
+fixed duration and the report shows requests per second, latency percentiles
+and errors. With --identities 1 nearly every request is a token-cache hit;
+raise it to measure signing cost for many distinct users.
+
+Usage:
+    poetry run python src/token_server.py &
+    poetry run python -m src.token_load_test --concurrency 32 --duration 20 --identities 200
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+import requests
+
+TOKEN_SERVER_HOST = os.getenv("TOKEN_SERVER_HOST", "127.0.0.1")
+TOKEN_SERVER_PORT = int(os.getenv("TOKEN_SERVER_PORT", "5000"))
+
+
+def percentile(ordered: list[float], q: float) -> float:
+    return ordered[max(int(len(ordered) * q) - 1, 0)] if ordered else 0.0
+
+
+def _worker(base_url: str, endpoint: str, identities: int, worker_id: int, deadline: float,
+            latencies: list, errors: list):
+    session = requests.Session()  # Keep-alive, as a long-running client would
+    i = worker_id
+    while time.perf_counter() < deadline:
+        params = {"identity": f"loadtest_user_{i % identities}"} if endpoint == "get_token" else None
+        started = time.perf_counter()
+        try:
+            response = session.get(f"{base_url}/{endpoint}", params=params, timeout=10)
+            ok = response.status_code == 200
+        except requests.RequestException:
+            ok = False
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        (latencies if ok else errors).append(elapsed_ms)
+        i += 1
+
+
+def run_load_test(base_url: str, endpoint: str = "get_token", concurrency: int = 16, duration: float = 10.0,
+                  identities: int = 1) -> dict:
+    latencies, errors = [], []  # list.append is atomic; no lock needed
+    deadline = time.perf_counter() + duration
+    threads = [threading.Thread(target=_worker, daemon=True,
+                                args=(base_url, endpoint, identities, n, deadline, latencies, errors))
+               for n in range(concurrency)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    ordered = sorted(latencies)
+    return {
+        "requests": len(latencies) + len(errors),
+        "errors": len(errors),
+        "requests_per_second": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(ordered, 0.50),
+        "p95_ms": percentile(ordered, 0.95),
+        "p99_ms": percentile(ordered, 0.99),
+        "max_ms": ordered[-1] if ordered else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the LiveKit token server")
+    parser.add_argument("--url", default=f"http://{TOKEN_SERVER_HOST}:{TOKEN_SERVER_PORT}")
+    parser.add_argument("--endpoint", choices=["get_token", "health"], default="get_token")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds")
+    parser.add_argument("--identities", type=int, default=1, help="Distinct identities to cycle through")
+    args = parser.parse_args()
+
+    try:
+        requests.get(f"{args.url}/health", timeout=2).raise_for_status()
+    except requests.RequestException as e:
+        print(f"❌ Token server not reachable at {args.url}: {e}")
+        sys.exit(1)
+
+    print(f"🔥 {args.concurrency} workers → {args.url}/{args.endpoint} for {args.duration:.0f}s "
+          f"({args.identities} identities)...")
+    result = run_load_test(args.url, args.endpoint, args.concurrency, args.duration, args.identities)
+
+    print("=" * 60)
+    print(f"Requests: {result['requests']}  Errors: {result['errors']}")
+    print(f"Throughput: {result['requests_per_second']:.0f} requests/s")
+    print(f"Latency: p50 {result['p50_ms']:.1f} ms · p95 {result['p95_ms']:.1f} ms · "
+          f"p99 {result['p99_ms']:.1f} ms · max {result['max_ms']:.1f} ms")
+    try:
+        cache = requests.get(f"{args.url}/health", timeout=2).json().get("token_cache", {})
+        print(f"Token cache: {cache}")
+    except (requests.RequestException, ValueError):
+        pass
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
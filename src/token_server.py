@@ -1,78 +1,394 @@
 # src/token_server.py
+"""
+LiveKit token server and room allocator.
+
+Every patient (ConversationSegment.patient_id) gets their own room, so
+households never share audio or an agent. Clients ask for a token with
+?patient_id=..., which must be listed in PATIENT_IDS or already have
+conversations in the database; agents call /rooms/allocate to claim rooms up to their
+capacity and keep them with /rooms/heartbeat. A room whose agent stops
+heartbeating for ROOM_LEASE_SECONDS is handed to the next agent that asks.
+The /rooms endpoints hand out join tokens for every household, so they require
+the shared AGENT_API_KEY in an X-Agent-Key header.
+Room leases live in this process, so run a single server process (waitress
+threads) when agents allocate rooms.
+
+Tokens are cached per (identity, room) and reused until they are within
+TOKEN_REFRESH_SECONDS of expiring, so Streamlit reruns and agent restarts do not
+sign a new JWT each time. Run it with a production WSGI server:
+
+    poetry run python src/token_server.py               # waitress (multi-threaded)
+    poetry run python src/token_server.py --dev         # Flask development server, local use only
+    gunicorn -w 4 -b 127.0.0.1:5000 src.token_server:app  # Linux/macOS, one cache per worker
+"""
+import argparse
+from functools import wraps
+import hashlib
+import hmac
+import re
+from collections import OrderedDict
+from datetime import timedelta
 import os
+import sys
+import threading
+import time
+from pathlib import Path
 from flask import Flask, jsonify, request
+from waitress import serve as waitress_serve
 from livekit import api  # Changed import
 from dotenv import load_dotenv
 
+if __name__ == "__main__":
+    sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.telemetry import get_logger, fields, increment, render_metrics
+from src.database import patient_exists
+
 load_dotenv()
 
+log = get_logger(__name__)
+
 app = Flask(__name__)
 
 LIVEKIT_URL = os.getenv("LIVEKIT_URL")
 LIVEKIT_API_KEY = os.getenv("LIVEKIT_API_KEY")
 LIVEKIT_API_SECRET = os.getenv("LIVEKIT_API_SECRET")
 
-# Room name - can be made dynamic later
-ROOM_NAME = "rememberme_call"
+# One room per patient: ROOM_PREFIX + patient_id
+ROOM_PREFIX = "rememberme_"
+DEFAULT_PATIENT_ID = "default_patient"
+ROOM_LEASE_SECONDS = int(os.getenv("ROOM_LEASE_SECONDS", "30"))
+KNOWN_PATIENT_IDS = [p.strip() for p in os.getenv("PATIENT_IDS", "").split(",") if p.strip()]
+AGENT_API_KEY = os.getenv("AGENT_API_KEY", "")
+
+TOKEN_SERVER_HOST = os.getenv("TOKEN_SERVER_HOST", "127.0.0.1")
+TOKEN_SERVER_PORT = int(os.getenv("TOKEN_SERVER_PORT", "5000"))
+TOKEN_SERVER_THREADS = int(os.getenv("TOKEN_SERVER_THREADS", "16"))
+
+TOKEN_TTL_SECONDS = int(os.getenv("TOKEN_TTL_SECONDS", str(6 * 3600)))  # LiveKit's default token lifetime
+TOKEN_REFRESH_SECONDS = int(os.getenv("TOKEN_REFRESH_SECONDS", "600"))  # Re-sign when less than this is left
+TOKEN_CACHE_SIZE = 10000
+
+
+class TokenCache:
+    """LRU of signed tokens per (identity, room), each reused until close to expiry."""
+
+    def __init__(self, max_size: int = TOKEN_CACHE_SIZE, refresh_seconds: int = TOKEN_REFRESH_SECONDS):
+        self.max_size = max_size
+        self.refresh_seconds = refresh_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple) -> tuple[str, float] | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[1] - time.time() > self.refresh_seconds:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+            return None
+
+    def put(self, key: tuple, jwt_token: str, expires_at: float):
+        with self._lock:
+            self._entries[key] = (jwt_token, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {"size": len(self._entries), "hits": self.hits, "misses": self.misses,
+                    "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0}
+
+
+_token_cache = TokenCache()
+
+
+def _sign_token(identity: str, room: str) -> tuple[str, float]:
+    """Mint a LiveKit JWT; returns (token, unix expiry)."""
+    token = api.AccessToken(LIVEKIT_API_KEY, LIVEKIT_API_SECRET)
+    token.with_identity(identity)
+    token.with_name(identity)
+    token.with_ttl(timedelta(seconds=TOKEN_TTL_SECONDS))
+
+    # Define permissions using VideoGrants (CORRECTED)
+    token.with_grants(api.VideoGrants(
+        room_join=True,
+        room=room,
+        can_publish=True,
+        can_subscribe=True,
+    ))
+    return token.to_jwt(), time.time() + TOKEN_TTL_SECONDS
+
+
+def get_cached_token(identity: str, room: str) -> tuple[str, float]:
+    """Cached token for (identity, room), signing a new one only when missing or about to expire."""
+    key = (identity, room)
+    cached = _token_cache.get(key)
+    if cached:
+        increment("token_requests_total", cache="hit")
+        return cached
+    jwt_token, expires_at = _sign_token(identity, room)
+    _token_cache.put(key, jwt_token, expires_at)
+    increment("token_requests_total", cache="miss")
+    log.info("🎫 Token generated", extra=fields(identity=identity, room=room))
+    return jwt_token, expires_at
+
+
+def room_for_patient(patient_id: str) -> str:
+    """
+    Deterministic, collision-free room name for a patient. IDs with characters
+    LiveKit would reject are sanitized and get a hash suffix of the original,
+    so "john.doe" and "john_doe" never share a room.
+    """
+    safe = re.sub(r"[^A-Za-z0-9_-]", "_", patient_id)
+    if safe != patient_id:
+        safe += "_" + hashlib.sha1(patient_id.encode("utf-8")).hexdigest()[:8]
+    return ROOM_PREFIX + safe
+
+
+class RoomRegistry:
+    """Patient rooms and which agent holds each one, with expiring leases."""
+
+    def __init__(self, lease_seconds: int = ROOM_LEASE_SECONDS, patient_ids: list[str] | None = None):
+        self.lease_seconds = lease_seconds
+        self._rooms = {}  # patient_id -> {"room", "agent_id", "lease_expires"}
+        self._lock = threading.Lock()
+        for patient_id in patient_ids or []:
+            self.register(patient_id)
+
+    def register(self, patient_id: str) -> str:
+        with self._lock:
+            entry = self._rooms.setdefault(patient_id, {"room": room_for_patient(patient_id),
+                                                        "agent_id": None, "lease_expires": 0.0})
+            return entry["room"]
+
+    def _is_free(self, entry: dict, now: float) -> bool:
+        return entry["agent_id"] is None or entry["lease_expires"] < now
+
+    def allocate(self, agent_id: str, capacity: int) -> list[dict]:
+        """Renew this agent's rooms and give it free ones until it holds `capacity`."""
+        now = time.time()
+        with self._lock:
+            held = [e for e in self._rooms.values() if e["agent_id"] == agent_id and e["lease_expires"] >= now]
+            for patient_id, entry in self._rooms.items():
+                if len(held) >= capacity:
+                    break
+                if self._is_free(entry, now):
+                    if entry["agent_id"] not in (None, agent_id):
+                        log.warning("⚠️ Room lease expired, reassigning",
+                                    extra=fields(room=entry["room"], previous_agent=entry["agent_id"], agent=agent_id))
+                    entry["agent_id"] = agent_id
+                    held.append(entry)
+            for entry in held:
+                entry["lease_expires"] = now + self.lease_seconds
+            return self._assignments(agent_id, now)
+
+    def heartbeat(self, agent_id: str) -> list[dict]:
+        """Extend the agent's leases; returns the rooms it still holds."""
+        now = time.time()
+        with self._lock:
+            for entry in self._rooms.values():
+                if entry["agent_id"] == agent_id and entry["lease_expires"] >= now:
+                    entry["lease_expires"] = now + self.lease_seconds
+            return self._assignments(agent_id, now)
+
+    def release(self, agent_id: str, patient_id: str | None = None) -> int:
+        with self._lock:
+            released = 0
+            for pid, entry in self._rooms.items():
+                if entry["agent_id"] == agent_id and patient_id in (None, pid):
+                    entry["agent_id"], entry["lease_expires"] = None, 0.0
+                    released += 1
+            return released
+
+    def _assignments(self, agent_id: str, now: float) -> list[dict]:
+        return [{"patient_id": pid, "room": e["room"], "lease_expires": int(e["lease_expires"])}
+                for pid, e in self._rooms.items() if e["agent_id"] == agent_id and e["lease_expires"] >= now]
+
+    def snapshot(self) -> list[dict]:
+        now = time.time()
+        with self._lock:
+            return [{"patient_id": pid, "room": e["room"],
+                     "agent_id": None if self._is_free(e, now) else e["agent_id"]}
+                    for pid, e in self._rooms.items()]
+
+
+_rooms = RoomRegistry(patient_ids=KNOWN_PATIENT_IDS or [DEFAULT_PATIENT_ID])
+_allowed_patients = set(KNOWN_PATIENT_IDS or [DEFAULT_PATIENT_ID])
+_allowed_lock = threading.Lock()
+
+
+def is_known_patient(patient_id: str) -> bool:
+    """Configured in PATIENT_IDS (or the default patient), or recorded in the database; found IDs are remembered."""
+    with _allowed_lock:
+        if patient_id in _allowed_patients:
+            return True
+    if not patient_exists(patient_id):
+        return False
+    with _allowed_lock:
+        _allowed_patients.add(patient_id)
+    return True
 
 
 @app.route("/get_token", methods=['GET'])
 def get_livekit_token():
-    """Generate LiveKit access token for a user"""
+    """Return a LiveKit access token for a user (cached until near expiry)"""
 
     if not all([LIVEKIT_URL, LIVEKIT_API_KEY, LIVEKIT_API_SECRET]):
         return jsonify({"error": "LiveKit server not configured. Check .env file"}), 500
 
-    # Get identity from query parameters
+    # Get identity and patient from query parameters
     identity = request.args.get('identity', 'unknown_user')
-
-    print(f"🎫 Generating token for: {identity}")
+    patient_id = request.args.get('patient_id') or DEFAULT_PATIENT_ID
 
     try:
-        # Create access token (CORRECTED API)
-        token = api.AccessToken(LIVEKIT_API_KEY, LIVEKIT_API_SECRET)
-        token.with_identity(identity)
-        token.with_name(identity)
+        if not is_known_patient(patient_id):
+            increment("token_rejected_total")
+            log.warning("🚫 Token requested for unknown patient", extra=fields(identity=identity, patient_id=patient_id))
+            return jsonify({"error": f"Unknown patient '{patient_id}'"}), 404
+        room = _rooms.register(patient_id)  # First request for a patient creates their room
+        jwt_token, expires_at = get_cached_token(identity, room)
+        return jsonify({
+            "token": jwt_token,
+            "room": room,
+            "patient_id": patient_id,
+            "url": LIVEKIT_URL,
+            "expires_at": int(expires_at)
+        })
 
-        # Define permissions using VideoGrants (CORRECTED)
-        token.with_grants(api.VideoGrants(
-            room_join=True,
-            room=ROOM_NAME,
-            can_publish=True,
-            can_subscribe=True,
-        ))
+    except Exception as e:
+        increment("token_errors_total")
+        log.error(f"❌ Error generating token: {e}")
+        return jsonify({"error": str(e)}), 500
 
-        jwt_token = token.to_jwt()
 
-        print(f"✅ Token generated successfully for {identity}")
+def require_agent_key(view):
+    """Reject /rooms requests without the shared agent secret (and all of them if none is configured)."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not AGENT_API_KEY:
+            return jsonify({"error": "AGENT_API_KEY not configured on the token server"}), 503
+        if not hmac.compare_digest(request.headers.get("X-Agent-Key", ""), AGENT_API_KEY):
+            increment("token_rejected_total")
+            log.warning("🚫 Room request with a missing or wrong agent key", extra=fields(path=request.path))
+            return jsonify({"error": "Invalid agent key"}), 401
+        return view(*args, **kwargs)
+    return wrapper
 
-        return jsonify({
-            "token": jwt_token,
-            "room": ROOM_NAME,
-            "url": LIVEKIT_URL
-        })
 
+def _agent_request() -> tuple[dict, str | None]:
+    body = request.get_json(silent=True) or {}
+    return body, (body.get("agent_id") or "").strip() or None
+
+
+def _with_tokens(agent_id: str, assignments: list[dict]) -> dict:
+    """Allocation response: each assigned room with a token for the agent to join it."""
+    rooms = []
+    for assignment in assignments:
+        jwt_token, expires_at = get_cached_token(agent_id, assignment["room"])
+        rooms.append({**assignment, "token": jwt_token, "token_expires_at": int(expires_at)})
+    return {"agent_id": agent_id, "rooms": rooms, "url": LIVEKIT_URL, "lease_seconds": _rooms.lease_seconds}
+
+
+@app.route("/rooms/allocate", methods=['POST'])
+@require_agent_key
+def allocate_rooms():
+    """Agent claims free patient rooms up to {"capacity": N}; also renews the rooms it already holds"""
+    body, agent_id = _agent_request()
+    if not agent_id:
+        return jsonify({"error": "agent_id is required"}), 400
+    try:
+        capacity = max(1, int(body.get("capacity", 1)))
+    except (TypeError, ValueError):
+        return jsonify({"error": "capacity must be an integer"}), 400
+    if not all([LIVEKIT_URL, LIVEKIT_API_KEY, LIVEKIT_API_SECRET]):
+        return jsonify({"error": "LiveKit server not configured. Check .env file"}), 500
+    try:
+        assignments = _rooms.allocate(agent_id, capacity)
+        return jsonify(_with_tokens(agent_id, assignments))
     except Exception as e:
-        print(f"❌ Error generating token: {e}")
+        increment("token_errors_total")
+        log.error(f"❌ Error allocating rooms: {e}")
         return jsonify({"error": str(e)}), 500
 
 
+@app.route("/rooms/heartbeat", methods=['POST'])
+@require_agent_key
+def heartbeat_rooms():
+    """Keep an agent's leases alive without asking for more rooms"""
+    _, agent_id = _agent_request()
+    if not agent_id:
+        return jsonify({"error": "agent_id is required"}), 400
+    return jsonify({"agent_id": agent_id, "rooms": _rooms.heartbeat(agent_id), "lease_seconds": _rooms.lease_seconds})
+
+
+@app.route("/rooms/release", methods=['POST'])
+@require_agent_key
+def release_rooms():
+    """Give rooms back (all of the agent's, or {"patient_id": ...}) so another agent can take them"""
+    body, agent_id = _agent_request()
+    if not agent_id:
+        return jsonify({"error": "agent_id is required"}), 400
+    return jsonify({"released": _rooms.release(agent_id, body.get("patient_id"))})
+
+
+@app.route("/rooms", methods=['GET'])
+@require_agent_key
+def list_rooms():
+    """Every patient room and the agent currently serving it (null if unassigned)"""
+    return jsonify({"rooms": _rooms.snapshot()})
+
+
 @app.route("/health", methods=['GET'])
 def health_check():
     """Health check endpoint"""
-    return jsonify({
+    response = jsonify({
         "status": "ok",
-        "livekit_configured": all([LIVEKIT_URL, LIVEKIT_API_KEY, LIVEKIT_API_SECRET])
+        "livekit_configured": all([LIVEKIT_URL, LIVEKIT_API_KEY, LIVEKIT_API_SECRET]),
+        "token_cache": _token_cache.stats(),
+        "rooms": len(_rooms.snapshot())
     })
+    response.headers["Cache-Control"] = "max-age=5"
+    return response
+
+
+@app.route("/metrics", methods=['GET'])
+def metrics():
+    """Prometheus metrics (token cache hits/misses, errors)"""
+    return render_metrics(), 200, {"Content-Type": "text/plain; version=0.0.4"}
+
+
+def serve(host: str = TOKEN_SERVER_HOST, port: int = TOKEN_SERVER_PORT, dev: bool = False,
+          threads: int = TOKEN_SERVER_THREADS):
+    """Run under waitress (multi-threaded production WSGI server); Flask's own server only with dev=True."""
+    if dev:
+        print("⚠️ Serving with Flask's development server (--dev); do not use it in production")
+        app.run(host=host, port=port, debug=False, threaded=True)
+        return
+    print(f"✅ Serving with waitress ({threads} threads)")
+    waitress_serve(app, host=host, port=port, threads=threads, ident=None)
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="LiveKit token server")
+    parser.add_argument("--host", default=TOKEN_SERVER_HOST)
+    parser.add_argument("--port", type=int, default=TOKEN_SERVER_PORT)
+    parser.add_argument("--threads", type=int, default=TOKEN_SERVER_THREADS)
+    parser.add_argument("--dev", action="store_true", help="Use Flask's development server")
+    args = parser.parse_args()
+
     print("=" * 50)
     print("🚀 Starting LiveKit Token Server")
     print("=" * 50)
-    print(f"URL: http://localhost:5000")
+    print(f"URL: http://{args.host}:{args.port}")
     print(f"LiveKit URL: {LIVEKIT_URL}")
-    print(f"Room Name: {ROOM_NAME}")
+    print(f"Rooms: {ROOM_PREFIX}<patient_id> (lease {ROOM_LEASE_SECONDS}s)")
+    print(f"Token TTL: {TOKEN_TTL_SECONDS}s (re-signed {TOKEN_REFRESH_SECONDS}s before expiry)")
     print("=" * 50)
 
     if not all([LIVEKIT_URL, LIVEKIT_API_KEY, LIVEKIT_API_SECRET]):
@@ -83,7 +399,9 @@ if __name__ == "__main__":
         print("  LIVEKIT_API_SECRET=your_secret")
     else:
         print("✅ LiveKit credentials loaded")
+    if not AGENT_API_KEY:
+        print("⚠️  AGENT_API_KEY not set: agents cannot claim rooms until it is (same value for every agent)")
 
     print("=" * 50)
 
-    app.run(port=5000, debug=False)
\ No newline at end of file
+    serve(args.host, args.port, args.dev, args.threads)
@@ -1,22 +1,15 @@
 """
 Module for transcribing audio files using OpenAI's Whisper API.
 """
-import os
-from openai import OpenAI
 from dotenv import load_dotenv
 from pathlib import Path
+from src.llm_gateway import client, transcribe_file
+from src.telemetry import get_logger, fields
 
 # Load API key from .env file
 load_dotenv()
 
-# Initialize the OpenAI client
-# It will automatically pick up the OPENAI_API_KEY from your environment
-try:
-    client = OpenAI()
-except Exception as e:
-    print(f"Error initializing OpenAI client: {e}")
-    print("Please make sure your OPENAI_API_KEY is set in the .env file.")
-    client = None
+log = get_logger(__name__)
 
 def transcribe_audio(audio_file_path: str | Path) -> str:
     """
@@ -34,23 +27,17 @@ def transcribe_audio(audio_file_path: str | Path) -> str:
     if not Path(audio_file_path).exists():
         return f"Error: Audio file not found at {audio_file_path}"
 
-    print(f"📝 Transcribing {audio_file_path}...")
+    log.debug("📝 Transcribing...", extra=fields(path=str(audio_file_path)))
     
     try:
-        # Open the audio file in binary read mode
-        with open(audio_file_path, "rb") as audio_file:
-            # Call the OpenAI API
-            transcription = client.audio.transcriptions.create(
-                model="whisper-1",
-                file=audio_file,
-                response_format="text" # Ask for plain text
-            )
+        # Through the gateway: short timeout, retries and the shared rate limit
+        transcription = transcribe_file(audio_file_path, model="whisper-1")
         
-        print("✅ Transcription complete!")
+        log.debug("✅ Transcription complete!", extra=fields(chars=len(transcription)))
         return transcription
 
     except Exception as e:
-        print(f"❌ Error during transcription: {e}")
+        log.error(f"❌ Error during transcription: {e}")
         return f"Error: {e}"
 
 # --- Test this module independently ---
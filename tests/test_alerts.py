@@ -0,0 +1,35 @@
+# tests/test_alerts.py
+from datetime import datetime, timedelta
+
+from src import alerts
+
+AN_HOUR_AGO = datetime.now() - timedelta(hours=1)
+
+
+def _alert(external_ms=None, notifications=None, detected_at=AN_HOUR_AGO):
+    return {"detected_at": detected_at, "notification_latency_ms": external_ms,
+            "notifications": {"dashboard": {"status": "sent"}} if notifications is None else notifications}
+
+
+def test_unnotified_alerts_count_as_sla_misses(monkeypatch):
+    monkeypatch.setattr(alerts, "get_recent_alerts", lambda limit: [
+        _alert(external_ms=800),
+        _alert(),  # Dashboard only: no webhook or email configured
+        _alert(notifications={}),  # Dispatch never finished
+    ])
+    stats = alerts.get_alert_latency_stats()
+    assert (stats["count"], stats["notified"], stats["unnotified"]) == (3, 1, 2)
+    assert stats["within_sla"] == 1 / 3
+    assert stats["p50_ms"] == 800
+
+
+def test_no_external_notifier_is_zero_compliance(monkeypatch):
+    monkeypatch.setattr(alerts, "get_recent_alerts", lambda limit: [_alert(), _alert()])
+    stats = alerts.get_alert_latency_stats()
+    assert stats["count"] == 2 and stats["unnotified"] == 2 and stats["within_sla"] == 0.0
+
+
+def test_alerts_still_dispatching_are_skipped(monkeypatch):
+    monkeypatch.setattr(alerts, "get_recent_alerts",
+                        lambda limit: [_alert(notifications={}, detected_at=datetime.now())])
+    assert alerts.get_alert_latency_stats()["count"] == 0
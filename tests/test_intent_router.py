@@ -0,0 +1,93 @@
+# tests/test_intent_router.py
+from datetime import datetime
+
+import pytest
+
+from src import intent_router
+
+NOW = datetime(2026, 3, 2, 11, 10)  # A Monday
+
+
+class FixedDatetime(datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return NOW
+
+
+MEDICATIONS = [
+    {"name": "Aspirin", "dosage": "81mg", "time_to_take": "08:00 AM", "schedule_type": "Daily",
+     "purpose": "your heart", "last_reminded": FixedDatetime(2026, 3, 2, 8, 0)},
+    {"name": "Ibuprofen", "dosage": "200mg", "time_to_take": "08:00 PM", "schedule_type": "Daily", "purpose": "pain"},
+]
+PEOPLE = [
+    {"name": "Samantha Lee", "relationship": "Daughter"},
+    {"name": "Sarah", "relationship": "Friend"},
+]
+
+
+@pytest.fixture(autouse=True)
+def data(monkeypatch):
+    monkeypatch.setattr(intent_router, "datetime", FixedDatetime)
+    monkeypatch.setattr(intent_router, "get_all_medications", lambda: MEDICATIONS)
+    monkeypatch.setattr(intent_router, "get_all_people", lambda: PEOPLE)
+
+
+@pytest.mark.parametrize("question", ["What time is it?", "what's the time", "Can you tell me the time, please?"])
+def test_bare_time_questions(question):
+    assert intent_router.route_question(question) == "It's 11:10 AM on Monday."
+
+
+@pytest.mark.parametrize("question", ["What day is it today?", "What's the date?", "What is today's date?"])
+def test_bare_date_questions(question):
+    assert intent_router.route_question(question) == "Today is Monday, March 2, 2026."
+
+
+@pytest.mark.parametrize("question", [
+    "What time is Sarah coming?",
+    "What time does the bus leave?",
+    "What day is my doctor's appointment?",
+])
+def test_other_time_questions_go_to_the_llm(question):
+    assert intent_router.route_question(question) is None
+
+
+def test_named_medication_time_is_not_the_clock():
+    answer = intent_router.route_question("What time should I take aspirin?")
+    assert answer.startswith("You take Aspirin (81mg) at 08:00 AM")
+
+
+def test_next_medicine():
+    assert intent_router.route_question("When is my next pill?").startswith("Your next medicine is Ibuprofen at 08:00 PM")
+
+
+@pytest.mark.parametrize("question", ["Did I take my pills today?", "Have I taken my aspirin?"])
+def test_taken_questions_report_reminders_not_doses(question):
+    answer = intent_router.route_question(question)
+    assert "I reminded you to take Aspirin at 8:00 AM." in answer
+    assert "can't tell whether you took it" in answer
+    assert "next medicine" not in answer
+
+
+def test_taken_question_before_any_reminder(monkeypatch):
+    monkeypatch.setattr(intent_router, "get_all_medications", lambda: [{**MEDICATIONS[0], "last_reminded": None}])
+    answer = intent_router.route_question("Did I take my medicine?")
+    assert answer.startswith("I haven't reminded you about Aspirin yet today")
+
+
+@pytest.mark.parametrize("question", ["What is Ibuprofen for?", "I hate my pills"])
+def test_non_schedule_medication_questions_go_to_the_llm(question):
+    assert intent_router.route_question(question) is None
+
+
+@pytest.mark.parametrize("question, answer", [
+    ("Who is Samantha?", "Samantha Lee is your daughter."),
+    ("Who is Samantha Lee", "Samantha Lee is your daughter."),
+    ("Who is Sarah to me?", "Sarah is your friend."),
+])
+def test_person_questions(question, answer):
+    assert intent_router.route_question(question) == answer
+
+
+@pytest.mark.parametrize("question", ["Who is Sarah's husband?", "Who is Sam?"])
+def test_possessives_and_partial_names_go_to_the_llm(question):
+    assert intent_router.route_question(question) is None
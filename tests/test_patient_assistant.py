@@ -0,0 +1,34 @@
+# tests/test_patient_assistant.py
+import pytest
+
+from src.patient_assistant import detect_emergency
+
+
+@pytest.mark.parametrize("transcript, keyword", [
+    ("Help me, I fell down", "help"),
+    ("Oh no I fell down", "fell down"),
+    ("no no help me", "help"),
+    ("please stop it help me", "help"),
+    ("I have chest pain", "chest pain"),
+    ("Call an ambulance!", "call 911"),
+    ("I feel so dizzy", "dizzy"),
+    ("I'm not breathing well", "can't breathe"),
+    ("I don't know what happened, help me", "help"),
+    ("I'm not sure where I am and I fell", "fell down"),
+])
+def test_detects_emergencies(transcript, keyword):
+    assert detect_emergency(transcript) == (True, keyword)
+
+
+@pytest.mark.parametrize("transcript", [
+    "I'm not dizzy",
+    "I'm not feeling dizzy today",
+    "I don't need help",
+    "I didn't need any help with lunch",
+    "I don’t really need help, thanks",
+    "That was very helpful",
+    "We talked about the garden",
+    "",
+])
+def test_ignores_non_emergencies(transcript):
+    assert detect_emergency(transcript) == (False, "")
@@ -0,0 +1,45 @@
+# tests/test_reprocessing.py
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+
+from src import reprocessing
+
+CLINICAL = {"participant": "Sarah", "topics_discussed": ["garden"], "patient_mood": "calm",
+            "cognitive_state": "clear", "key_concerns": []}
+
+
+@pytest.fixture
+def segment():
+    return {"_id": ObjectId(), "patient_id": "household_b", "transcript": "We talked about the garden.",
+            "start_time": datetime(2026, 1, 1, 9), "end_time": datetime(2026, 1, 1, 9, 5)}
+
+
+@pytest.fixture
+def summarizers(monkeypatch):
+    monkeypatch.setattr(reprocessing, "summarize_transcript_clinical", lambda t: dict(CLINICAL))
+    monkeypatch.setattr(reprocessing, "summarize_transcript_simple", lambda t: "You talked about the garden.")
+    monkeypatch.setattr(reprocessing, "summarize_transcript_caregiver", lambda t: "Calm chat about the garden.")
+    monkeypatch.setattr(reprocessing, "model_for", lambda task: "test-model")
+
+
+def test_summarize_segment_keeps_patient_and_link(segment, summarizers):
+    summary = reprocessing.summarize_segment(segment)
+    assert summary["segment_id"] == str(segment["_id"])
+    assert summary["patient_id"] == "household_b"
+    assert summary["simple_summary"] == "You talked about the garden."
+
+
+@pytest.mark.parametrize("failing, message", [
+    ("summarize_transcript_simple", "Error creating summary."),
+    ("summarize_transcript_caregiver", "Error creating caregiver summary."),
+])
+def test_failed_text_summary_fails_the_segment(segment, summarizers, monkeypatch, failing, message):
+    monkeypatch.setattr(reprocessing, failing, lambda t: message)
+    assert reprocessing.summarize_segment(segment) is None
+
+
+def test_failed_clinical_summary_fails_the_segment(segment, summarizers, monkeypatch):
+    monkeypatch.setattr(reprocessing, "summarize_transcript_clinical", lambda t: {"error": "timeout"})
+    assert reprocessing.summarize_segment(segment) is None
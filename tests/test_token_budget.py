@@ -0,0 +1,63 @@
+# tests/test_token_budget.py
+import pytest
+
+from src.model_router import TASK_CLINICAL, TASK_CAREGIVER_SUMMARY, TASK_SIMPLE_SUMMARY
+from src.token_budget import compress_transcript, count_tokens, dedupe_lines, fit_lines, remove_fillers
+
+LONG_LINE = "I went to the store with Sarah this morning to buy bread."
+
+
+def test_dedupe_keeps_short_repeated_questions_and_answers():
+    lines = ["Are you okay?", "Yes.", "Did you eat?", "Yes.", "Are you okay?"]
+    assert dedupe_lines(lines) == lines
+
+
+def test_dedupe_collapses_consecutive_and_long_repeats():
+    lines = ["Yes.", "yes", LONG_LINE, "Nice.", LONG_LINE.upper()]
+    assert dedupe_lines(lines) == ["Yes.", LONG_LINE, "Nice."]
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Um, I went to the garden, um.", "I went to the garden."),
+    ("It was uh number 5 uh.", "It was number 5."),
+    ("I feel kind of dizzy, I mean it.", "I feel kind of dizzy, I mean it."),
+    ("Uh-huh, mm-hmm, that's right.", "Uh-huh, mm-hmm, that's right."),
+])
+def test_remove_fillers_only_drops_disfluencies(text, expected):
+    assert remove_fillers(text) == expected
+
+
+def test_compress_transcript_leaves_short_transcripts_alone():
+    assert compress_transcript("Um, I feel kind of dizzy.", TASK_SIMPLE_SUMMARY) == "Um, I feel kind of dizzy."
+
+
+@pytest.mark.parametrize("task", [TASK_CLINICAL, TASK_CAREGIVER_SUMMARY])
+def test_compress_transcript_is_verbatim_for_symptom_tasks(task):
+    transcript = "Um, I feel kind of dizzy. Are you okay? Yes. " * 200
+    compressed = compress_transcript(transcript, task, budget=200)
+    assert count_tokens(compressed) <= 200
+    assert compressed.startswith("Um, I feel kind of dizzy. Are you okay? Yes. Um, I feel kind of dizzy.")
+    assert "omitted" in compressed
+
+
+def test_compress_transcript_removes_disfluencies_for_patient_summary():
+    transcript = "Um, I feel kind of dizzy. Are you okay? Yes. " * 200
+    compressed = compress_transcript(transcript, TASK_SIMPLE_SUMMARY, budget=200)
+    assert count_tokens(compressed) <= 200
+    assert compressed.startswith("I feel kind of dizzy. Are you okay? Yes.")
+
+
+def test_fit_lines_drops_the_oldest_lines():
+    lines = [f"Line {i}: {LONG_LINE}" for i in range(50)]
+    fitted = fit_lines(lines, TASK_SIMPLE_SUMMARY, budget=100)
+    assert fitted and fitted[-1] == lines[-1]
+    assert lines[0] not in fitted
+    assert count_tokens("\n".join(fitted)) <= 100
+
+
+def test_fit_lines_cuts_a_single_oversized_line():
+    huge = " ".join(f"word{i}" for i in range(2000))
+    fitted = fit_lines(["old line", huge], TASK_SIMPLE_SUMMARY, budget=50)
+    assert len(fitted) == 1
+    assert fitted[0].startswith("word0 word1")
+    assert count_tokens(fitted[0]) <= 50
@@ -0,0 +1,78 @@
+# tests/test_token_server.py
+import pytest
+
+from src import token_server
+from src.token_server import RoomRegistry, room_for_patient, ROOM_PREFIX
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(token_server, "time", fake)
+    return fake
+
+
+def test_room_names_are_stable_and_collision_free():
+    assert room_for_patient("alice") == ROOM_PREFIX + "alice"
+    assert room_for_patient("john_doe") == ROOM_PREFIX + "john_doe"
+    assert room_for_patient("john.doe") != room_for_patient("john_doe")
+    assert room_for_patient("john.doe") == room_for_patient("john.doe")
+    assert room_for_patient("john doe") != room_for_patient("john.doe")
+
+
+def test_allocate_respects_capacity(clock):
+    registry = RoomRegistry(lease_seconds=30, patient_ids=["a", "b", "c"])
+    assert {r["patient_id"] for r in registry.allocate("agent-1", capacity=2)} == {"a", "b"}
+    assert {r["patient_id"] for r in registry.allocate("agent-2", capacity=5)} == {"c"}
+    # Renewing does not grow past capacity or take another agent's rooms
+    assert len(registry.allocate("agent-1", capacity=2)) == 2
+    assert registry.allocate("agent-3", capacity=1) == []
+
+
+def test_expired_lease_is_reassigned(clock):
+    registry = RoomRegistry(lease_seconds=30, patient_ids=["a"])
+    registry.allocate("agent-1", capacity=1)
+
+    clock.now += 20
+    assert registry.allocate("agent-2", capacity=1) == []
+    assert registry.heartbeat("agent-1")[0]["patient_id"] == "a"
+
+    clock.now += 31  # agent-1 stopped heartbeating
+    assert registry.heartbeat("agent-1") == []
+    assert [r["patient_id"] for r in registry.allocate("agent-2", capacity=1)] == ["a"]
+    assert registry.snapshot() == [{"patient_id": "a", "room": room_for_patient("a"), "agent_id": "agent-2"}]
+
+
+def test_release_frees_rooms(clock):
+    registry = RoomRegistry(lease_seconds=30, patient_ids=["a", "b"])
+    registry.allocate("agent-1", capacity=2)
+    assert registry.release("agent-1", "a") == 1
+    assert [r["patient_id"] for r in registry.allocate("agent-2", capacity=2)] == ["a"]
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(token_server, "AGENT_API_KEY", "s3cret")
+    monkeypatch.setattr(token_server, "_rooms", RoomRegistry(patient_ids=["a"]))
+    return token_server.app.test_client()
+
+
+def test_room_endpoints_require_agent_key(client):
+    assert client.post("/rooms/allocate", json={"agent_id": "x", "capacity": 99}).status_code == 401
+    assert client.post("/rooms/allocate", json={"agent_id": "x"}, headers={"X-Agent-Key": "wrong"}).status_code == 401
+    assert client.get("/rooms").status_code == 401
+    assert client.get("/rooms", headers={"X-Agent-Key": "s3cret"}).status_code == 200
+
+
+def test_non_integer_capacity_is_rejected(client):
+    response = client.post("/rooms/allocate", json={"agent_id": "x", "capacity": "lots"},
+                           headers={"X-Agent-Key": "s3cret"})
+    assert response.status_code == 400